@@ -3,13 +3,27 @@ import os
 
 from flask import Flask
 
+from app.cli import register_commands
 from app.config import config_by_name
-from app.data.data_loader import DataLoader, DataLoadError
-from app.routes.prices import prices_bp
+from app.data.data_loader import DataLoadError
+from app.data.states import StateTable
+from app.metrics import init_metrics
+from app.profiling import SPAN_LOGGER, init_profiling
+from app.routes.http_cache import EXTENSION_KEY as SERIALIZED_RESPONSES
+from app.routes.http_cache import SerializedResponses
+from app.routes.prices import prices_bp, prime_serialized_responses
 from app.services.price_service import PriceService
+from app.services.reloader import DatasetReloader
+from app.services.storage import open_backend
 
 
-def create_app(config_name: str | None = None) -> Flask:
+def create_app(config_name: str | None = None, load_dataset: bool = True) -> Flask:
+    """Build the app; ``load_dataset=False`` skips opening the served data.
+
+    The ``build-snapshot``, ``build-partitions`` and ``import-sqlite``
+    commands write a dataset rather than serve one, so they run against
+    ``create_app(load_dataset=False)``.
+    """
     if config_name is None:
         config_name = os.environ.get("FLASK_ENV", "development")
 
@@ -22,36 +36,71 @@ def create_app(config_name: str | None = None) -> Flask:
 
     _configure_logging(app)
 
-    if app.config.get("DATA_FILE"):
-        try:
-            data_loader = DataLoader(app.config["DATA_FILE"]).load()
-        except DataLoadError as e:
-            app.logger.error(f"Failed to load data: {e}")
-            raise
-    else:
-        data_loader = None
-
-    if data_loader:
-        price_service = PriceService(
-            data_loader, decimal_places=app.config.get("PRICE_DECIMAL_PLACES", 2)
-        )
-        app.config["PRICE_SERVICE"] = price_service
-
     app.register_blueprint(prices_bp)
+    app.extensions[SERIALIZED_RESPONSES] = SerializedResponses()
+
+    if app.config.get("METRICS_ENABLED"):
+        init_metrics(app)
+    init_profiling(app)
 
     _register_error_handlers(app)
+    register_commands(app)
+
+    if load_dataset:
+        _load_dataset(app)
 
     app.logger.info(f"Application initialized with config: {config_name}")
 
     return app
 
 
+def _load_dataset(app: Flask) -> None:
+    storage_backend = app.config.get("STORAGE_BACKEND", "memory")
+    if storage_backend == "memory" and not app.config.get("DATA_FILE"):
+        return
+
+    states = StateTable.from_config(app.config)
+    try:
+        backend = open_backend(
+            storage_backend,
+            app.config["DATA_FILE"],
+            app.config["SQLITE_DATABASE"],
+            memory_budget=app.config.get("PARTITION_MEMORY_BUDGET") or None,
+            workers=app.config.get("LOAD_WORKERS", 1),
+            shard_workers=app.config.get("SHARD_WORKERS", 1),
+            states=states,
+        )
+    except DataLoadError as e:
+        app.logger.error(f"Failed to load data: {e}")
+        raise
+
+    price_service = PriceService(
+        backend=backend,
+        decimal_places=app.config.get("PRICE_DECIMAL_PLACES", 2),
+        cache_max_entries=app.config.get("RESULT_CACHE_MAX_ENTRIES", 4096),
+        cache_max_bytes=app.config.get("RESULT_CACHE_MAX_BYTES"),
+        cache_ttl=app.config.get("RESULT_CACHE_TTL") or None,
+        states=states,
+    )
+    app.config["PRICE_SERVICE"] = price_service
+
+    if app.config.get("RELOAD_INTERVAL"):
+        reloader = DatasetReloader(price_service, app.config["RELOAD_INTERVAL"])
+        reloader.start()
+        app.config["PRICE_RELOADER"] = reloader
+
+    with app.app_context():
+        prime_serialized_responses()
+
+
 def _configure_logging(app: Flask) -> None:
     log_level = logging.DEBUG if app.debug else logging.INFO
 
     logging.basicConfig(
         level=log_level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
+    span_level = logging.INFO if app.config.get("TRACE_SPANS") else logging.WARNING
+    logging.getLogger(SPAN_LOGGER).setLevel(span_level)
 
 
 def _register_error_handlers(app: Flask) -> None:
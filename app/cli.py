@@ -0,0 +1,76 @@
+import time
+from pathlib import Path
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+from app.data import sqlite_store
+from app.data.data_loader import DataLoader, DataLoadError
+from app.data.states import StateTable
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(build_snapshot)
+    app.cli.add_command(build_partitions)
+    app.cli.add_command(import_sqlite)
+
+
+def _state_table() -> StateTable:
+    return StateTable.from_config(current_app.config)
+
+
+@click.command("build-snapshot")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("destination", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--workers", default=1, show_default=True, help="Parse processes; 0 uses every CPU.")
+@with_appcontext
+def build_snapshot(source: Path, destination: Path, workers: int) -> None:
+    """Compile the CSV at SOURCE into a memory-mappable snapshot at DESTINATION."""
+    started = time.perf_counter()
+    try:
+        loader = DataLoader(source, workers=workers, states=_state_table()).load()
+        loader.save_snapshot(destination)
+    except DataLoadError as e:
+        raise click.ClickException(str(e)) from e
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Wrote {loader.record_count} records to {destination} in {elapsed:.2f}s")
+
+
+@click.command("build-partitions")
+@click.argument("source", type=click.Path(exists=True, path_type=Path))
+@click.argument("destination", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--by-month", is_flag=True, help="Write one partition per state and month.")
+@click.option("--workers", default=1, show_default=True, help="Parse processes; 0 uses every CPU.")
+@with_appcontext
+def build_partitions(source: Path, destination: Path, by_month: bool, workers: int) -> None:
+    """Split the dataset at SOURCE into per-state partitions under DESTINATION."""
+    started = time.perf_counter()
+    try:
+        loader = DataLoader(source, workers=workers, states=_state_table()).load()
+        loader.save_partitions(destination, by_month=by_month)
+    except DataLoadError as e:
+        raise click.ClickException(str(e)) from e
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Wrote {loader.record_count} records to {destination} in {elapsed:.2f}s")
+
+
+@click.command("import-sqlite")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("destination", type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--batch-rows", default=1_000_000, show_default=True, help="CSV rows parsed per batch."
+)
+@with_appcontext
+def import_sqlite(source: Path, destination: Path, batch_rows: int) -> None:
+    """Import the CSV at SOURCE into a SQLite database at DESTINATION."""
+    started = time.perf_counter()
+    try:
+        record_count = sqlite_store.import_csv(source, destination, batch_rows, _state_table())
+    except DataLoadError as e:
+        raise click.ClickException(str(e)) from e
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Wrote {record_count} records to {destination} in {elapsed:.2f}s")
@@ -8,8 +8,58 @@ class Config:
 
     PRICE_DECIMAL_PLACES = 2
 
+    MAX_BATCH_QUERIES = 100
+
+    # Bounds for the query result cache; a TTL of 0 keeps entries until evicted.
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("PRICE_RESULT_CACHE_MAX_ENTRIES", 4096))
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get("PRICE_RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    RESULT_CACHE_TTL = float(os.environ.get("PRICE_RESULT_CACHE_TTL", 0))
+
+    # "memory" loads DATA_FILE; "sqlite" queries SQLITE_DATABASE (see `flask import-sqlite`).
+    STORAGE_BACKEND = os.environ.get("PRICE_STORAGE_BACKEND", "memory")
+    SQLITE_DATABASE = os.environ.get("PRICE_SQLITE_DATABASE", BASE_DIR / "data" / "prices.sqlite")
+
+    # Processes parsing a large CSV on full loads; 1 parses serially, 0 uses every CPU.
+    LOAD_WORKERS = int(os.environ.get("PRICE_LOAD_WORKERS", 1))
+
+    # Threads answering one query across a sharded DATA_FILE (a directory of
+    # .csv/.snap files or a glob); 1 queries the shards in turn.
+    SHARD_WORKERS = int(os.environ.get("PRICE_SHARD_WORKERS", 1))
+
+    # Bytes of state histories a partitioned DATA_FILE may keep loaded; 0 is unbounded.
+    PARTITION_MEMORY_BUDGET = int(os.environ.get("PRICE_PARTITION_MEMORY_BUDGET", 0))
+
+    # Seconds clients and CDNs may reuse a response before revalidating it.
+    HTTP_CACHE_MAX_AGE = 60
+
+    # Seconds between checks of DATA_FILE for appended rows; 0 disables reloading.
+    RELOAD_INTERVAL = float(os.environ.get("PRICE_RELOAD_INTERVAL", 0))
+
+    # Serve Prometheus metrics at /metrics and time every request.
+    METRICS_ENABLED = os.environ.get("PRICE_METRICS_ENABLED", "1") != "0"
+
+    # Log JSON timing spans for requests, loads, queries and serialisation (app.spans).
+    TRACE_SPANS = os.environ.get("PRICE_TRACE_SPANS", "0") != "0"
+
+    # Profile requests sent with an X-Profile header, writing .prof files to
+    # PROFILE_DIR or, without one, returning a text report as the body.
+    PROFILING_ENABLED = os.environ.get("PRICE_PROFILING_ENABLED", "0") != "0"
+    PROFILE_DIR = os.environ.get("PRICE_PROFILE_DIR")
+
     VALID_STATES = frozenset({"NSW", "QLD", "SA", "TAS", "VIC"})
 
+    # Other names for VALID_STATES, accepted in any usual casing in data and requests.
+    STATE_ALIASES = {
+        "NEW SOUTH WALES": "NSW",
+        "QUEENSLAND": "QLD",
+        "SOUTH AUSTRALIA": "SA",
+        "TASMANIA": "TAS",
+        "VICTORIA": "VIC",
+    }
+
+    # Fail a load on rows whose state is not in VALID_STATES; otherwise they are skipped.
+    STRICT_STATES = os.environ.get("PRICE_STRICT_STATES", "0") != "0"
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -19,6 +69,7 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     DEBUG = False
     TESTING = True
+    RELOAD_INTERVAL = 0.0
 
 
 class ProductionConfig(Config):
@@ -1,14 +1,117 @@
 from __future__ import annotations
 
 import csv
+import hashlib
+import io
 import logging
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal, InvalidOperation
+from itertools import accumulate, islice, pairwise
+from multiprocessing import get_context
 from pathlib import Path
+from typing import Any, overload
+
+from app.data.partitions import (
+    PartitionError,
+    PartitionSource,
+    PartitionStore,
+    StateManifest,
+    is_partitioned,
+    manifest_path,
+    read_manifest,
+    write_partitions,
+)
+from app.data.snapshot import (
+    SnapshotColumns,
+    SnapshotError,
+    is_snapshot,
+    open_snapshot,
+    write_snapshot,
+)
+from app.data.states import StateTable
+from app.profiling import record_span
 
 logger = logging.getLogger(__name__)
 
+# Prices are stored as integers in units of 1/PRICE_SCALE $/MWh.
+PRICE_DECIMALS = 4
+PRICE_SCALE: int = 10**PRICE_DECIMALS
+
+# Every column is int64, so a price must fit in one once scaled.
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_SECOND = timedelta(seconds=1)
+
+
+def to_epoch(timestamp: datetime) -> int:
+    return (timestamp - _EPOCH) // _ONE_SECOND
+
+
+def from_epoch(seconds: int) -> datetime:
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def to_fixed(price: Decimal) -> int:
+    return int(price.scaleb(PRICE_DECIMALS))
+
+
+def from_fixed(units: int) -> Decimal:
+    return Decimal(units).scaleb(-PRICE_DECIMALS)
+
+
+def parse_fixed(text: str) -> int | None:
+    """Parse a plain decimal string such as ``-12.5`` straight into fixed-point units.
+
+    Handles an optional sign, digits and at most ``PRICE_DECIMALS``
+    fractional digits using integer arithmetic only. Returns None for
+    anything else (exponents, whitespace, extra precision) so the caller
+    can defer to ``Decimal``.
+    """
+    if not text.isascii():
+        return None
+
+    sign = 1
+    if text.startswith("-"):
+        sign = -1
+        text = text[1:]
+    elif text.startswith("+"):
+        text = text[1:]
+
+    whole, _, fraction = text.partition(".")
+    if (
+        len(fraction) > PRICE_DECIMALS
+        or not (whole or fraction)
+        or (whole and not whole.isdigit())
+        or (fraction and not fraction.isdigit())
+    ):
+        return None
+
+    units = int(whole or "0") * PRICE_SCALE
+    if fraction:
+        units += int(fraction.ljust(PRICE_DECIMALS, "0"))
+    return sign * units
+
+
+def format_fixed(units: int, min_decimals: int = 2) -> str:
+    """Render fixed-point units as a plain decimal, e.g. ``-50.00`` or ``12.3456``.
+
+    Trailing fractional zeros are dropped down to ``min_decimals`` digits.
+    """
+    sign = "-" if units < 0 else ""
+    whole, fraction = divmod(abs(units), PRICE_SCALE)
+    digits = f"{fraction:0{PRICE_DECIMALS}d}".rstrip("0").ljust(min_decimals, "0")
+    return f"{sign}{whole}.{digits}" if digits else f"{sign}{whole}"
+
 
 @dataclass(frozen=True, slots=True)
 class PriceRecord:
@@ -17,84 +120,991 @@ class PriceRecord:
     timestamp: datetime
 
 
+class PriceSeries(Sequence[PriceRecord]):
+    """Columnar price history for a single state.
+
+    Timestamps (epoch seconds) and prices (fixed-point units) live in
+    parallel int64 arrays; ``PriceRecord`` objects are only built when
+    the series is indexed or iterated. Once ``build_index`` has run the
+    series is ordered by timestamp and carries cumulative price sums, so
+    the total over any time window costs two bisections and a subtraction.
+    """
+
+    __slots__ = ("state", "timestamps", "prices", "prefix_sums", "_digest")
+
+    def __init__(
+        self,
+        state: str,
+        timestamps: array[int] | memoryview | None = None,
+        prices: array[int] | memoryview | None = None,
+        prefix_sums: array[int] | memoryview | None = None,
+    ):
+        self.state = state
+        self.timestamps: array[int] | memoryview = (
+            timestamps if timestamps is not None else array("q")
+        )
+        self.prices: array[int] | memoryview = prices if prices is not None else array("q")
+        self.prefix_sums = prefix_sums
+        self._digest: bytes | None = None
+
+    @classmethod
+    def from_records(cls, state: str, records: Iterable[PriceRecord]) -> PriceSeries:
+        timestamps = array("q")
+        prices = array("q")
+        for record in records:
+            timestamps.append(to_epoch(record.timestamp))
+            prices.append(to_fixed(record.price))
+        return cls(state, timestamps, prices).build_index()
+
+    def build_index(self) -> PriceSeries:
+        timestamps = self.timestamps
+        if any(a > b for a, b in pairwise(timestamps)):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            self.timestamps = array("q", map(timestamps.__getitem__, order))
+            self.prices = array("q", map(self.prices.__getitem__, order))
+
+        self.prefix_sums = array("q", accumulate(self.prices, initial=0))
+        return self
+
+    def extended(self, timestamps: array[int], prices: array[int]) -> PriceSeries:
+        """Return a new series with the given rows added; this one is left untouched.
+
+        Rows that all fall after the current last timestamp only extend the
+        cumulative sums from their last value; otherwise the merged series is
+        re-sorted and re-indexed.
+        """
+        appended = PriceSeries(self.state, timestamps, prices).build_index()
+        assert appended.prefix_sums is not None
+
+        merged_timestamps = array("q", self.timestamps)
+        merged_timestamps.extend(appended.timestamps)
+        merged_prices = array("q", self.prices)
+        merged_prices.extend(appended.prices)
+        merged = PriceSeries(self.state, merged_timestamps, merged_prices)
+
+        in_order = not self.timestamps or (
+            not appended.timestamps or appended.timestamps[0] >= self.timestamps[-1]
+        )
+        if not in_order or self.prefix_sums is None:
+            return merged.build_index()
+
+        base = self.prefix_sums[-1]
+        prefix_sums = array("q", self.prefix_sums)
+        prefix_sums.extend(base + total for total in appended.prefix_sums[1:])
+        merged.prefix_sums = prefix_sums
+        return merged
+
+    def digest(self) -> bytes:
+        """Content hash of the series, computed once."""
+        if self._digest is None:
+            hasher = hashlib.blake2b(self.state.encode("utf-8"), digest_size=16)
+            hasher.update(self.timestamps)
+            hasher.update(self.prices)
+            self._digest = hasher.digest()
+        return self._digest
+
+    def window(self, start: int | None = None, end: int | None = None) -> tuple[int, int]:
+        """Return the index range of records with ``start <= timestamp < end``."""
+        lo = 0 if start is None else bisect_left(self.timestamps, start)
+        hi = len(self.timestamps) if end is None else bisect_left(self.timestamps, end)
+        return lo, max(lo, hi)
+
+    def range_total(self, lo: int, hi: int) -> int:
+        if self.prefix_sums is None:
+            return sum(self.prices[lo:hi])
+        return self.prefix_sums[hi] - self.prefix_sums[lo]
+
+    def price_total(self) -> int:
+        return self.range_total(0, len(self))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @overload
+    def __getitem__(self, index: int) -> PriceRecord: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> PriceSeries: ...
+
+    def __getitem__(self, index: int | slice) -> PriceRecord | PriceSeries:
+        if isinstance(index, slice):
+            return PriceSeries(self.state, self.timestamps[index], self.prices[index]).build_index()
+        return self._record(self.timestamps[index], self.prices[index])
+
+    def __iter__(self) -> Iterator[PriceRecord]:
+        for timestamp, price in zip(self.timestamps, self.prices, strict=True):
+            yield self._record(timestamp, price)
+
+    def _record(self, timestamp: int, price: int) -> PriceRecord:
+        return PriceRecord(
+            state=self.state, price=from_fixed(price), timestamp=from_epoch(timestamp)
+        )
+
+
+def dataset_version(digests: Iterable[bytes]) -> str:
+    """Combine per-state digests, in state order, into a short dataset version."""
+    hasher = hashlib.blake2b(digest_size=8)
+    for digest in digests:
+        hasher.update(digest)
+    return hasher.hexdigest()
+
+
 class DataLoadError(Exception):
     pass
 
 
+def totals_overflow(state: str) -> DataLoadError:
+    return DataLoadError(f"Price totals for state '{state}' exceed the 64-bit fixed-point range")
+
+
 class DataLoader:
     EXPECTED_COLUMNS = {"state", "price", "timestamp"}
     TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-    def __init__(self, file_path: Path):
+    # Distinct price strings remembered during ingestion; half-hourly prices
+    # repeat heavily, but the memo must stay bounded on pathological inputs.
+    _PRICE_MEMO_LIMIT = 1 << 16
+
+    # Files smaller than this are parsed serially even when workers are available.
+    _PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+    # Upper bound on a parallel byte range, so a worker's buffers stay small.
+    _PARALLEL_RANGE_BYTES = 64 * 1024 * 1024
+
+    # Bytes preceding the last consumed offset that must be unchanged for an
+    # incremental refresh; guards against the file being rewritten in place.
+    _TAIL_CHECK_BYTES = 64
+    # Bytes read at a time when scanning back from the end for the last newline.
+    _TAIL_SCAN_BYTES = 64 * 1024
+
+    def __init__(
+        self,
+        file_path: Path,
+        memory_budget: int | None = None,
+        workers: int = 1,
+        states: StateTable | None = None,
+    ):
         self._file_path = Path(file_path)
-        self._records: list[PriceRecord] = []
-        self._records_by_state: dict[str, list[PriceRecord]] = {}
+        self._series_by_state: dict[str, PriceSeries] = {}
+        self._memory_budget = memory_budget
+        # Processes used to parse large CSVs on full loads; 0 means one per CPU.
+        self._workers = workers or os.cpu_count() or 1
+        # Accepted states and their spellings; None accepts any non-empty state.
+        self._states = states
+        self._state_list: list[str] | None = None
+        # Set when file_path is a partitioned directory; series load on first access.
+        self._partitions: PartitionStore | None = None
+        self._record_count = 0
+        self._version: str | None = None
+
+        # Seconds spent in each phase of the most recent load or refresh.
+        self.load_timings: dict[str, float] = {}
+
+        # Where the last load or refresh stopped reading the CSV.
+        self._positions: dict[str, int] | None = None
+        self._offset = 0
+        self._line_count = 0
+        # Set when the last consumed line had no newline yet; an append must start with one.
+        self._unterminated = False
+        self._tail = b""
+        self._fingerprint: tuple[int, ...] | None = None
 
     def load(self) -> DataLoader:
         if not self._file_path.exists():
             raise DataLoadError(f"Data file not found: {self._file_path}")
 
+        started = time.perf_counter()
         try:
-            with open(self._file_path, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
+            self._fingerprint = self._stat_fingerprint()
+
+            if is_partitioned(self._file_path):
+                return self._load_partitions()
 
-                if reader.fieldnames is None:
-                    raise DataLoadError("CSV file is empty")
+            if is_snapshot(self._file_path):
+                return self._load_snapshot()
 
-                actual_columns = set(reader.fieldnames)
-                if not self.EXPECTED_COLUMNS.issubset(actual_columns):
-                    missing = self.EXPECTED_COLUMNS - actual_columns
-                    raise DataLoadError(f"Missing required columns: {missing}")
+            size = self._fingerprint[2]
+            # Parse up to the last newline; a last line without one is handled below.
+            end = self._complete_length(size) or size
+            if self._workers > 1 and size >= self._PARALLEL_MIN_BYTES:
+                columns = self._load_parallel(end)
+            else:
+                with open(self._file_path, "rb") as raw:
+                    # The wrapper costs a Python call per buffer, so only pay for it when needed.
+                    source = raw if end == size else io.BufferedReader(_PrefixReader(raw, end))
+                    f = io.TextIOWrapper(source, encoding="utf-8", newline="")
+                    reader = csv.reader(f)
+                    positions = self._read_header(reader)
+                    columns = self._ingest(reader, positions)
 
-                for line_num, row in enumerate(reader, start=2):
-                    record = self._parse_row(row, line_num)
-                    self._records.append(record)
+                    self._positions = positions
+                    self._offset = end
+                    self._line_count = reader.line_num
 
-                    state = record.state
-                    if state not in self._records_by_state:
-                        self._records_by_state[state] = []
-                    self._records_by_state[state].append(record)
+            if end < size:
+                self._ingest_last_line(columns, size)
+
+            for state, (timestamps, prices) in columns.items():
+                self._series_by_state[state] = PriceSeries(state, timestamps, prices)
+                self._record_count += len(timestamps)
+
+            self._tail = self._read_tail(self._offset)
 
         except csv.Error as e:
             raise DataLoadError(f"CSV parsing error: {e}") from e
         except OSError as e:
             raise DataLoadError(f"Failed to read file: {e}") from e
 
-        if not self._records:
+        if not self._record_count:
             raise DataLoadError("CSV file contains no data rows")
 
-        logger.info(f"Loaded {len(self._records)} records for {len(self._records_by_state)} states")
+        parsed = time.perf_counter()
+        for state, series in self._series_by_state.items():
+            try:
+                series.build_index()
+            except OverflowError as e:
+                raise totals_overflow(state) from e
+        self.load_timings = {"parse": parsed - started, "index": time.perf_counter() - parsed}
+        self._record_load_spans()
+
+        logger.info(
+            f"Loaded {self._record_count} records for {len(self._series_by_state)} states "
+            f"in {sum(self.load_timings.values()):.2f}s"
+        )
         return self
 
-    def _parse_row(self, row: dict, line_num: int) -> PriceRecord:
+    def _record_load_spans(self) -> None:
+        for phase, seconds in self.load_timings.items():
+            record_span(
+                f"load.{phase}", seconds, file=str(self._file_path), records=self._record_count
+            )
+
+    def _read_header(self, reader: Any) -> dict[str, int]:
+        header = next(reader, None)
+        if header is None:
+            raise DataLoadError("CSV file is empty")
+
+        positions = {name: i for i, name in enumerate(header)}
+        if not self.EXPECTED_COLUMNS.issubset(positions):
+            missing = self.EXPECTED_COLUMNS - positions.keys()
+            raise DataLoadError(f"Missing required columns: {missing}")
+        return positions
+
+    def iter_batches(
+        self, batch_rows: int = 1_000_000
+    ) -> Iterator[dict[str, tuple[array[int], array[int]]]]:
+        """Parse the CSV ``batch_rows`` rows at a time without keeping earlier batches.
+
+        Each batch maps states to their columns in file order. Validation and
+        error line numbers are those of ``load``; the rows are not sorted or
+        indexed, and nothing is stored on this loader.
+        """
         try:
-            state = row["state"].strip().upper()
-            if not state:
-                raise DataLoadError(f"Line {line_num}: Empty state value")
+            with open(self._file_path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                positions = self._read_header(reader)
+                while True:
+                    consumed = reader.line_num
+                    columns = self._ingest(_BatchReader(reader, batch_rows), positions)
+                    if reader.line_num == consumed:
+                        return
+                    if columns:
+                        yield columns
+        except csv.Error as e:
+            raise DataLoadError(f"CSV parsing error: {e}") from e
+        except OSError as e:
+            raise DataLoadError(f"Failed to read file: {e}") from e
+
+    def _load_parallel(self, size: int) -> dict[str, tuple[array[int], array[int]]]:
+        """Parse the first ``size`` bytes in newline-aligned ranges across worker processes.
+
+        Each worker returns per-state int64 columns for its range, which are
+        concatenated in file order; ``build_index`` then sorts them exactly as
+        it would after a serial parse. A failing range is parsed again here
+        with absolute line numbers so the error matches the serial path.
+        Quoted fields spanning lines are not supported in this mode.
+        """
+        with open(self._file_path, "rb") as f:
+            header_line = f.readline()
+            header_end = f.tell()
+        positions = self._read_header(csv.reader([header_line.decode("utf-8")]))
+        ranges = self._split_ranges(header_end, size)
+
+        columns: dict[str, tuple[array[int], array[int]]] = {}
+        line_count = 1
+        context = get_context("spawn")
+        with ProcessPoolExecutor(min(self._workers, len(ranges)), mp_context=context) as pool:
+            futures = [
+                pool.submit(_parse_range, self._file_path, start, end, positions, 0, self._states)
+                for start, end in ranges
+            ]
+            for (start, end), future in zip(ranges, futures, strict=True):
+                try:
+                    range_columns, range_lines = future.result()
+                except Exception as e:
+                    _parse_range(
+                        self._file_path,
+                        start,
+                        end,
+                        positions,
+                        self._count_lines(start),
+                        self._states,
+                    )
+                    raise DataLoadError(f"Parallel parse failed: {e}") from e
+
+                for state, (timestamps, prices) in range_columns.items():
+                    merged = columns.get(state)
+                    if merged is None:
+                        columns[state] = (timestamps, prices)
+                    else:
+                        merged[0].extend(timestamps)
+                        merged[1].extend(prices)
+                line_count += range_lines
+
+        self._positions = positions
+        self._offset = size
+        self._line_count = line_count
+        logger.debug(f"Parsed {len(ranges)} ranges with {self._workers} workers")
+        return columns
+
+    def _split_ranges(self, start: int, end: int) -> list[tuple[int, int]]:
+        count = max(self._workers, -(-(end - start) // self._PARALLEL_RANGE_BYTES))
+        step = (end - start) / count
+
+        bounds = [start]
+        with open(self._file_path, "rb") as f:
+            for i in range(1, count):
+                # Move to the start of the first line beginning at or after the cut.
+                f.seek(start + int(i * step) - 1)
+                f.readline()
+                if bounds[-1] < f.tell() < end:
+                    bounds.append(f.tell())
+        bounds.append(end)
+        return list(pairwise(bounds))
+
+    def _count_lines(self, end: int) -> int:
+        lines = 0
+        with open(self._file_path, "rb") as f:
+            while f.tell() < end:
+                block = f.read(min(1 << 20, end - f.tell()))
+                if not block:
+                    break
+                lines += block.count(b"\n")
+        return lines
+
+    def _load_snapshot(self) -> DataLoader:
+        started = time.perf_counter()
+        try:
+            snapshot = open_snapshot(self._file_path)
+        except SnapshotError as e:
+            raise DataLoadError(f"Invalid snapshot {self._file_path}: {e}") from e
+
+        if snapshot.price_decimals != PRICE_DECIMALS:
+            raise DataLoadError(
+                f"Snapshot stores prices with {snapshot.price_decimals} decimal places, "
+                f"expected {PRICE_DECIMALS}"
+            )
+
+        for state, columns in snapshot.states.items():
+            if not self._serves(state, "Snapshot"):
+                continue
+            self._series_by_state[state] = PriceSeries(
+                state, columns.timestamps, columns.prices, columns.prefix_sums
+            )
+            self._record_count += len(columns.timestamps)
+        if not self._record_count:
+            raise DataLoadError("Snapshot contains no data rows")
+        self.load_timings = {"map": time.perf_counter() - started}
+        self._record_load_spans()
+
+        logger.info(
+            f"Mapped snapshot with {self._record_count} records "
+            f"for {len(self._series_by_state)} states"
+        )
+        return self
+
+    def _load_partitions(self) -> DataLoader:
+        started = time.perf_counter()
+        try:
+            manifest = read_manifest(self._file_path)
+        except PartitionError as e:
+            raise DataLoadError(f"Invalid partitioned dataset {self._file_path}: {e}") from e
+
+        if manifest.price_decimals != PRICE_DECIMALS:
+            raise DataLoadError(
+                f"Partitions store prices with {manifest.price_decimals} decimal places, "
+                f"expected {PRICE_DECIMALS}"
+            )
+        states = {
+            state: entry
+            for state, entry in manifest.states.items()
+            if self._serves(state, "Partitioned dataset")
+        }
+        if len(states) < len(manifest.states):
+            manifest = manifest._replace(
+                record_count=sum(entry.record_count for entry in states.values()), states=states
+            )
+        if not manifest.record_count:
+            raise DataLoadError("Partitioned dataset contains no data rows")
+
+        self._partitions = PartitionStore(
+            self._file_path, manifest, self._build_partitioned_series, self._memory_budget
+        )
+        self._record_count = manifest.record_count
+        self.load_timings = {"manifest": time.perf_counter() - started}
+        self._record_load_spans()
+
+        logger.info(
+            f"Read manifest with {self._record_count} records for {len(manifest.states)} states; "
+            f"series load on first use"
+        )
+        return self
+
+    def _serves(self, state: str, source: str) -> bool:
+        """Whether a state stored in a snapshot or partition is in the state table.
+
+        States were validated when the file was built, perhaps against a
+        different table; as with CSV rows, unknown ones are skipped, or
+        rejected in strict mode.
+        """
+        if self._states is None or self._states.resolve(state) == state:
+            return True
+        if self._states.strict:
+            raise DataLoadError(f"{source} contains unknown state '{state}'")
+        return False
+
+    @staticmethod
+    def _build_partitioned_series(
+        state: str, entry: StateManifest, columns: list[SnapshotColumns]
+    ) -> PriceSeries:
+        if len(columns) == 1:
+            series = PriceSeries(
+                state, columns[0].timestamps, columns[0].prices, columns[0].prefix_sums
+            )
+        else:
+            timestamps = array("q")
+            prices = array("q")
+            for part in columns:
+                timestamps.extend(part.timestamps)
+                prices.extend(part.prices)
+            series = PriceSeries(state, timestamps, prices).build_index()
+        # The manifest digest was taken from the full series when it was written.
+        series._digest = entry.digest
+        return series
 
+    def save_snapshot(self, path: Path) -> None:
+        columns = []
+        for state in self.get_available_states():
+            series = self._indexed_series(state)
+            assert series.prefix_sums is not None
+            columns.append((state, series.timestamps, series.prices, series.prefix_sums))
+
+        try:
+            write_snapshot(Path(path), columns, PRICE_DECIMALS)
+        except (SnapshotError, OSError) as e:
+            raise DataLoadError(f"Failed to write snapshot {path}: {e}") from e
+
+    def save_partitions(self, directory: Path, by_month: bool = False) -> None:
+        """Write one partition per state, or per state and calendar month, plus a manifest."""
+
+        def states() -> Iterator[tuple[str, bytes, list[PartitionSource]]]:
+            for state in self.get_available_states():
+                series = self._indexed_series(state)
+                if by_month:
+                    sources = _month_partitions(series)
+                else:
+                    sources = [PartitionSource("", series.timestamps, series.prices)]
+                yield state, series.digest(), sources
+
+        try:
+            write_partitions(Path(directory), states(), PRICE_DECIMALS)
+        except (SnapshotError, OSError) as e:
+            raise DataLoadError(f"Failed to write partitions to {directory}: {e}") from e
+
+    def _indexed_series(self, state: str) -> PriceSeries:
+        series = self.get_prices_for_state(state)
+        assert series is not None
+        if series.prefix_sums is None:
+            series.build_index()
+        return series
+
+    def refresh(self) -> tuple[DataLoader, frozenset[str]]:
+        """Pick up changes made to the data file since it was loaded.
+
+        Complete rows appended to a CSV are parsed on their own and merged
+        into a new loader that shares every untouched series with this one.
+        A replaced snapshot, or a CSV that was truncated or rewritten, is
+        loaded again in full. This loader is never modified. Returns the
+        loader to use from now on and the states whose data changed.
+        """
+        try:
+            fingerprint = self._stat_fingerprint()
+        except OSError as e:
+            raise DataLoadError(f"Failed to read file: {e}") from e
+
+        if fingerprint == self._fingerprint:
+            return self, frozenset()
+
+        if self._partitions is not None:
+            return self._reload_partitions()
+
+        if self._positions is not None and self._is_append(fingerprint):
+            return self._load_appended(fingerprint)
+
+        reloaded = DataLoader(
+            self._file_path, self._memory_budget, self._workers, self._states
+        ).load()
+        changed = frozenset(self._series_by_state) | frozenset(reloaded._series_by_state)
+        logger.info("Data file replaced; reloaded in full")
+        return reloaded, changed
+
+    def _reload_partitions(self) -> tuple[DataLoader, frozenset[str]]:
+        assert self._partitions is not None
+        reloaded = DataLoader(
+            self._file_path, self._memory_budget, self._workers, self._states
+        ).load()
+        assert reloaded._partitions is not None
+        reloaded._partitions.adopt(self._partitions)
+
+        before = self._partitions.manifest.states
+        after = reloaded._partitions.manifest.states
+        changed = frozenset(
+            state
+            for state in before.keys() | after.keys()
+            if state not in before
+            or state not in after
+            or before[state].digest != after[state].digest
+        )
+        logger.info(f"Manifest replaced; {len(changed)} states changed")
+        return reloaded, changed
+
+    def _is_append(self, fingerprint: tuple[int, ...]) -> bool:
+        assert self._fingerprint is not None
+        same_file = fingerprint[:2] == self._fingerprint[:2]
+        if not same_file or fingerprint[2] < self._offset:
+            return False
+        try:
+            grown = fingerprint[2] > self._offset
+            if (
+                self._unterminated
+                and grown
+                and self._read_tail(self._offset + 1)[-1:] not in b"\r\n"
+            ):
+                # The last row, loaded without a newline, was extended.
+                return False
+            return self._read_tail(self._offset) == self._tail
+        except OSError:
+            return False
+
+    def _load_appended(self, fingerprint: tuple[int, ...]) -> tuple[DataLoader, frozenset[str]]:
+        assert self._positions is not None
+        started = time.perf_counter()
+        try:
+            with open(self._file_path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(fingerprint[2] - self._offset)
+        except OSError as e:
+            raise DataLoadError(f"Failed to read file: {e}") from e
+
+        # Leave a partially written last line for the next refresh.
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        # The newline ending a row that was loaded without one.
+        ending = 0
+        if self._unterminated and complete:
+            ending = 2 if complete.startswith(b"\r\n") else 1
+
+        try:
+            reader = csv.reader(io.StringIO(complete[ending:].decode("utf-8"), newline=""))
+            columns = self._ingest(reader, self._positions, line_offset=self._line_count)
+        except csv.Error as e:
+            raise DataLoadError(f"CSV parsing error: {e}") from e
+        except UnicodeDecodeError as e:
+            raise DataLoadError(f"Invalid UTF-8 in appended data: {e}") from e
+
+        parsed = time.perf_counter()
+        updated = DataLoader(self._file_path, self._memory_budget, self._workers, self._states)
+        updated._series_by_state = dict(self._series_by_state)
+        updated._record_count = self._record_count
+        for state, (timestamps, prices) in columns.items():
+            existing = self._series_by_state.get(state)
             try:
-                price = Decimal(row["price"].strip())
-            except InvalidOperation as e:
-                raise DataLoadError(f"Line {line_num}: Invalid price value '{row['price']}'") from e
+                if existing is None:
+                    series = PriceSeries(state, timestamps, prices).build_index()
+                else:
+                    series = existing.extended(timestamps, prices)
+            except OverflowError as e:
+                raise totals_overflow(state) from e
+            updated._series_by_state[state] = series
+            updated._record_count += len(timestamps)
+
+        updated._positions = self._positions
+        updated._offset = self._offset + len(complete)
+        updated._line_count = self._line_count + reader.line_num
+        updated._unterminated = self._unterminated and not complete
+        updated._tail = (self._tail + complete)[-self._TAIL_CHECK_BYTES :]
+        updated._fingerprint = fingerprint
+        updated.load_timings = {"parse": parsed - started, "index": time.perf_counter() - parsed}
+        updated._record_load_spans()
+
+        logger.info(
+            f"Appended {updated._record_count - self._record_count} records "
+            f"for {len(columns)} states"
+        )
+        return updated, frozenset(columns)
+
+    def _stat_fingerprint(self) -> tuple[int, ...]:
+        path = self._file_path
+        stat = (manifest_path(path) if is_partitioned(path) else path).stat()
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _ingest_last_line(
+        self, columns: dict[str, tuple[array[int], array[int]]], size: int
+    ) -> None:
+        """Add the last line, which has no newline, to ``columns`` if it is a valid row.
+
+        A file written without a final newline keeps its last row. A line a
+        writer has not finished usually fails to parse and is left for the
+        next refresh; one that parses but is then extended in place makes
+        that refresh a full reload.
+        """
+        assert self._positions is not None
+        with open(self._file_path, "rb") as f:
+            f.seek(self._offset)
+            line = f.read(size - self._offset)
+
+        try:
+            reader = csv.reader(io.StringIO(line.decode("utf-8"), newline=""))
+            parsed = self._ingest(reader, self._positions, line_offset=self._line_count)
+        except (DataLoadError, csv.Error, UnicodeDecodeError) as e:
+            logger.warning(f"Last line of {self._file_path} has no newline and was not loaded: {e}")
+            return
+
+        for state, (timestamps, prices) in parsed.items():
+            merged = columns.setdefault(state, (array("q"), array("q")))
+            merged[0].extend(timestamps)
+            merged[1].extend(prices)
+        self._offset = size
+        self._line_count += reader.line_num
+        self._unterminated = True
+
+    def _complete_length(self, size: int) -> int:
+        """Bytes up to and including the last newline in the first ``size`` bytes."""
+        with open(self._file_path, "rb") as f:
+            end = size
+            while end > 0:
+                start = max(0, end - self._TAIL_SCAN_BYTES)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    return start + newline + 1
+                end = start
+        return 0
+
+    def _read_tail(self, offset: int) -> bytes:
+        start = max(0, offset - self._TAIL_CHECK_BYTES)
+        with open(self._file_path, "rb") as f:
+            f.seek(start)
+            return f.read(offset - start)
+
+    def _ingest(
+        self, reader: Any, positions: dict[str, int], line_offset: int = 0
+    ) -> dict[str, tuple[array[int], array[int]]]:
+        """Parse data rows into the per-state columns.
+
+        Columns are read by position and each distinct state, price and
+        date/time string is converted once. Values not seen before go
+        through the ``_parse_*`` methods, which apply the full validation
+        and raise the line-numbered error; ``line_offset`` is added to the
+        reader's line numbers when parsing a fragment of the file.
+        """
+        state_col = positions["state"]
+        price_col = positions["price"]
+        timestamp_col = positions["timestamp"]
+        row_width = max(state_col, price_col, timestamp_col) + 1
+
+        states: dict[str, str] = {}
+        price_units: dict[str, int] = {}
+        days: dict[str, int] = {}
+        times: dict[str, int] = {}
+        columns: dict[str, tuple[array[int], array[int]]] = {}
+        appenders: dict[str, tuple[Callable[[int], None], Callable[[int], None]]] = {}
+        skipped = 0
+
+        for row in reader:
+            if not row:
+                continue
+
+            if len(row) < row_width:
+                self._raise_missing_column(row, positions, line_offset + reader.line_num)
+
+            raw_state = row[state_col]
+            raw_price = row[price_col]
+            raw_timestamp = row[timestamp_col]
 
+            state = states.get(raw_state)
+            if state is None:
+                state = states[raw_state] = self._parse_state(
+                    raw_state, line_offset + reader.line_num
+                )
+            if not state:
+                skipped += 1
+                continue
+
+            price = price_units.get(raw_price)
+            if price is None:
+                price = self._parse_price(raw_price, line_offset + reader.line_num)
+                if len(price_units) < self._PRICE_MEMO_LIMIT:
+                    price_units[raw_price] = price
+
+            midnight = days.get(raw_timestamp[:10])
+            offset = times.get(raw_timestamp[11:])
+            if (
+                midnight is not None
+                and offset is not None
+                and len(raw_timestamp) == 19
+                and raw_timestamp[10] == " "
+            ):
+                timestamp = midnight + offset
+            else:
+                parsed = self._fast_timestamp(raw_timestamp, days, times)
+                if parsed is None:
+                    parsed = self._parse_timestamp(raw_timestamp, line_offset + reader.line_num)
+                timestamp = parsed
+
+            append = appenders.get(state)
+            if append is None:
+                state_columns = columns[state] = (array("q"), array("q"))
+                append = appenders[state] = (state_columns[0].append, state_columns[1].append)
+            append[0](timestamp)
+            append[1](price)
+
+        if skipped:
+            unknown = sorted(raw for raw, state in states.items() if not state)
+            logger.warning(f"Skipped {skipped} rows with unknown states: {unknown}")
+        return columns
+
+    @staticmethod
+    def _fast_timestamp(value: str, days: dict[str, int], times: dict[str, int]) -> int | None:
+        """Parse ``YYYY-MM-DD HH:MM:SS`` by position.
+
+        The date and time-of-day halves are validated once and memoised, so
+        repeated values cost two dict lookups. Returns None for anything not
+        exactly in that shape so the caller can defer to ``datetime.strptime``.
+        """
+        if len(value) != 19 or value[10] != " " or not value.isascii():
+            return None
+
+        day = value[:10]
+        midnight = days.get(day)
+        if midnight is None:
             try:
-                timestamp = datetime.strptime(row["timestamp"].strip(), self.TIMESTAMP_FORMAT)
-            except ValueError as e:
-                raise DataLoadError(
-                    f"Line {line_num}: Invalid timestamp '{row['timestamp']}'"
-                ) from e
+                midnight = to_epoch(datetime.strptime(day, "%Y-%m-%d"))
+            except ValueError:
+                return None
+            days[day] = midnight
+
+        time_of_day = value[11:]
+        offset = times.get(time_of_day)
+        if offset is None:
+            hours, minutes, seconds = time_of_day[0:2], time_of_day[3:5], time_of_day[6:8]
+            if (
+                time_of_day[2] != ":"
+                or time_of_day[5] != ":"
+                or not (hours.isdigit() and minutes.isdigit() and seconds.isdigit())
+            ):
+                return None
+
+            h, m, s = int(hours), int(minutes), int(seconds)
+            if h > 23 or m > 59 or s > 59:
+                return None
+
+            offset = times[time_of_day] = h * 3600 + m * 60 + s
+
+        return midnight + offset
 
-            return PriceRecord(state=state, price=price, timestamp=timestamp)
+    @staticmethod
+    def _raise_missing_column(row: list[str], positions: dict[str, int], line_num: int) -> None:
+        for name in ("state", "price", "timestamp"):
+            if positions[name] >= len(row):
+                raise DataLoadError(f"Line {line_num}: Missing column '{name}'")
 
-        except KeyError as e:
-            raise DataLoadError(f"Line {line_num}: Missing column {e}") from e
+    def _parse_state(self, raw_state: str, line_num: int) -> str:
+        """The canonical state, or "" for a row to skip as outside the state table."""
+        state = raw_state.strip().upper()
+        if not state:
+            raise DataLoadError(f"Line {line_num}: Empty state value")
+        if self._states is None:
+            return sys.intern(state)
 
-    def get_prices_for_state(self, state: str) -> list[PriceRecord] | None:
-        return self._records_by_state.get(state.upper())
+        canonical = self._states.resolve(raw_state)
+        if canonical is not None:
+            return canonical
+        if self._states.strict:
+            raise DataLoadError(f"Line {line_num}: Unknown state '{raw_state.strip()}'")
+        return ""
+
+    def _parse_price(self, raw_price: str, line_num: int) -> int:
+        units = parse_fixed(raw_price)
+        if units is None:
+            units = self._parse_decimal_price(raw_price, line_num)
+
+        if not INT64_MIN <= units <= INT64_MAX:
+            raise DataLoadError(f"Line {line_num}: Price '{raw_price}' is out of range")
+        return units
+
+    def _parse_decimal_price(self, raw_price: str, line_num: int) -> int:
+        try:
+            price = Decimal(raw_price.strip())
+        except InvalidOperation as e:
+            raise DataLoadError(f"Line {line_num}: Invalid price value '{raw_price}'") from e
+
+        if not price.is_finite():
+            raise DataLoadError(f"Line {line_num}: Invalid price value '{raw_price}'")
+
+        units = to_fixed(price)
+        if from_fixed(units) != price:
+            raise DataLoadError(
+                f"Line {line_num}: Price '{raw_price}' has more than "
+                f"{PRICE_DECIMALS} decimal places"
+            )
+        return units
+
+    def _parse_timestamp(self, raw_timestamp: str, line_num: int) -> int:
+        try:
+            timestamp = datetime.strptime(raw_timestamp.strip(), self.TIMESTAMP_FORMAT)
+        except ValueError as e:
+            raise DataLoadError(f"Line {line_num}: Invalid timestamp '{raw_timestamp}'") from e
+        return to_epoch(timestamp)
+
+    def get_prices_for_state(self, state: str) -> PriceSeries | None:
+        if self._partitions is not None:
+            return self._partitions.get(state.upper())
+        series = self._series_by_state.get(state)
+        if series is None:
+            series = self._series_by_state.get(state.upper())
+        return series
 
     def get_available_states(self) -> list[str]:
-        return sorted(self._records_by_state.keys())
+        """Sorted state codes; the list is shared, so callers must not modify it."""
+        if self._state_list is None:
+            if self._partitions is not None:
+                self._state_list = sorted(self._partitions.manifest.states)
+            else:
+                self._state_list = sorted(self._series_by_state.keys())
+        return self._state_list
+
+    def get_record_counts(self) -> dict[str, int]:
+        """Records per state, without loading any partition."""
+        if self._partitions is not None:
+            return {
+                state: entry.record_count
+                for state, entry in sorted(self._partitions.manifest.states.items())
+            }
+        return {state: len(self._series_by_state[state]) for state in self.get_available_states()}
+
+    def get_state_digest(self, state: str) -> bytes | None:
+        """Content digest of a state's series, without loading any partition."""
+        if self._partitions is not None:
+            entry = self._partitions.manifest.states.get(state.upper())
+            return None if entry is None else entry.digest
+        series = self.get_prices_for_state(state)
+        return None if series is None else series.digest()
 
     @property
     def record_count(self) -> int:
-        return len(self._records)
+        return self._record_count
+
+    @property
+    def partitions(self) -> PartitionStore | None:
+        """The partition store when series are loaded lazily, otherwise None."""
+        return self._partitions
+
+    @property
+    def last_modified(self) -> datetime | None:
+        """Modification time of the data file as of the last load or refresh."""
+        if self._fingerprint is None:
+            return None
+        return datetime.fromtimestamp(self._fingerprint[3] / 1e9, tz=UTC)
+
+    @property
+    def version(self) -> str:
+        """Content-derived dataset version, identical across processes."""
+        if self._version is None:
+            if self._partitions is not None:
+                digests = [
+                    entry.digest for _, entry in sorted(self._partitions.manifest.states.items())
+                ]
+            else:
+                digests = [
+                    self._series_by_state[state].digest() for state in self.get_available_states()
+                ]
+            self._version = dataset_version(digests)
+        return self._version
+
+
+def _month_partitions(series: PriceSeries) -> list[PartitionSource]:
+    sources = []
+    lo = 0
+    while lo < len(series):
+        first = from_epoch(series.timestamps[lo])
+        next_month = datetime(first.year + first.month // 12, first.month % 12 + 1, 1)
+        _, hi = series.window(None, to_epoch(next_month))
+        sources.append(
+            PartitionSource(f"-{first:%Y-%m}", series.timestamps[lo:hi], series.prices[lo:hi])
+        )
+        lo = hi
+    return sources
+
+
+class _PrefixReader(io.RawIOBase):
+    """The first ``limit`` bytes of a binary file, from its current position."""
+
+    def __init__(self, raw: io.BufferedReader, limit: int):
+        self._raw = raw
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._raw.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+
+class _BatchReader:
+    """Up to ``limit`` rows from a csv reader, keeping its absolute ``line_num``."""
+
+    def __init__(self, reader: Any, limit: int):
+        self._reader = reader
+        self._limit = limit
+
+    def __iter__(self) -> Iterator[list[str]]:
+        return islice(self._reader, self._limit)
+
+    @property
+    def line_num(self) -> int:
+        return self._reader.line_num  # type: ignore[no-any-return]
+
+
+def _parse_range(
+    path: Path,
+    start: int,
+    end: int,
+    positions: dict[str, int],
+    line_offset: int = 0,
+    states: StateTable | None = None,
+) -> tuple[dict[str, tuple[array[int], array[int]]], int]:
+    """Parse the data rows in bytes ``[start, end)``; runs in a worker process.
+
+    Returns the per-state columns and the number of lines read.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+
+    reader = csv.reader(io.StringIO(chunk.decode("utf-8"), newline=""))
+    columns = DataLoader(path, states=states)._ingest(reader, positions, line_offset=line_offset)
+    return columns, reader.line_num
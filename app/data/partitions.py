@@ -0,0 +1,268 @@
+"""Partitioned on-disk datasets: one snapshot file per state (or state-month) plus a manifest.
+
+Layout::
+
+    manifest.json                 states, record counts, content digests, files
+    NSW.<hash>.snap               a single-state snapshot (see ``snapshot``)
+    NSW-2025-06.<hash>.snap       ... or one per calendar month
+
+The manifest answers which states exist, how many records each has and
+the dataset version without opening any partition. Partition file names
+include a content hash, so rebuilding into the same directory never
+modifies a file that a running worker may still load; the manifest is
+replaced last.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from itertools import accumulate
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from app.data.snapshot import SnapshotColumns, SnapshotError, open_snapshot, write_snapshot
+
+if TYPE_CHECKING:
+    from app.data.data_loader import PriceSeries
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+# Bytes held per loaded record: timestamp, price and prefix sum columns.
+BYTES_PER_RECORD = 3 * 8
+
+_SAFE_NAME = re.compile(r"[A-Za-z0-9_]+")
+
+
+class PartitionError(Exception):
+    pass
+
+
+class PartitionEntry(NamedTuple):
+    file: str
+    record_count: int
+    first: int
+    last: int
+
+
+class StateManifest(NamedTuple):
+    record_count: int
+    digest: bytes
+    partitions: list[PartitionEntry]
+
+
+class Manifest(NamedTuple):
+    price_decimals: int
+    record_count: int
+    states: dict[str, StateManifest]
+
+
+def is_partitioned(path: Path) -> bool:
+    return path.is_dir()
+
+
+class PartitionSource(NamedTuple):
+    """One partition to write: a file name label and its rows, in timestamp order."""
+
+    label: str
+    timestamps: array[int] | memoryview
+    prices: array[int] | memoryview
+
+
+def write_partitions(
+    directory: Path,
+    states: Iterable[tuple[str, bytes, list[PartitionSource]]],
+    price_decimals: int,
+) -> Manifest:
+    """Write ``(state, digest, partitions)`` as partition files plus a manifest."""
+    directory.mkdir(parents=True, exist_ok=True)
+
+    manifest_states: dict[str, StateManifest] = {}
+    for state, digest, sources in states:
+        name = state if _SAFE_NAME.fullmatch(state) else state.encode("utf-8").hex()
+
+        entries = []
+        for source in sources:
+            file_name = f"{name}{source.label}.{digest.hex()[:16]}.snap"
+            prefix_sums = array("q", accumulate(source.prices, initial=0))
+            write_snapshot(
+                directory / file_name,
+                [(state, source.timestamps, source.prices, prefix_sums)],
+                price_decimals,
+            )
+            entries.append(
+                PartitionEntry(
+                    file_name, len(source.timestamps), source.timestamps[0], source.timestamps[-1]
+                )
+            )
+
+        manifest_states[state] = StateManifest(
+            sum(entry.record_count for entry in entries), digest, entries
+        )
+
+    manifest = Manifest(
+        price_decimals=price_decimals,
+        record_count=sum(entry.record_count for entry in manifest_states.values()),
+        states=manifest_states,
+    )
+    _write_manifest(directory, manifest)
+    return manifest
+
+
+def read_manifest(directory: Path) -> Manifest:
+    try:
+        raw = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+        if raw.get("format") != FORMAT_VERSION:
+            raise PartitionError(
+                f"Unsupported manifest format {raw.get('format')}, expected {FORMAT_VERSION}"
+            )
+        return Manifest(
+            price_decimals=raw["price_decimals"],
+            record_count=raw["record_count"],
+            states={
+                state: StateManifest(
+                    record_count=entry["record_count"],
+                    digest=bytes.fromhex(entry["digest"]),
+                    partitions=[PartitionEntry(**p) for p in entry["partitions"]],
+                )
+                for state, entry in raw["states"].items()
+            },
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise PartitionError(f"Invalid manifest: {e}") from e
+
+
+def manifest_path(directory: Path) -> Path:
+    return directory / MANIFEST_NAME
+
+
+class PartitionStore:
+    """Loads each state's partitions on first access and keeps them in an LRU.
+
+    When loading a state would take the loaded total over
+    ``memory_budget`` bytes, the least recently used states are dropped
+    first; callers still holding an evicted series keep it alive, and the
+    next access loads it again. A state larger than the budget on its own
+    is still loaded.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        manifest: Manifest,
+        build: Callable[[str, StateManifest, list[SnapshotColumns]], PriceSeries],
+        memory_budget: int | None = None,
+    ):
+        self.directory = directory
+        self.manifest = manifest
+        self.memory_budget = memory_budget
+        self._build = build
+        self.loads = 0
+        self.evictions = 0
+        self._loaded: OrderedDict[str, PriceSeries] = OrderedDict()
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded_bytes(self) -> int:
+        return self._loaded_bytes
+
+    def loaded_states(self) -> list[str]:
+        return list(self._loaded)
+
+    def get(self, state: str) -> PriceSeries | None:
+        entry = self.manifest.states.get(state)
+        if entry is None:
+            return None
+
+        series = self._loaded_series(state)
+        if series is not None:
+            return series
+
+        # Loaded without the lock so queries on other states are not held up;
+        # if two threads race for a state, the first to finish wins.
+        loaded = self._load(state, entry)
+        with self._lock:
+            series = self._loaded.get(state)
+            if series is not None:
+                self._loaded.move_to_end(state)
+                return series
+
+            self._make_room(entry.record_count * BYTES_PER_RECORD)
+            self._loaded[state] = loaded
+            self._loaded_bytes += entry.record_count * BYTES_PER_RECORD
+            self.loads += 1
+            return loaded
+
+    def _loaded_series(self, state: str) -> PriceSeries | None:
+        with self._lock:
+            series = self._loaded.get(state)
+            if series is not None:
+                self._loaded.move_to_end(state)
+            return series
+
+    def adopt(self, other: PartitionStore) -> None:
+        """Take over series that ``other`` has loaded and whose content is unchanged."""
+        with other._lock:
+            candidates = list(other._loaded.items())
+
+        with self._lock:
+            for state, series in candidates:
+                entry = self.manifest.states.get(state)
+                if entry is not None and entry.digest == series.digest():
+                    self._make_room(entry.record_count * BYTES_PER_RECORD)
+                    self._loaded[state] = series
+                    self._loaded_bytes += entry.record_count * BYTES_PER_RECORD
+
+    def _make_room(self, size: int) -> None:
+        if self.memory_budget is None:
+            return
+        while self._loaded and self._loaded_bytes + size > self.memory_budget:
+            state, _ = self._loaded.popitem(last=False)
+            self._loaded_bytes -= self.manifest.states[state].record_count * BYTES_PER_RECORD
+            self.evictions += 1
+
+    def _load(self, state: str, entry: StateManifest) -> PriceSeries:
+        columns = []
+        for partition in entry.partitions:
+            try:
+                snapshot = open_snapshot(self.directory / partition.file)
+            except (SnapshotError, OSError) as e:
+                raise PartitionError(f"Cannot open partition {partition.file}: {e}") from e
+            if snapshot.price_decimals != self.manifest.price_decimals:
+                raise PartitionError(f"Partition {partition.file} has a different price scale")
+            if state not in snapshot.states:
+                raise PartitionError(f"Partition {partition.file} does not contain {state}")
+            columns.append(snapshot.states[state])
+
+        series = self._build(state, entry, columns)
+        if len(series) != entry.record_count:
+            raise PartitionError(f"Partitions for {state} do not match the manifest")
+        return series
+
+
+def _write_manifest(directory: Path, manifest: Manifest) -> None:
+    payload: dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "price_decimals": manifest.price_decimals,
+        "record_count": manifest.record_count,
+        "states": {
+            state: {
+                "record_count": entry.record_count,
+                "digest": entry.digest.hex(),
+                "partitions": [p._asdict() for p in entry.partitions],
+            }
+            for state, entry in sorted(manifest.states.items())
+        },
+    }
+
+    path = manifest_path(directory)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
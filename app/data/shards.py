@@ -0,0 +1,31 @@
+"""Datasets split across several files, such as one CSV per month or year.
+
+A shard set is named either by a glob pattern (``data/prices-*.csv``) or by
+a directory without a partition manifest, whose ``.csv`` and ``.snap``
+files are the shards. Each shard is loaded by its own ``DataLoader``, so
+adding a file only loads that file.
+"""
+
+import glob
+from pathlib import Path
+
+from app.data.partitions import manifest_path
+
+SHARD_SUFFIXES = (".csv", ".snap")
+
+_GLOB_CHARACTERS = frozenset("*?[")
+
+
+def is_sharded(path: Path) -> bool:
+    if not _GLOB_CHARACTERS.isdisjoint(str(path)):
+        return True
+    return path.is_dir() and not manifest_path(path).exists()
+
+
+def shard_paths(spec: Path) -> list[Path]:
+    """The shard files ``spec`` currently names, in path order."""
+    if spec.is_dir():
+        candidates = [p for p in spec.iterdir() if p.suffix in SHARD_SUFFIXES]
+    else:
+        candidates = [Path(p) for p in glob.glob(str(spec))]
+    return sorted(p for p in candidates if p.is_file())
@@ -0,0 +1,160 @@
+"""Compiled binary snapshots of the price dataset.
+
+A snapshot holds the same per-state columns that ``DataLoader`` builds
+from CSV, laid out so they can be memory-mapped and used in place::
+
+    header        magic, format version, price decimals, state count,
+                  record count, CRC-32 of everything after the header
+    state table   one entry per state: name, column offset, record count
+    columns       per state, 8-byte aligned little-endian int64 arrays:
+                  timestamps[n], prices[n], prefix_sums[n + 1]
+
+Every process that maps the same file shares a single page-cache copy.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+MAGIC = b"EPRSNAP\x00"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIQII")
+_STATE_ENTRY = struct.Struct("<16sQQ")
+_ITEM_SIZE = 8
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotColumns(NamedTuple):
+    timestamps: memoryview
+    prices: memoryview
+    prefix_sums: memoryview
+
+
+class Snapshot(NamedTuple):
+    price_decimals: int
+    record_count: int
+    checksum: int
+    states: dict[str, SnapshotColumns]
+
+
+def is_snapshot(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_snapshot(
+    path: Path,
+    columns: Iterable[
+        tuple[str, array[int] | memoryview, array[int] | memoryview, array[int] | memoryview]
+    ],
+    price_decimals: int,
+) -> None:
+    """Write ``(state, timestamps, prices, prefix_sums)`` columns to ``path``.
+
+    The file is written next to the destination and renamed into place,
+    so processes never map a partially written snapshot.
+    """
+    _require_little_endian()
+
+    entries = list(columns)
+    table_size = len(entries) * _STATE_ENTRY.size
+    columns_start = _align(_HEADER.size + table_size)
+
+    table = bytearray()
+    offset = columns_start
+    record_count = 0
+    for state, timestamps, _, _ in entries:
+        name = state.encode("utf-8")
+        if len(name) > _STATE_ENTRY.size - 2 * _ITEM_SIZE:
+            raise SnapshotError(f"State name too long for snapshot: '{state}'")
+        count = len(timestamps)
+        table += _STATE_ENTRY.pack(name, offset, count)
+        offset += (3 * count + 1) * _ITEM_SIZE
+        record_count += count
+    table = table.ljust(columns_start - _HEADER.size, b"\x00")
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.seek(_HEADER.size)
+        f.write(table)
+        checksum = zlib.crc32(table)
+        for _, timestamps, prices, prefix_sums in entries:
+            for column in (timestamps, prices, prefix_sums):
+                f.write(column)
+                checksum = zlib.crc32(column, checksum)
+
+        f.seek(0)
+        f.write(
+            _HEADER.pack(
+                MAGIC, FORMAT_VERSION, price_decimals, len(entries), record_count, checksum, 0
+            )
+        )
+    os.replace(tmp_path, path)
+
+
+def open_snapshot(path: Path, verify: bool = True) -> Snapshot:
+    """Map ``path`` read-only and return zero-copy views of its columns."""
+    _require_little_endian()
+
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise SnapshotError("Snapshot file is empty") from e
+
+    view = memoryview(mapped)
+    if len(view) < _HEADER.size:
+        raise SnapshotError("Snapshot file is truncated")
+
+    magic, version, price_decimals, state_count, record_count, checksum, _ = _HEADER.unpack_from(
+        view
+    )
+    if magic != MAGIC:
+        raise SnapshotError("Not a price snapshot file")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}, expected {FORMAT_VERSION}")
+
+    if verify and zlib.crc32(view[_HEADER.size :]) != checksum:
+        raise SnapshotError("Snapshot checksum mismatch")
+
+    states: dict[str, SnapshotColumns] = {}
+    for i in range(state_count):
+        name, offset, count = _STATE_ENTRY.unpack_from(view, _HEADER.size + i * _STATE_ENTRY.size)
+        end = offset + (3 * count + 1) * _ITEM_SIZE
+        if end > len(view):
+            raise SnapshotError("Snapshot file is truncated")
+
+        block = view[offset:end].cast("q")
+        states[name.rstrip(b"\x00").decode("utf-8")] = SnapshotColumns(
+            timestamps=block[:count],
+            prices=block[count : 2 * count],
+            prefix_sums=block[2 * count :],
+        )
+
+    return Snapshot(
+        price_decimals=price_decimals,
+        record_count=record_count,
+        checksum=checksum,
+        states=states,
+    )
+
+
+def _align(offset: int) -> int:
+    return (offset + _ITEM_SIZE - 1) // _ITEM_SIZE * _ITEM_SIZE
+
+
+def _require_little_endian() -> None:
+    if sys.byteorder != "little":
+        raise SnapshotError("Snapshots are only supported on little-endian hosts")
@@ -0,0 +1,373 @@
+"""SQLite storage for datasets too large to hold in memory.
+
+Schema::
+
+    meta     key/value pairs: schema version, price decimals
+    states   state, record count, content digest (as ``PriceSeries.digest``)
+    prices   state, timestamp, seq, price
+
+``prices`` is a WITHOUT ROWID table clustered on ``(state, timestamp, seq)``,
+so a time range is one contiguous b-tree scan and records that share a
+timestamp keep their file order through ``seq``. Counts, sums and extremes
+are computed by SQLite; only their results cross into Python.
+
+Databases are written next to their destination and renamed into place,
+never modified, so they are opened immutable and a reader keeps a
+consistent view until it is replaced.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import queue
+import sqlite3
+from array import array
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from itertools import count, repeat
+from pathlib import Path
+from typing import NamedTuple
+
+from app.data.data_loader import (
+    INT64_MAX,
+    INT64_MIN,
+    PRICE_DECIMALS,
+    DataLoader,
+    DataLoadError,
+    totals_overflow,
+)
+from app.data.states import StateTable
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE states (
+    state TEXT PRIMARY KEY,
+    record_count INTEGER NOT NULL,
+    digest BLOB NOT NULL
+);
+CREATE TABLE prices (
+    state TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    PRIMARY KEY (state, timestamp, seq)
+) WITHOUT ROWID;
+"""
+
+# Rows fetched from SQLite per round trip when streaming.
+_FETCH_ROWS = 4096
+
+_WHERE_RANGE = "state = ? AND timestamp >= ? AND timestamp < ?"
+
+
+class StateInfo(NamedTuple):
+    record_count: int
+    digest: bytes
+
+
+class BucketRow(NamedTuple):
+    start: int
+    record_count: int
+    total: int
+    minimum: int
+    maximum: int
+
+
+class RangeSummary(NamedTuple):
+    record_count: int
+    total: int
+    square_total: int
+    minimum: int | None
+    maximum: int | None
+
+
+def import_csv(
+    source: Path,
+    destination: Path,
+    batch_rows: int = 1_000_000,
+    states: StateTable | None = None,
+) -> int:
+    """Load the CSV at ``source`` into a new database at ``destination``.
+
+    The CSV is parsed ``batch_rows`` rows at a time, so memory use does not
+    depend on its size; rows are validated against ``states`` as on a load.
+    Returns the number of records imported.
+    """
+    destination = Path(destination)
+    tmp_path = destination.with_name(destination.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    counts: dict[str, int] = {}
+    totals: dict[str, int] = {}
+    connection = sqlite3.connect(tmp_path)
+    try:
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.executescript(_SCHEMA)
+
+            for batch in DataLoader(source, states=states).iter_batches(batch_rows):
+                for state, (timestamps, prices) in batch.items():
+                    seq = counts.get(state, 0)
+                    connection.executemany(
+                        "INSERT INTO prices VALUES (?, ?, ?, ?)",
+                        zip(repeat(state), timestamps, count(seq), prices, strict=False),
+                    )
+                    counts[state] = seq + len(timestamps)
+                    totals[state] = totals.get(state, 0) + sum(prices)
+
+            if not counts:
+                raise DataLoadError("CSV file contains no data rows")
+
+            for state in sorted(counts):
+                if not INT64_MIN <= totals[state] <= INT64_MAX:
+                    raise totals_overflow(state)
+                connection.execute(
+                    "INSERT INTO states VALUES (?, ?, ?)",
+                    (state, counts[state], _digest(connection, state)),
+                )
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("schema_version", str(SCHEMA_VERSION)), ("price_decimals", str(PRICE_DECIMALS))],
+            )
+            connection.commit()
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        tmp_path.unlink(missing_ok=True)
+        raise DataLoadError(f"Failed to write database {destination}: {e}") from e
+    except DataLoadError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, destination)
+    return sum(counts.values())
+
+
+def _digest(connection: sqlite3.Connection, state: str) -> bytes:
+    """``PriceSeries.digest`` of the state's records, streamed from the table."""
+    hasher = hashlib.blake2b(state.encode("utf-8"), digest_size=16)
+    for column in ("timestamp", "price"):
+        cursor = connection.execute(
+            f"SELECT {column} FROM prices WHERE state = ? ORDER BY timestamp, seq", (state,)
+        )
+        while rows := cursor.fetchmany(_FETCH_ROWS):
+            hasher.update(array("q", (row[0] for row in rows)))
+    return hasher.digest()
+
+
+class _SquareSum:
+    """SQL aggregate: exact sum of squares, returned as text to avoid int64 overflow."""
+
+    def __init__(self) -> None:
+        self.total = 0
+
+    def step(self, value: int) -> None:
+        self.total += value * value
+
+    def finalize(self) -> str:
+        return str(self.total)
+
+
+class SqliteStore:
+    """Read-only queries over a database written by ``import_csv``.
+
+    Connections are pooled and shared between threads one query at a time.
+    Every connection is checked to refer to the file this store opened, so a
+    database replaced on disk is only seen by a new store.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            stat = self.path.stat()
+        except OSError as e:
+            raise DataLoadError(f"Database not found: {self.path}") from e
+        self.fingerprint = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        self._idle: queue.SimpleQueue[sqlite3.Connection] = queue.SimpleQueue()
+
+        try:
+            with self._connection() as connection:
+                meta = dict(connection.execute("SELECT key, value FROM meta"))
+                self.states = {
+                    state: StateInfo(record_count, bytes(digest))
+                    for state, record_count, digest in connection.execute(
+                        "SELECT state, record_count, digest FROM states ORDER BY state"
+                    )
+                }
+        except sqlite3.Error as e:
+            raise DataLoadError(f"Invalid database {self.path}: {e}") from e
+
+        if meta.get("schema_version") != str(SCHEMA_VERSION):
+            raise DataLoadError(
+                f"Unsupported database schema {meta.get('schema_version')}, "
+                f"expected {SCHEMA_VERSION}"
+            )
+        if meta.get("price_decimals") != str(PRICE_DECIMALS):
+            raise DataLoadError(
+                f"Database stores prices with {meta.get('price_decimals')} decimal places, "
+                f"expected {PRICE_DECIMALS}"
+            )
+        if not self.states:
+            raise DataLoadError("Database contains no data rows")
+
+    @property
+    def last_modified(self) -> datetime:
+        return datetime.fromtimestamp(self.fingerprint[3] / 1e9, tz=UTC)
+
+    def current_fingerprint(self) -> tuple[int, ...]:
+        stat = self.path.stat()
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def range_total(self, state: str, start: int | None, end: int | None) -> tuple[int, int]:
+        """Record count and price sum for ``start <= timestamp < end``."""
+        with self._connection() as connection:
+            record_count, total = connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(price), 0) FROM prices WHERE {_WHERE_RANGE}",
+                _range_params(state, start, end),
+            ).fetchone()
+        return record_count, total
+
+    def summarize(self, state: str, start: int | None, end: int | None) -> RangeSummary:
+        with self._connection() as connection:
+            record_count, total, square_total, minimum, maximum = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(price), 0), square_sum(price), "
+                f"MIN(price), MAX(price) FROM prices WHERE {_WHERE_RANGE}",
+                _range_params(state, start, end),
+            ).fetchone()
+        return RangeSummary(record_count, total, int(square_total or 0), minimum, maximum)
+
+    def order_statistics(
+        self, state: str, start: int | None, end: int | None, ranks: list[int]
+    ) -> dict[int, int]:
+        """The price at each 1-based ``rank`` of the range sorted by price."""
+        wanted = sorted(set(ranks))
+        found: dict[int, int] = {}
+        with self._connection() as connection:
+            cursor = connection.execute(
+                f"SELECT price FROM prices WHERE {_WHERE_RANGE} ORDER BY price",
+                _range_params(state, start, end),
+            )
+            position = 0
+            try:
+                while wanted and (rows := cursor.fetchmany(_FETCH_ROWS)):
+                    while wanted and wanted[0] <= position + len(rows):
+                        rank = wanted.pop(0)
+                        found[rank] = rows[rank - position - 1][0]
+                    position += len(rows)
+            finally:
+                cursor.close()
+        return found
+
+    def buckets(
+        self, state: str, width: int, offset: int, start: int | None, end: int | None
+    ) -> list[BucketRow]:
+        """Count, sum, min and max per ``width``-second bucket aligned to ``offset``.
+
+        Only buckets that start in ``[start, end)`` are returned, each with
+        all of its records, matching ``RollupBuckets.window``.
+        """
+        lo = None if start is None else start + (offset - start) % width
+        hi = None if end is None else end + (offset - end) % width
+        bucket = f"timestamp - ((timestamp - {offset}) % {width} + {width}) % {width}"
+        with self._connection() as connection:
+            rows = connection.execute(
+                f"SELECT {bucket} AS bucket, COUNT(*), SUM(price), MIN(price), MAX(price) "
+                f"FROM prices WHERE {_WHERE_RANGE} GROUP BY bucket ORDER BY bucket",
+                _range_params(state, lo, hi),
+            ).fetchall()
+        return [BucketRow(*row) for row in rows]
+
+    def records(
+        self,
+        state: str,
+        start: int | None,
+        end: int | None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[int], list[int], int | None]:
+        """A page of ``(timestamps, prices, next_cursor)`` with the paging rules of the service."""
+        if after is not None:
+            start = after + 1 if start is None else max(start, after + 1)
+        params = _range_params(state, start, end)
+
+        with self._connection() as connection:
+            rows = connection.execute(
+                f"SELECT timestamp, price FROM prices WHERE {_WHERE_RANGE} "
+                "ORDER BY timestamp, seq LIMIT ?",
+                (*params, -1 if limit is None else limit),
+            ).fetchall()
+
+            next_cursor = None
+            if limit is not None and len(rows) == limit:
+                last = rows[-1][0]
+                rows = [row for row in rows if row[0] != last]
+                rows += connection.execute(
+                    "SELECT timestamp, price FROM prices WHERE state = ? AND timestamp = ? "
+                    "ORDER BY seq",
+                    (state, last),
+                ).fetchall()
+                more = connection.execute(
+                    f"SELECT 1 FROM prices WHERE {_WHERE_RANGE} LIMIT 1",
+                    (state, last + 1, params[2]),
+                ).fetchone()
+                next_cursor = last if more else None
+
+        return [row[0] for row in rows], [row[1] for row in rows], next_cursor
+
+    def iter_chunks(
+        self, state: str, start: int | None, end: int | None, size: int
+    ) -> Iterator[tuple[list[int], list[int]]]:
+        """Stream ``(timestamps, prices)`` chunks of up to ``size`` records in order."""
+        with self._connection() as connection:
+            cursor = connection.execute(
+                f"SELECT timestamp, price FROM prices WHERE {_WHERE_RANGE} ORDER BY timestamp, seq",
+                _range_params(state, start, end),
+            )
+            try:
+                while rows := cursor.fetchmany(size):
+                    yield [row[0] for row in rows], [row[1] for row in rows]
+            finally:
+                cursor.close()
+
+    def close(self) -> None:
+        """Close idle connections; ones in use are closed when garbage collected."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"{self.path.resolve().as_uri()}?mode=ro&immutable=1"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        if self.current_fingerprint()[:2] != self.fingerprint[:2]:
+            connection.close()
+            raise DataLoadError(f"Database {self.path} was replaced; waiting for a reload")
+        # typeshed only allows aggregates that finalize to int.
+        connection.create_aggregate("square_sum", 1, _SquareSum)  # type: ignore[arg-type]
+        return connection
+
+
+def _range_params(state: str, start: int | None, end: int | None) -> tuple[str, int, int]:
+    # Open bounds become the int64 extremes; no record has those timestamps.
+    return (
+        state,
+        INT64_MIN if start is None else start,
+        INT64_MAX if end is None else end,
+    )
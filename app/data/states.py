@@ -0,0 +1,78 @@
+"""Canonical state codes and the spellings that resolve to them.
+
+A ``StateTable`` maps every accepted spelling of a state (the code itself
+and any alias, in each casing a client or CSV is likely to use) to one
+interned canonical code, so resolving a raw value is a single dict lookup.
+Only values missing from the table are stripped and upper-cased before a
+second lookup.
+"""
+
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from itertools import product
+from typing import Any
+
+# Spellings up to this long get every casing precomputed (2**n variants);
+# longer ones, such as full state names, get the usual four.
+_ALL_CASINGS_MAX_LENGTH = 4
+
+
+def _casings(spelling: str) -> Iterator[str]:
+    if len(spelling) <= _ALL_CASINGS_MAX_LENGTH:
+        for variant in product(*((c.upper(), c.lower()) for c in spelling)):
+            yield "".join(variant)
+    else:
+        yield from (spelling.upper(), spelling.lower(), spelling.title(), spelling.capitalize())
+
+
+class StateTable:
+    """Resolves raw state values to canonical codes.
+
+    ``strict`` tells loaders to reject rows whose state does not resolve
+    instead of skipping them.
+    """
+
+    def __init__(
+        self,
+        codes: Iterable[str],
+        aliases: Mapping[str, str] | None = None,
+        strict: bool = False,
+    ):
+        self.codes: tuple[str, ...] = tuple(sorted({sys.intern(c.strip().upper()) for c in codes}))
+        self.strict = strict
+
+        spellings = {code: code for code in self.codes}
+        for alias, code in (aliases or {}).items():
+            canonical = spellings.get(code.strip().upper())
+            if canonical is None:
+                raise ValueError(f"Alias '{alias}' refers to unknown state '{code}'")
+            spellings[alias.strip().upper()] = canonical
+
+        self._lookup: dict[str, str] = {}
+        for spelling, code in spellings.items():
+            for variant in _casings(spelling):
+                self._lookup[variant] = code
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "StateTable":
+        """The table for ``VALID_STATES``, ``STATE_ALIASES`` and ``STRICT_STATES``."""
+        return cls(
+            config["VALID_STATES"],
+            config.get("STATE_ALIASES"),
+            strict=config.get("STRICT_STATES", False),
+        )
+
+    def resolve(self, raw: str) -> str | None:
+        """The canonical code ``raw`` spells, or None."""
+        code = self._lookup.get(raw)
+        if code is None:
+            code = self._lookup.get(raw.strip().upper())
+        return code
+
+    def restricted_to(self, codes: Iterable[str]) -> "StateTable":
+        """A table for ``codes``, keeping the aliases of those that are in this one."""
+        table = StateTable(codes, strict=self.strict)
+        for spelling, code in self._lookup.items():
+            if code in table.codes:
+                table._lookup.setdefault(spelling, code)
+        return table
@@ -0,0 +1,35 @@
+"""Gunicorn settings that load the dataset once and share it with every worker.
+
+    FLASK_ENV=production gunicorn -c python:app.gunicorn_conf --workers 4
+
+The master builds the app, dataset and query indexes before forking, so
+workers start with all of it in shared copy-on-write pages and memory
+stays close to one copy of the dataset however many workers run. Prices
+are held in flat ``array('q')`` columns, so reference counting touches
+only their small headers, never the pages holding the data.
+
+Each worker logs its shared and private memory once started; ``/metrics``
+reports the same split as ``process_shared_memory_bytes`` and
+``process_private_memory_bytes``.
+"""
+
+import os
+from typing import Any
+
+from app.serving import log_memory_usage, prepare_for_fork, start_worker
+
+wsgi_app = "app:create_app()"
+preload_app = True
+bind = os.environ.get("PRICE_BIND", "0.0.0.0:5000")
+
+
+def when_ready(server: Any) -> None:
+    prepare_for_fork(server.app.wsgi())
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    start_worker(worker.app.wsgi())
+
+
+def post_worker_init(worker: Any) -> None:
+    log_memory_usage(f"Worker {worker.pid}")
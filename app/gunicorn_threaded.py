@@ -0,0 +1,71 @@
+"""Gunicorn settings for many concurrent, slow or idle keep-alive clients.
+
+    FLASK_ENV=production gunicorn -c python:app.gunicorn_threaded
+
+Builds on ``app.gunicorn_conf``: the dataset is loaded once in the master
+and shared with every worker. Each worker runs ``PollingThreadWorker``, a
+``gthread`` worker that parks idle keep-alive connections and connections
+that have not yet sent a request in a poller, so they cost a file
+descriptor but no thread. A thread is only taken while a request is read,
+handled and written, which for a cached query takes well under a
+millisecond.
+
+``PRICE_WORKERS`` (default: one per CPU), ``PRICE_THREADS`` (default 16),
+``PRICE_WORKER_CONNECTIONS`` (default 4096) and ``PRICE_KEEPALIVE``
+(seconds, default 75) size the pool; each worker holds up to
+``PRICE_WORKER_CONNECTIONS`` open connections.
+"""
+
+import errno
+import os
+import selectors
+import socket
+import time
+from functools import partial
+
+from gunicorn.workers.gthread import TConn, ThreadWorker
+
+from app.gunicorn_conf import (  # noqa: F401
+    bind,
+    post_fork,
+    post_worker_init,
+    preload_app,
+    when_ready,
+    wsgi_app,
+)
+
+worker_class = "app.gunicorn_threaded.PollingThreadWorker"
+workers = int(os.environ.get("PRICE_WORKERS", 0)) or os.cpu_count() or 1
+threads = int(os.environ.get("PRICE_THREADS", 16))
+worker_connections = int(os.environ.get("PRICE_WORKER_CONNECTIONS", 4096))
+# Longer than the 60 seconds most load balancers and mobile stacks keep an
+# idle connection, so the client side closes first.
+keepalive = int(os.environ.get("PRICE_KEEPALIVE", 75))
+
+
+class PollingThreadWorker(ThreadWorker):
+    """A ``gthread`` worker that hands a new connection to a thread once it is readable.
+
+    The stock worker lends every accepted connection a thread for up to five
+    seconds while it waits for the first bytes, so a burst of clients that
+    connect and stay silent holds every thread and stalls all other
+    requests. Here new connections start on the poller, with the keep-alive
+    timeout, exactly as connections the stock worker gave up waiting for.
+    Written against gunicorn 25's worker, which ``requirements.txt`` pins.
+    """
+
+    def accept(self, listener: socket.socket) -> None:
+        try:
+            client_sock, client_addr = listener.accept()
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.ECONNABORTED, errno.EWOULDBLOCK):
+                raise
+            return
+
+        self.nr_conns += 1
+        conn = TConn(self.cfg, client_sock, client_addr, listener.getsockname())
+        conn.timeout = time.monotonic() + self.cfg.keepalive
+        self.pending_conns.append(conn)
+        self.poller.register(
+            client_sock, selectors.EVENT_READ, partial(self.on_pending_socket_readable, conn)
+        )
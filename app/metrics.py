@@ -0,0 +1,255 @@
+"""Prometheus text-format metrics for the API.
+
+Request latency is recorded by ``before_request``/``after_request`` hooks
+into in-process histograms; everything else (cache counters, dataset
+size, load timings, memory) is read from the live objects when
+``/metrics`` is scraped. Each gunicorn worker keeps its own registry, so
+scrape workers individually or aggregate by instance.
+"""
+
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from typing import NamedTuple
+
+from flask import Flask, Response, current_app, g, request
+
+from app.routes.http_cache import EXTENSION_KEY as SERIALIZED_RESPONSES
+from app.services.cache import CacheStats
+
+EXTENSION_KEY = "metrics"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; a final +Inf bucket is implied.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Collector = Callable[[], Iterable[str]]
+
+
+class MemoryUsage(NamedTuple):
+    """Resident bytes, split into pages shared with other processes and this one's own.
+
+    ``proportional`` charges each shared page to this process in proportion
+    to the processes sharing it, so it sums to the true total across workers.
+    """
+
+    resident: int
+    proportional: int
+    shared: int
+    private: int
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _header(name: str, kind: str, help_text: str) -> Iterator[str]:
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {kind}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed tuple of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # Per label set: one count per bucket (non-cumulative, +Inf last), then the sum.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def collect(self) -> Iterator[str]:
+        yield from _header(self.name, "histogram", self.help_text)
+        with self._lock:
+            snapshot = {
+                labels: (list(counts), total[0]) for labels, (counts, total) in self._series.items()
+            }
+
+        bounds = [*(f"{bound:g}" for bound in self.buckets), "+Inf"]
+        for labels, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts, strict=True):
+                cumulative += count
+                bucket_labels = _labels((*self.label_names, "le"), (*labels, bound))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            series_labels = _labels(self.label_names, labels)
+            yield f"{self.name}_sum{series_labels} {total}"
+            yield f"{self.name}_count{series_labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Time spent handling requests, by endpoint, method and status.",
+            ("endpoint", "method", "status"),
+        )
+        self._collectors: list[Collector] = [self.request_duration.collect]
+
+    def register(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = [line for collector in self._collectors for line in collector()]
+        return "\n".join(lines) + "\n"
+
+
+def init_metrics(app: Flask) -> MetricsRegistry:
+    """Time every request and serve the registry at ``/metrics``."""
+    registry = MetricsRegistry()
+    registry.register(_collect_cache_stats)
+    registry.register(_collect_dataset)
+    registry.register(_collect_process)
+    app.extensions[EXTENSION_KEY] = registry
+
+    @app.before_request
+    def start_timer() -> None:
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_duration(response: Response) -> Response:
+        started = g.pop("request_started", None)
+        if started is not None:
+            registry.request_duration.observe(
+                (request.endpoint or "unmatched", request.method, str(response.status_code)),
+                time.perf_counter() - started,
+            )
+        return response
+
+    def metrics() -> Response:
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule("/metrics", "metrics", metrics, methods=["GET"])
+    return registry
+
+
+def _collect_cache_stats() -> Iterator[str]:
+    caches: dict[str, CacheStats] = {}
+    service = current_app.config.get("PRICE_SERVICE")
+    if service is not None:
+        caches.update(service.cache_stats)
+    responses = current_app.extensions.get(SERIALIZED_RESPONSES)
+    if responses is not None:
+        caches["serialized_responses"] = responses.stats
+
+    yield from _header(
+        "price_cache_requests_total", "counter", "Cache lookups by cache and result."
+    )
+    for name, stats in caches.items():
+        yield f'price_cache_requests_total{{cache="{name}",result="hit"}} {stats.hits}'
+        yield f'price_cache_requests_total{{cache="{name}",result="miss"}} {stats.misses}'
+
+    yield from _header("price_cache_evictions_total", "counter", "Entries dropped from each cache.")
+    for name, stats in caches.items():
+        yield f'price_cache_evictions_total{{cache="{name}"}} {stats.evictions}'
+
+
+def _collect_dataset() -> Iterator[str]:
+    service = current_app.config.get("PRICE_SERVICE")
+    if service is None:
+        return
+
+    yield from _header("price_dataset_records", "gauge", "Price records loaded per state.")
+    for state, count in service.get_record_counts().items():
+        yield f"price_dataset_records{_labels(('state',), (state,))} {count}"
+
+    timings = service.load_timings
+    yield from _header(
+        "price_dataset_load_duration_seconds",
+        "gauge",
+        "Time taken by the load or refresh that produced the current dataset.",
+    )
+    yield f"price_dataset_load_duration_seconds {sum(timings.values())}"
+
+    yield from _header(
+        "price_dataset_load_phase_seconds", "gauge", "Time taken by each phase of that load."
+    )
+    for phase, seconds in timings.items():
+        yield f"price_dataset_load_phase_seconds{_labels(('phase',), (phase,))} {seconds}"
+
+    yield from _header("price_dataset_info", "gauge", "The current dataset version.")
+    yield f"price_dataset_info{_labels(('version',), (service.dataset_version,))} 1"
+
+
+def _collect_process() -> Iterator[str]:
+    resident = _resident_memory_bytes()
+    if resident is not None:
+        yield from _header(
+            "process_resident_memory_bytes", "gauge", "Resident memory size in bytes."
+        )
+        yield f"process_resident_memory_bytes {resident}"
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    peak *= 1 if sys.platform == "darwin" else 1024
+    yield from _header(
+        "process_max_resident_memory_bytes", "gauge", "Peak resident memory size in bytes."
+    )
+    yield f"process_max_resident_memory_bytes {peak}"
+
+    usage = memory_usage()
+    if usage is not None:
+        for kind in ("proportional", "shared", "private"):
+            name = f"process_{kind}_memory_bytes"
+            yield from _header(name, "gauge", f"Resident memory counted as {kind}, in bytes.")
+            yield f"{name} {getattr(usage, kind)}"
+
+
+def _resident_memory_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def memory_usage(path: str = "/proc/self/smaps_rollup") -> MemoryUsage | None:
+    """This process's memory from Linux's ``smaps_rollup``; None where it is unavailable."""
+    kib: dict[str, int] = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                fields = value.split()
+                if len(fields) == 2 and fields[1] == "kB":
+                    kib[name] = int(fields[0])
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return MemoryUsage(
+            resident=kib["Rss"] * 1024,
+            proportional=kib["Pss"] * 1024,
+            shared=(kib["Shared_Clean"] + kib["Shared_Dirty"]) * 1024,
+            private=(kib["Private_Clean"] + kib["Private_Dirty"]) * 1024,
+        )
+    except KeyError:
+        return None
@@ -0,0 +1,156 @@
+"""Timing spans around hot paths and opt-in profiles of single requests.
+
+Spans are written as one JSON object per line to the ``app.spans`` logger,
+which ``create_app`` enables at INFO when ``TRACE_SPANS`` is set; with the
+logger disabled a span costs one level check, and hot paths can skip even
+that setup with ``tracing()``. Spans logged while handling a request share
+that request's ``trace`` id.
+
+With ``PROFILING_ENABLED`` set, a request sent with an ``X-Profile`` header
+runs under ``cProfile``. The profile is written to ``PROFILE_DIR`` (named
+in the ``X-Profile-File`` response header) or, without one, returned as a
+plain-text report in place of the response body. Only the view function is
+profiled: the body of a streamed response is produced after it returns.
+Since Python 3.12 cProfile records every thread in the process, so under a
+threaded worker the profile also holds whatever other requests ran
+meanwhile; profile against a quiet worker or one with a single thread.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, Response, g, request
+
+SPAN_LOGGER = "app.spans"
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+
+# Functions listed in a plain-text profile report, by cumulative time.
+REPORT_LINES = 40
+
+span_logger = logging.getLogger(SPAN_LOGGER)
+
+_trace_id: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+# Only one cProfile profiler can be active in the interpreter at a time.
+_profiler_lock = threading.Lock()
+
+
+def record_span(name: str, seconds: float, **fields: Any) -> None:
+    """Log a span measured elsewhere, such as a load phase."""
+    if not span_logger.isEnabledFor(logging.INFO):
+        return
+    entry = {"span": name, "ms": round(seconds * 1000, 3), **fields}
+    trace = _trace_id.get()
+    if trace is not None:
+        entry["trace"] = trace
+    span_logger.info(json.dumps(entry, default=str))
+
+
+def tracing() -> bool:
+    """Whether spans are being logged."""
+    return span_logger.isEnabledFor(logging.INFO)
+
+
+def span(name: str, **fields: Any) -> AbstractContextManager[dict[str, Any]]:
+    """Time the block and log it as ``name``; the block may add to the yielded fields."""
+    if not span_logger.isEnabledFor(logging.INFO):
+        return nullcontext(fields)
+    return _timed_span(name, fields)
+
+
+@contextmanager
+def _timed_span(name: str, fields: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record_span(name, time.perf_counter() - started, **fields)
+
+
+def init_profiling(app: Flask) -> None:
+    """Trace every request and, if enabled, profile those that ask for it."""
+    profiling = app.config.get("PROFILING_ENABLED", False)
+    profile_dir = app.config.get("PROFILE_DIR")
+
+    @app.before_request
+    def start_request() -> None:
+        if span_logger.isEnabledFor(logging.INFO):
+            g.trace_token = _trace_id.set(uuid.uuid4().hex[:16])
+            g.trace_started = time.perf_counter()
+        if profiling and PROFILE_HEADER in request.headers:
+            g.profiler = _start_profiler()
+
+    @app.after_request
+    def finish_request(response: Response) -> Response:
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            _stop_profiler(profiler)
+            response = _profile_response(profiler, response, profile_dir)
+
+        started = g.pop("trace_started", None)
+        if started is not None:
+            record_span(
+                "request",
+                time.perf_counter() - started,
+                endpoint=request.endpoint,
+                method=request.method,
+                status=response.status_code,
+            )
+        return response
+
+    @app.teardown_request
+    def end_request(error: BaseException | None) -> None:
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            # The request failed before its profile could be reported.
+            _stop_profiler(profiler)
+        token = g.pop("trace_token", None)
+        if token is not None:
+            _trace_id.reset(token)
+
+
+def _start_profiler() -> cProfile.Profile | None:
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool already owns the interpreter.
+        _profiler_lock.release()
+        return None
+    return profiler
+
+
+def _stop_profiler(profiler: cProfile.Profile) -> None:
+    profiler.disable()
+    _profiler_lock.release()
+
+
+def _profile_response(
+    profiler: cProfile.Profile, response: Response, profile_dir: str | Path | None
+) -> Response:
+    if profile_dir is not None:
+        directory = Path(profile_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{request.endpoint or 'unmatched'}-{time.time_ns()}.prof"
+        profiler.dump_stats(path)
+        response.headers[PROFILE_FILE_HEADER] = str(path)
+        return response
+
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(REPORT_LINES)
+    return Response(report.getvalue(), status=response.status_code, mimetype="text/plain")
@@ -0,0 +1,85 @@
+"""Streaming encoders for the raw-record export.
+
+Rows are rendered straight from the storage backend's fixed-point chunks,
+so memory use does not grow with the size of the exported range.
+"""
+
+import json
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+
+from app.data.data_loader import format_fixed, from_epoch
+from app.services.price_service import RecordStream
+
+# Records read from storage, and rows rendered, per yielded chunk.
+CHUNK_ROWS = 4096
+
+_SECONDS_PER_DAY = 86_400
+
+
+class _TimestampFormatter:
+    """Formats epoch seconds, rendering each distinct day and time of day once."""
+
+    def __init__(self, separator: str):
+        self._separator = separator
+        self._days: dict[int, str] = {}
+        self._times: dict[int, str] = {}
+
+    def __call__(self, seconds: int) -> str:
+        day, offset = divmod(seconds, _SECONDS_PER_DAY)
+
+        date = self._days.get(day)
+        if date is None:
+            start = from_epoch(day * _SECONDS_PER_DAY)
+            date = self._days[day] = f"{start:%Y-%m-%d}{self._separator}"
+
+        time_of_day = self._times.get(offset)
+        if time_of_day is None:
+            hours, remainder = divmod(offset, 3600)
+            minutes, secs = divmod(remainder, 60)
+            time_of_day = self._times[offset] = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+        return date + time_of_day
+
+
+def _rows(stream: RecordStream, render: Callable[[int, int], str]) -> Iterator[str]:
+    for timestamps, prices in stream.chunks:
+        yield "".join(map(render, timestamps, prices))
+
+
+def csv_rows(stream: RecordStream) -> Iterator[str]:
+    """CSV in the loader's own input format, so an export can be loaded again."""
+    state = _csv_field(stream.state)
+    timestamp = _TimestampFormatter(" ")
+
+    def render(seconds: int, units: int) -> str:
+        return f"{state},{format_fixed(units)},{timestamp(seconds)}\n"
+
+    yield "state,price,timestamp\n"
+    yield from _rows(stream, render)
+
+
+def ndjson_rows(stream: RecordStream) -> Iterator[str]:
+    """One JSON object per line; prices are exact decimal numbers."""
+    prefix = f'{{"state": {json.dumps(stream.state)}, "timestamp": "'
+    timestamp = _TimestampFormatter("T")
+
+    def render(seconds: int, units: int) -> str:
+        return f'{prefix}{timestamp(seconds)}", "price": {format_fixed(units)}}}\n'
+
+    yield from _rows(stream, render)
+
+
+def _csv_field(value: str) -> str:
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def gzipped(chunks: Iterable[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
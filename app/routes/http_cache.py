@@ -0,0 +1,90 @@
+"""Conditional GET support and pre-serialised JSON bodies for the price routes.
+
+Every successful response is a pure function of the loaded dataset, so the
+dataset version doubles as a strong ETag. Bodies for the bounded set of
+whole-history queries are serialised once per dataset version and reused.
+"""
+
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from typing import Any
+
+from flask import Response, current_app, jsonify, request
+
+from app.profiling import span
+from app.services.cache import CacheStats
+
+EXTENSION_KEY = "serialized_responses"
+
+
+class SerializedResponses:
+    """JSON bodies keyed by query, valid for a single dataset version.
+
+    The version and its bodies are swapped as one tuple, so a reader never
+    pairs a body with the wrong version.
+    """
+
+    def __init__(self) -> None:
+        self._entry: tuple[str | None, dict[str, bytes]] = (None, {})
+        self.stats = CacheStats()
+
+    def get_or_build(self, version: str, key: str, build: Callable[[], Any]) -> bytes:
+        entry_version, bodies = self._entry
+        if entry_version != version:
+            self.stats.evict(len(bodies))
+            bodies = {}
+            self._entry = (version, bodies)
+
+        body = bodies.get(key)
+        if body is None:
+            self.stats.miss()
+            body = bodies[key] = dump_json(build())
+        else:
+            self.stats.hit()
+        return body
+
+
+def dump_json(payload: Any) -> bytes:
+    with span("json.dump") as fields:
+        body = jsonify(payload).get_data()
+        fields["bytes"] = len(body)
+    return body
+
+
+def serialized_responses() -> SerializedResponses:
+    return current_app.extensions[EXTENSION_KEY]  # type: ignore[no-any-return]
+
+
+def not_modified(etag: str, last_modified: datetime | None) -> Response | None:
+    """Return a bodiless 304 if the client already holds this representation."""
+    if not request.if_none_match.contains(etag):
+        return None
+
+    response = current_app.response_class(status=304)
+    _set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def cached_json(body: bytes, etag: str, last_modified: datetime | None) -> Response:
+    response = current_app.response_class(body, mimetype="application/json")
+    _set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def cached_stream(
+    chunks: Iterable[bytes] | Iterable[str],
+    mimetype: str,
+    etag: str,
+    last_modified: datetime | None,
+) -> Response:
+    response = current_app.response_class(chunks, mimetype=mimetype)
+    _set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def _set_cache_headers(response: Response, etag: str, last_modified: datetime | None) -> None:
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get("HTTP_CACHE_MAX_AGE", 60)
+    if last_modified is not None:
+        response.last_modified = last_modified
@@ -1,10 +1,37 @@
 import logging
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
 from http import HTTPStatus
 from typing import Any
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 
-from app.services.price_service import PriceService, StateNotFoundError
+from app.data.data_loader import from_epoch, from_fixed
+from app.routes.export import CHUNK_ROWS, csv_rows, gzipped, ndjson_rows
+from app.routes.http_cache import (
+    cached_json,
+    cached_stream,
+    dump_json,
+    not_modified,
+    serialized_responses,
+)
+from app.services.downsampling import DOWNSAMPLING_METHODS, MIN_POINTS
+from app.services.price_service import (
+    DistributionStatistics,
+    DownsampledSeries,
+    MeanPriceQuery,
+    NoPricesInRangeError,
+    PriceService,
+    PriceStatistics,
+    RecordWindow,
+    RollingSeries,
+    SpreadStatistics,
+    StateNotFoundError,
+)
+from app.services.rolling import ROLLING_STATISTICS
+from app.services.rollups import ROLLUP_INTERVALS
 
 logger = logging.getLogger(__name__)
 
@@ -15,63 +42,624 @@ def get_price_service() -> PriceService:
     return current_app.config["PRICE_SERVICE"]  # type: ignore[no-any-return]
 
 
-@prices_bp.route("/prices/mean", methods=["GET"])
-def get_mean_price() -> tuple[Any, int]:
-    state = request.args.get("state")
+class InvalidRequestError(Exception):
+    def __init__(self, error: str, hint: str):
+        super().__init__(error)
+        self.error = error
+        self.hint = hint
+
+
+@prices_bp.errorhandler(InvalidRequestError)
+def handle_invalid_request(e: InvalidRequestError) -> tuple[Any, int]:
+    return jsonify({"error": e.error, "hint": e.hint}), HTTPStatus.BAD_REQUEST
+
+
+@prices_bp.errorhandler(StateNotFoundError)
+def handle_state_not_found(e: StateNotFoundError) -> tuple[Any, int]:
+    logger.info(f"State not found: {request.args.get('state')}")
+    return jsonify({"error": str(e)}), HTTPStatus.NOT_FOUND
+
+
+@prices_bp.errorhandler(NoPricesInRangeError)
+def handle_no_prices_in_range(e: NoPricesInRangeError) -> tuple[Any, int]:
+    return jsonify({"error": str(e)}), HTTPStatus.NOT_FOUND
+
+
+def _state_arg() -> str:
+    return _validate_state(request.args.get("state"))
 
+
+def _validate_state(state: str | None, name: str = "state") -> str:
+    """The canonical code of a served state, or the stripped value if it is well formed."""
     if state is None:
-        return jsonify(
-            {
-                "error": "Missing required parameter: state",
-                "hint": "Provide state as query parameter, e.g., ?state=NSW",
-            }
-        ), HTTPStatus.BAD_REQUEST
+        raise InvalidRequestError(
+            f"Missing required parameter: {name}",
+            f"Provide {name} as query parameter, e.g., ?{name}=NSW",
+        )
+
+    canonical = get_price_service().canonical_state(state)
+    if canonical is not None:
+        return canonical
 
     state = state.strip()
     if not state:
-        return jsonify(
-            {
-                "error": "State parameter cannot be empty",
-                "hint": "Valid states: NSW, QLD, SA, TAS, VIC",
-            }
-        ), HTTPStatus.BAD_REQUEST
+        raise InvalidRequestError(
+            f"{name.capitalize()} parameter cannot be empty",
+            "Valid states: NSW, QLD, SA, TAS, VIC",
+        )
 
     if not state.isalpha() or len(state) > 10:
-        return jsonify(
-            {
-                "error": f"Invalid state format: '{state}'",
-                "hint": "State should be a short alphabetic code like NSW or VIC",
-            }
-        ), HTTPStatus.BAD_REQUEST
+        raise InvalidRequestError(
+            f"Invalid state format: '{state}'",
+            "State should be a short alphabetic code like NSW or VIC",
+        )
+
+    return state
 
+
+def _parse_timestamp(name: str, value: str | None) -> datetime | None:
+    if value is None:
+        return None
+
+    hint = "Use ISO 8601 market time, e.g., from=2025-06-24T00:00:00"
     try:
-        service = get_price_service()
-        stats = service.get_mean_price(state)
+        timestamp = datetime.fromisoformat(value.strip())
+    except ValueError as e:
+        raise InvalidRequestError(f"Invalid '{name}' timestamp: '{value}'", hint) from e
+
+    if timestamp.tzinfo is not None:
+        raise InvalidRequestError(
+            f"Timezone offsets are not supported in '{name}': '{value}'", hint
+        )
+
+    return timestamp
+
+
+def _range_args() -> tuple[datetime | None, datetime | None]:
+    return _validate_range(request.args.get("from"), request.args.get("to"))
+
+
+def _validate_range(
+    raw_start: str | None, raw_end: str | None
+) -> tuple[datetime | None, datetime | None]:
+    start = _parse_timestamp("from", raw_start)
+    end = _parse_timestamp("to", raw_end)
+
+    if start is not None and end is not None and start >= end:
+        raise InvalidRequestError(
+            "'from' must be earlier than 'to'",
+            "The range includes 'from' and excludes 'to'",
+        )
+
+    return start, end
+
+
+DEFAULT_PERCENTILES = "5,50,95,99"
+MAX_PERCENTILES = 20
+
+
+def _percentiles_arg() -> list[float]:
+    raw = request.args.get("percentiles", DEFAULT_PERCENTILES)
+    hint = f"Comma-separated numbers from 0 to 100, e.g., percentiles={DEFAULT_PERCENTILES}"
+
+    percentiles: list[float] = []
+    for item in raw.split(","):
+        try:
+            value = float(item.strip())
+        except ValueError as e:
+            raise InvalidRequestError(f"Invalid percentile: '{item}'", hint) from e
+        if not 0 <= value <= 100:
+            raise InvalidRequestError(f"Percentile out of range: '{item}'", hint)
+        if value not in percentiles:
+            percentiles.append(value)
+
+    if len(percentiles) > MAX_PERCENTILES:
+        raise InvalidRequestError(
+            f"Too many percentiles: {len(percentiles)}",
+            f"At most {MAX_PERCENTILES} percentiles may be requested",
+        )
+
+    return percentiles
+
+
+def _with_range(
+    payload: dict[str, Any], start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    if start is not None:
+        payload["from"] = start.isoformat()
+    if end is not None:
+        payload["to"] = end.isoformat()
+    return payload
+
+
+def _mean_price_payload(
+    stats: PriceStatistics, start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "state": stats.state,
+        "mean_price": float(stats.mean),
+        "record_count": stats.record_count,
+    }
+    return _with_range(payload, start, end)
+
+
+def _cacheable(
+    service: PriceService,
+    key: str | None,
+    build: Callable[[], Any],
+    states: Iterable[str] = (),
+) -> Response:
+    """Serve ``build()`` with validators, honouring ``If-None-Match``.
+
+    With a ``key`` the serialised body is kept for the current dataset
+    version; only use one for queries with a small, fixed key space.
+    ``states`` are resolved before the validators are compared, so an
+    unknown state is a 404 whatever the client holds. Without a key the
+    result is computed first too, so an empty range is also a 404.
+    """
+    version = service.dataset_version
+    last_modified = service.last_modified
+
+    for state in states:
+        service.resolve_state(state)
+    payload = build() if key is None else None
+
+    response = not_modified(version, last_modified)
+    if response is not None:
+        return response
+
+    if key is None:
+        body = dump_json(payload)
+    else:
+        body = serialized_responses().get_or_build(version, key, build)
+
+    if service.dataset_version != version:
+        # Reloaded mid-request: the body may belong to either version.
+        return current_app.response_class(dump_json(build()), mimetype="application/json")
+
+    return cached_json(body, version, last_modified)
+
+
+def prime_serialized_responses() -> None:
+    """Serialise the whole-history response for every state ahead of the first request."""
+    service = get_price_service()
+    version = service.dataset_version
+    responses = serialized_responses()
+
+    responses.get_or_build(version, "states", partial(_states_payload, service))
+    if service.loads_lazily:
+        # Priming the means would load every partition up front.
+        return
+    for state in service.get_available_states():
+        responses.get_or_build(
+            version, f"mean:{state}", partial(_whole_history_mean, service, state)
+        )
+
+
+def _states_payload(service: PriceService) -> dict[str, Any]:
+    return {"states": service.get_available_states()}
+
+
+def _whole_history_mean(service: PriceService, state: str) -> dict[str, Any]:
+    return _mean_price_payload(service.get_mean_price(state), None, None)
+
+
+@prices_bp.route("/prices/mean", methods=["GET"])
+def get_mean_price() -> Response | tuple[Any, int]:
+    raw_state = request.args.get("state")
+    if raw_state is not None and "," in raw_state:
+        _range_args()
+        return _batch_mean_prices(
+            [
+                {"state": state, "from": request.args.get("from"), "to": request.args.get("to")}
+                for state in raw_state.split(",")
+            ]
+        )
+
+    state = _state_arg()
+    start, end = _range_args()
+
+    service = get_price_service()
+
+    if start is None and end is None:
+        return _cacheable(
+            service, f"mean:{state}", lambda: _whole_history_mean(service, state), [state]
+        )
+
+    return _cacheable(
+        service,
+        None,
+        lambda: _mean_price_payload(
+            service.get_mean_price(state, start=start, end=end), start, end
+        ),
+        [state],
+    )
+
+
+@prices_bp.route("/prices/mean/batch", methods=["POST"])
+def get_mean_prices() -> tuple[Any, int]:
+    body = request.get_json(silent=True)
+    queries = body.get("queries") if isinstance(body, dict) else None
+
+    if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+        raise InvalidRequestError(
+            "Request body must be a JSON object with a 'queries' list",
+            'e.g., {"queries": [{"state": "NSW", "from": "2025-06-24T00:00:00"}]}',
+        )
+
+    return _batch_mean_prices(queries)
+
+
+def _batch_mean_prices(items: list[dict[str, Any]]) -> tuple[Any, int]:
+    """Validate each item on its own and answer the valid ones in one service call."""
+    max_queries = current_app.config.get("MAX_BATCH_QUERIES", 100)
+    if len(items) > max_queries:
+        raise InvalidRequestError(
+            f"Too many queries: {len(items)}",
+            f"A batch may contain at most {max_queries} queries",
+        )
+
+    results: list[dict[str, Any] | None] = []
+    queries: list[MeanPriceQuery] = []
+    for item in items:
+        try:
+            if any(not isinstance(item.get(key), str | None) for key in ("state", "from", "to")):
+                raise InvalidRequestError(
+                    "Query fields must be strings",
+                    'e.g., {"state": "NSW", "from": "2025-06-24T00:00:00"}',
+                )
+            state = _validate_state(item.get("state"))
+            start, end = _validate_range(item.get("from"), item.get("to"))
+        except InvalidRequestError as e:
+            results.append(
+                {
+                    "state": item.get("state"),
+                    "error": e.error,
+                    "hint": e.hint,
+                    "status": HTTPStatus.BAD_REQUEST,
+                }
+            )
+            continue
+
+        results.append(None)
+        queries.append(MeanPriceQuery(state, start, end))
 
-        return jsonify(
+    answers = iter(zip(queries, get_price_service().get_mean_prices(queries), strict=True))
+    for i, result in enumerate(results):
+        if result is not None:
+            continue
+
+        query, answer = next(answers)
+        if isinstance(answer, PriceStatistics):
+            results[i] = _mean_price_payload(answer, query.start, query.end)
+        else:
+            results[i] = {
+                "state": query.state,
+                "error": str(answer),
+                "status": HTTPStatus.NOT_FOUND,
+            }
+
+    return jsonify({"results": results}), HTTPStatus.OK
+
+
+@prices_bp.route("/prices/aggregate", methods=["GET"])
+def get_price_aggregates() -> Response:
+    state = _state_arg()
+    start, end = _range_args()
+
+    interval = request.args.get("interval", "day").strip().lower()
+    if interval not in ROLLUP_INTERVALS:
+        raise InvalidRequestError(
+            f"Invalid interval: '{interval}'",
+            f"Valid intervals: {', '.join(ROLLUP_INTERVALS)}",
+        )
+
+    service = get_price_service()
+
+    def build() -> dict[str, Any]:
+        buckets = service.get_interval_statistics(state, interval, start=start, end=end)
+        payload: dict[str, Any] = {
+            "state": state.upper(),
+            "interval": interval,
+            "buckets": [
+                {
+                    "start": bucket.start.isoformat(),
+                    "record_count": bucket.record_count,
+                    "mean_price": float(bucket.mean),
+                    "min_price": float(bucket.minimum),
+                    "max_price": float(bucket.maximum),
+                }
+                for bucket in buckets
+            ],
+        }
+        return _with_range(payload, start, end)
+
+    key = f"aggregate:{state.upper()}:{interval}" if start is None and end is None else None
+    return _cacheable(service, key, build, [state])
+
+
+def _distribution_payload(
+    stats: DistributionStatistics, start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "state": stats.state,
+        "record_count": stats.record_count,
+        "mean_price": float(stats.mean),
+        "std_price": float(stats.std),
+        "min_price": float(stats.minimum),
+        "max_price": float(stats.maximum),
+        "percentiles": {f"{p:g}": float(value) for p, value in stats.percentiles.items()},
+        "exact": stats.exact,
+    }
+    return _with_range(payload, start, end)
+
+
+@prices_bp.route("/prices/stats", methods=["GET"])
+def get_price_distribution() -> Response:
+    state = _state_arg()
+    start, end = _range_args()
+    percentiles = _percentiles_arg()
+
+    service = get_price_service()
+
+    def build() -> dict[str, Any]:
+        stats = service.get_distribution_statistics(state, percentiles, start=start, end=end)
+        return _distribution_payload(stats, start, end)
+
+    default_query = start is None and end is None and "percentiles" not in request.args
+    key = f"stats:{state.upper()}" if default_query else None
+    return _cacheable(service, key, build, [state])
+
+
+DEFAULT_SERIES_POINTS = 500
+MAX_SERIES_POINTS = 5000
+
+
+def _series_payload(
+    series: DownsampledSeries, start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "state": series.state,
+        "method": series.method,
+        "record_count": series.record_count,
+        "points": [
+            {"timestamp": point.timestamp.isoformat(), "price": float(point.price)}
+            for point in series.points
+        ],
+    }
+    return _with_range(payload, start, end)
+
+
+@prices_bp.route("/prices/series", methods=["GET"])
+def get_price_series() -> Response:
+    """A state's prices downsampled to at most ``points`` records for charting."""
+    state = _state_arg()
+    start, end = _range_args()
+    points = _bounded_int_arg("points", DEFAULT_SERIES_POINTS, MIN_POINTS, MAX_SERIES_POINTS)
+
+    method = request.args.get("method", "lttb").strip().lower()
+    if method not in DOWNSAMPLING_METHODS:
+        raise InvalidRequestError(
+            f"Invalid method: '{method}'",
+            f"Valid methods: {', '.join(DOWNSAMPLING_METHODS)}",
+        )
+
+    service = get_price_service()
+
+    def build() -> dict[str, Any]:
+        series = service.get_downsampled_series(state, points, start, end, method)
+        return _series_payload(series, start, end)
+
+    return _cacheable(service, None, build, [state])
+
+
+DEFAULT_ROLLING_WINDOW = 48
+MAX_ROLLING_WINDOW = 10_000
+
+
+def _rolling_payload(
+    series: RollingSeries, start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "state": series.state,
+        "window": series.window,
+        "stat": series.statistic,
+        "record_count": series.record_count,
+        "points": [
+            {"timestamp": point.timestamp.isoformat(), "value": float(point.price)}
+            for point in series.points
+        ],
+    }
+    return _with_range(payload, start, end)
+
+
+@prices_bp.route("/prices/rolling", methods=["GET"])
+def get_rolling_prices() -> Response:
+    """A rolling statistic over each ``window`` consecutive records of a state."""
+    state = _state_arg()
+    start, end = _range_args()
+    window = _bounded_int_arg("window", DEFAULT_ROLLING_WINDOW, 1, MAX_ROLLING_WINDOW)
+
+    statistic = request.args.get("stat", "mean").strip().lower()
+    if statistic not in ROLLING_STATISTICS:
+        raise InvalidRequestError(
+            f"Invalid stat: '{statistic}'",
+            f"Valid stats: {', '.join(ROLLING_STATISTICS)}",
+        )
+
+    service = get_price_service()
+
+    def build() -> dict[str, Any]:
+        series = service.get_rolling_statistics(state, window, statistic, start, end)
+        return _rolling_payload(series, start, end)
+
+    return _cacheable(service, None, build, [state])
+
+
+def _optional_price(price: Decimal | None) -> float | None:
+    return None if price is None else float(price)
+
+
+def _spread_payload(
+    stats: SpreadStatistics, start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "a": stats.a,
+        "b": stats.b,
+        "matched": stats.matched,
+        "missing": {"a": stats.missing_a, "b": stats.missing_b},
+        "mean_spread": float(stats.mean),
+        "min_spread": float(stats.minimum),
+        "max_spread": float(stats.maximum),
+        "correlation": None if stats.correlation is None else float(stats.correlation),
+        "intervals": [
             {
-                "state": stats.state,
-                "mean_price": float(stats.mean),
-                "record_count": stats.record_count,
+                "timestamp": interval.timestamp.isoformat(),
+                "a_price": _optional_price(interval.a),
+                "b_price": _optional_price(interval.b),
+                "spread": _optional_price(interval.spread),
             }
-        ), HTTPStatus.OK
+            for interval in stats.intervals
+        ],
+    }
+    return _with_range(payload, start, end)
+
+
+@prices_bp.route("/prices/spread", methods=["GET"])
+def get_price_spread() -> Response:
+    """Per-timestamp ``a - b`` price spreads with mean, extremes and correlation."""
+    a = _validate_state(request.args.get("a"), "a")
+    b = _validate_state(request.args.get("b"), "b")
+    if a.upper() == b.upper():
+        raise InvalidRequestError(
+            f"Cannot compare '{a}' with itself", "Provide two different states, e.g., ?a=VIC&b=SA"
+        )
+    start, end = _range_args()
+
+    service = get_price_service()
+
+    def build() -> dict[str, Any]:
+        stats = service.get_spread_statistics(a, b, start=start, end=end)
+        return _spread_payload(stats, start, end)
+
+    return _cacheable(service, None, build, [a, b])
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", csv_rows),
+    "ndjson": ("application/x-ndjson", ndjson_rows),
+}
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10_000
+
+
+def _bounded_int_arg(name: str, default: int, minimum: int, maximum: int) -> int:
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+
+    hint = f"Use a whole number from {minimum} to {maximum}"
+    try:
+        value = int(raw.strip())
+    except ValueError as e:
+        raise InvalidRequestError(f"Invalid {name}: '{raw}'", hint) from e
+    if not minimum <= value <= maximum:
+        raise InvalidRequestError(f"{name.capitalize()} out of range: '{raw}'", hint)
+    return value
+
+
+def _page_size_arg() -> int:
+    return _bounded_int_arg("limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+
+
+def _record_page_payload(
+    window: RecordWindow, start: datetime | None, end: datetime | None
+) -> dict[str, Any]:
+    records = [
+        {"timestamp": from_epoch(seconds).isoformat(), "price": float(from_fixed(units))}
+        for seconds, units in zip(window.timestamps, window.prices, strict=True)
+    ]
+    payload: dict[str, Any] = {
+        "state": window.state,
+        "records": records,
+        "next_cursor": None if window.next_cursor is None else window.next_cursor.isoformat(),
+    }
+    return _with_range(payload, start, end)
+
+
+@prices_bp.route("/prices/export", methods=["GET"])
+def export_prices() -> Response:
+    """Raw records for one state, streamed as CSV or NDJSON or paged as JSON.
+
+    ``format=json`` returns at most ``limit`` records and a ``next_cursor``
+    to pass back as ``cursor``; paging by timestamp stays correct when new
+    rows arrive between requests.
+    """
+    state = _state_arg()
+    start, end = _range_args()
+    export_format = request.args.get("format", "csv").strip().lower()
+    if export_format != "json" and export_format not in EXPORT_FORMATS:
+        raise InvalidRequestError(
+            f"Invalid format: '{export_format}'",
+            f"Valid formats: {', '.join([*EXPORT_FORMATS, 'json'])}",
+        )
+
+    service = get_price_service()
+
+    if export_format == "json":
+        after = _parse_timestamp("cursor", request.args.get("cursor"))
+        limit = _page_size_arg()
+
+        def build() -> dict[str, Any]:
+            window = service.get_record_window(state, start, end, after=after, limit=limit)
+            return _record_page_payload(window, start, end)
+
+        return _cacheable(service, None, build, [state])
+
+    version = service.dataset_version
+    service.resolve_state(state)
+    compress = request.accept_encodings["gzip"] > 0
+    # The gzip and identity bodies are different representations, so each
+    # gets its own strong validator.
+    etag = f"{version}-gzip" if compress else version
+
+    response = not_modified(etag, service.last_modified)
+    if response is not None:
+        response.vary.add("Accept-Encoding")
+        return response
+
+    mimetype, encode = EXPORT_FORMATS[export_format]
+    stream = service.stream_records(state, start, end, CHUNK_ROWS)
+    rows = encode(stream)
+    chunks: Iterable[bytes] | Iterable[str] = gzipped(rows) if compress else rows
 
-    except StateNotFoundError as e:
-        logger.info(f"State not found: {state}")
-        return jsonify({"error": str(e)}), HTTPStatus.NOT_FOUND
+    response = cached_stream(chunks, mimetype, etag, service.last_modified)
+    if service.dataset_version != version:
+        # Reloaded mid-request: the rows may belong to either version.
+        del response.headers["ETag"]
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{stream.state}.{export_format}"'
+    )
+    return response
 
 
 @prices_bp.route("/states", methods=["GET"])
-def list_states() -> tuple[Any, int]:
+def list_states() -> Response:
     service = get_price_service()
-    states = service.get_available_states()
 
-    return jsonify({"states": states}), HTTPStatus.OK
+    return _cacheable(service, "states", partial(_states_payload, service))
 
 
 @prices_bp.route("/health", methods=["GET"])
 def health_check() -> tuple[Any, int]:
     service = get_price_service()
     return jsonify(
-        {"status": "healthy", "record_count": service._data_loader.record_count}
+        {
+            "status": "healthy",
+            "record_count": service.record_count,
+            "dataset_version": service.dataset_version,
+        }
     ), HTTPStatus.OK
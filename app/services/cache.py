@@ -0,0 +1,198 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+# Items measured when estimating the size of a large list or tuple.
+_SIZE_SAMPLE = 8
+
+
+class CacheStats:
+    """Hit, miss and eviction counts for one cache, safe to bump from any thread."""
+
+    __slots__ = ("hits", "misses", "evictions", "_lock")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def evict(self, count: int = 1) -> None:
+        with self._lock:
+            self.evictions += count
+
+
+def approximate_size(value: Any) -> int:
+    """Rough deep size in bytes; large sequences are extrapolated from a sample."""
+    size = sys.getsizeof(value)
+    if isinstance(value, str | bytes):
+        return size
+    if isinstance(value, dict):
+        return size + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    if isinstance(value, list | tuple) and value:
+        sample = value[:_SIZE_SAMPLE]
+        return size + sum(map(approximate_size, sample)) * len(value) // len(sample)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires")
+
+    def __init__(self, value: Any, size: int, expires: float | None):
+        self.value = value
+        self.size = size
+        self.expires = expires
+
+
+class _Flight:
+    """A computation in progress that other threads wait on instead of repeating."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class QueryCache:
+    """Thread-safe LRU cache bounded by entry count and estimated bytes.
+
+    ``get_or_compute`` runs ``compute`` once per missing key: threads that
+    ask for the same key meanwhile wait for that result (or exception)
+    instead of computing it again. Exceptions are never cached. Entries
+    older than ``ttl`` seconds are treated as missing. The lock is only held
+    to look up, store or evict entries, never while computing, so a slow
+    miss does not delay hits on other keys.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._sizeof = sizeof
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry):
+                    self._entries.move_to_end(key)
+                    self.stats.hit()
+                    return entry.value
+                self._remove(key)
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.stats.hit()
+            return flight.value
+
+        self.stats.miss()
+        try:
+            value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def discard(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``; returns how many."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def resize(self, max_entries: int) -> None:
+        """Change the entry limit, evicting the oldest entries if it shrank."""
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        self.stats.evict(count)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, evicted=False)
+            self._entries[key] = _Entry(value, size, expires)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable, evicted: bool = True) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if evicted:
+            self.stats.evict()
+
+    def _expired(self, entry: _Entry) -> bool:
+        return entry.expires is not None and entry.expires <= self._clock()
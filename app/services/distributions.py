@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from math import ceil
+from typing import NamedTuple
+
+from app.data.data_loader import PriceSeries
+from app.services.sketch import KllSketch
+
+# Windows up to this many records are sorted for exact percentiles; wider
+# ones merge per-block sketches and only sort the partial blocks at the edges.
+EXACT_RANGE_LIMIT = 1 << 16
+
+BLOCK_SIZE = 4096
+
+
+class PriceDistribution(NamedTuple):
+    record_count: int
+    square_total: int
+    minimum: int
+    maximum: int
+    percentiles: list[int]
+    exact: bool
+
+
+class DistributionPart(NamedTuple):
+    """Figures for one piece of a range, merged with the other pieces by ``merge_parts``.
+
+    ``sketch`` may be None when no percentiles are needed.
+    """
+
+    record_count: int
+    square_total: int
+    minimum: int
+    maximum: int
+    sketch: KllSketch | None
+
+
+def percentile_rank(count: int, percentile: float) -> int:
+    """1-based nearest rank of ``percentile`` among ``count`` sorted values."""
+    return max(ceil(percentile * count / 100), 1)
+
+
+def nearest_rank(sorted_prices: array[int] | list[int], percentile: float) -> int:
+    """The smallest value with at least ``percentile`` percent of values at or below it."""
+    return sorted_prices[percentile_rank(len(sorted_prices), percentile) - 1]
+
+
+class StateDistribution:
+    """Order statistics for one state's price series.
+
+    Holds the whole history sorted, so full-history percentiles are index
+    lookups, plus a KLL sketch and a sum of squares for every block of
+    ``BLOCK_SIZE`` records (in timestamp order) to answer wide time ranges
+    without sorting them.
+    """
+
+    __slots__ = ("sorted_prices", "sketches", "square_prefix", "_prices")
+
+    def __init__(self, series: PriceSeries):
+        prices = series.prices
+        self._prices = prices
+        self.sorted_prices = array("q", sorted(prices))
+        self.sketches: list[KllSketch] = []
+        self.square_prefix = [0]
+
+        for lo in range(0, len(prices), BLOCK_SIZE):
+            block = prices[lo : lo + BLOCK_SIZE]
+            sketch = KllSketch()
+            sketch.update(block)
+            self.sketches.append(sketch)
+            self.square_prefix.append(self.square_prefix[-1] + sum(p * p for p in block))
+
+    def describe(self, lo: int, hi: int, percentiles: list[float]) -> PriceDistribution:
+        """Summarise records ``lo`` to ``hi`` of the series; the range must be non-empty."""
+        count = hi - lo
+        if count == len(self._prices):
+            return _from_sorted(self.sorted_prices, self.square_prefix[-1], percentiles)
+
+        if count <= EXACT_RANGE_LIMIT:
+            return exact_distribution(self._prices[lo:hi], percentiles)
+
+        return merge_parts([self.part(lo, hi)], percentiles)
+
+    def part(self, lo: int, hi: int) -> DistributionPart:
+        """Sketch records ``lo`` to ``hi`` from the block sketches and the partial blocks at the edges."""
+        first = -(-lo // BLOCK_SIZE)
+        last = max(hi // BLOCK_SIZE, first)
+        if first == last:
+            edges = list(self._prices[lo:hi])
+        else:
+            edges = [*self._prices[lo : first * BLOCK_SIZE], *self._prices[last * BLOCK_SIZE : hi]]
+
+        sketch = KllSketch()
+        for block in self.sketches[first:last]:
+            sketch.merge(block)
+        sketch.update(edges)
+        assert sketch.minimum is not None and sketch.maximum is not None
+
+        return DistributionPart(
+            record_count=hi - lo,
+            square_total=self.square_prefix[last]
+            - self.square_prefix[first]
+            + _square_total(edges),
+            minimum=sketch.minimum,
+            maximum=sketch.maximum,
+            sketch=sketch,
+        )
+
+
+def exact_distribution(prices: Sequence[int], percentiles: list[float]) -> PriceDistribution:
+    """Summarise ``prices`` exactly by sorting them."""
+    return _from_sorted(sorted(prices), _square_total(prices), percentiles)
+
+
+def merge_parts(parts: Sequence[DistributionPart], percentiles: list[float]) -> PriceDistribution:
+    """Summarise the union of ``parts``, estimating percentiles from their merged sketches."""
+    if len(parts) == 1 and parts[0].sketch is not None:
+        sketch = parts[0].sketch
+    else:
+        sketch = KllSketch()
+        for part in parts:
+            if part.sketch is not None:
+                sketch.merge(part.sketch)
+
+    return PriceDistribution(
+        record_count=sum(part.record_count for part in parts),
+        square_total=sum(part.square_total for part in parts),
+        minimum=min(part.minimum for part in parts),
+        maximum=max(part.maximum for part in parts),
+        percentiles=sketch.quantiles(p / 100 for p in percentiles) if percentiles else [],
+        exact=False,
+    )
+
+
+def _from_sorted(
+    sorted_prices: array[int] | list[int], square_total: int, percentiles: list[float]
+) -> PriceDistribution:
+    return PriceDistribution(
+        record_count=len(sorted_prices),
+        square_total=square_total,
+        minimum=sorted_prices[0],
+        maximum=sorted_prices[-1],
+        percentiles=[nearest_rank(sorted_prices, p) for p in percentiles],
+        exact=True,
+    )
+
+
+def _square_total(prices: Sequence[int]) -> int:
+    return sum(p * p for p in prices)
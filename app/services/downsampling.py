@@ -0,0 +1,118 @@
+"""Reduce a price history to a bounded number of chart points.
+
+Both methods split the records into buckets of equal record count and read
+them once, in timestamp order, holding at most two buckets at a time, so
+they work the same on in-memory columns and on streamed storage scans.
+
+``lttb`` (Largest-Triangle-Three-Buckets) keeps the first and last records
+and, from each bucket in between, the record forming the largest triangle
+with the previously kept record and the mean of the next bucket; it keeps
+the shape of the line. ``minmax`` keeps each bucket's lowest and highest
+price, so no spike is ever dropped.
+"""
+
+from collections.abc import Callable, Iterable, Sequence
+
+# Fewest points either method can reduce to.
+MIN_POINTS = 3
+
+Columns = tuple[list[int], list[int]]
+Chunks = Iterable[tuple[Sequence[int], Sequence[int]]]
+
+
+class _RecordReader:
+    """Takes records off a stream of ``(timestamps, prices)`` chunks in fixed-size runs."""
+
+    def __init__(self, chunks: Chunks):
+        self._chunks = iter(chunks)
+        self._timestamps: Sequence[int] = ()
+        self._prices: Sequence[int] = ()
+        self._offset = 0
+
+    def take(self, count: int) -> Columns:
+        timestamps: list[int] = []
+        prices: list[int] = []
+        while count > 0:
+            if self._offset == len(self._timestamps):
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    raise ValueError("Fewer records than expected")
+                self._timestamps, self._prices = chunk
+                self._offset = 0
+                continue
+
+            stop = min(self._offset + count, len(self._timestamps))
+            timestamps.extend(self._timestamps[self._offset : stop])
+            prices.extend(self._prices[self._offset : stop])
+            count -= stop - self._offset
+            self._offset = stop
+        return timestamps, prices
+
+
+def _bucket_sizes(count: int, buckets: int) -> list[int]:
+    return [(i + 1) * count // buckets - i * count // buckets for i in range(buckets)]
+
+
+def lttb(chunks: Chunks, count: int, points: int) -> Columns:
+    """Downsample ``count`` records to ``points`` with Largest-Triangle-Three-Buckets."""
+    reader = _RecordReader(chunks)
+    if count <= points:
+        return reader.take(count)
+
+    timestamps, prices = reader.take(1)
+    sizes = _bucket_sizes(count - 2, points - 2)
+    current = reader.take(sizes[0])
+
+    for i in range(len(sizes)):
+        following = reader.take(sizes[i + 1] if i + 1 < len(sizes) else 1)
+        best = _largest_triangle(current, following, timestamps[-1], prices[-1])
+        timestamps.append(current[0][best])
+        prices.append(current[1][best])
+        current = following
+
+    timestamps.append(current[0][0])
+    prices.append(current[1][0])
+    return timestamps, prices
+
+
+def _largest_triangle(bucket: Columns, following: Columns, anchor_t: int, anchor_p: int) -> int:
+    """Index in ``bucket`` of the record with the largest triangle area.
+
+    Areas are compared scaled by twice the size of ``following`` so they
+    stay exact integers.
+    """
+    size = len(following[0])
+    dt = anchor_t * size - sum(following[0])
+    dp = sum(following[1]) - anchor_p * size
+    timestamps, prices = bucket
+
+    def area(i: int) -> int:
+        return abs(dt * (prices[i] - anchor_p) - (anchor_t - timestamps[i]) * dp)
+
+    return max(range(len(timestamps)), key=area)
+
+
+def minmax(chunks: Chunks, count: int, points: int) -> Columns:
+    """Downsample ``count`` records to at most ``points`` by keeping each bucket's extremes."""
+    reader = _RecordReader(chunks)
+    if count <= points:
+        return reader.take(count)
+
+    timestamps: list[int] = []
+    prices: list[int] = []
+    for size in _bucket_sizes(count, points // 2):
+        bucket_timestamps, bucket_prices = reader.take(size)
+        lowest = min(range(size), key=bucket_prices.__getitem__)
+        highest = max(range(size), key=bucket_prices.__getitem__)
+        for i in sorted({lowest, highest}):
+            timestamps.append(bucket_timestamps[i])
+            prices.append(bucket_prices[i])
+    return timestamps, prices
+
+
+DOWNSAMPLERS: dict[str, Callable[[Chunks, int, int], Columns]] = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
+
+DOWNSAMPLING_METHODS = tuple(DOWNSAMPLERS)
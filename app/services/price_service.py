@@ -1,11 +1,30 @@
 import logging
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from datetime import datetime
 from decimal import ROUND_HALF_UP, Decimal
-from typing import NamedTuple
+from typing import Any, NamedTuple, TypeVar
 
-from app.data.data_loader import DataLoader, PriceRecord
+from app.data.data_loader import PRICE_SCALE, DataLoader, from_epoch, from_fixed, to_epoch
+from app.data.states import StateTable
+from app.profiling import span, tracing
+from app.services.cache import QueryCache
+from app.services.downsampling import DOWNSAMPLERS, DOWNSAMPLING_METHODS, MIN_POINTS
+from app.services.rolling import ROLLING_STATISTICS, rolling_max, rolling_min, rolling_sums
+from app.services.rollups import ROLLUP_INTERVALS
+from app.services.spreads import SpreadSummary, align, last_per_timestamp, summarize
+from app.services.storage import InMemoryBackend, StorageBackend
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Decimal places of reported correlation coefficients.
+_CORRELATION_PLACES = 4
+
+# Records read from storage per chunk when downsampling or rolling.
+_DOWNSAMPLE_CHUNK = 8192
+
 
 class PriceStatistics(NamedTuple):
     mean: Decimal
@@ -13,50 +32,649 @@ class PriceStatistics(NamedTuple):
     state: str
 
 
+class IntervalStatistics(NamedTuple):
+    start: datetime
+    record_count: int
+    mean: Decimal
+    minimum: Decimal
+    maximum: Decimal
+
+
+class DistributionStatistics(NamedTuple):
+    state: str
+    record_count: int
+    mean: Decimal
+    std: Decimal
+    minimum: Decimal
+    maximum: Decimal
+    percentiles: dict[float, Decimal]
+    exact: bool
+
+
+class SeriesPoint(NamedTuple):
+    timestamp: datetime
+    price: Decimal
+
+
+class DownsampledSeries(NamedTuple):
+    state: str
+    record_count: int
+    method: str
+    points: list[SeriesPoint]
+
+
+class RollingSeries(NamedTuple):
+    """One point per record that ends a full window of ``window`` records."""
+
+    state: str
+    record_count: int
+    window: int
+    statistic: str
+    points: list[SeriesPoint]
+
+
+class SpreadInterval(NamedTuple):
+    """One timestamp of a spread; prices missing for a state are None."""
+
+    timestamp: datetime
+    a: Decimal | None
+    b: Decimal | None
+    spread: Decimal | None
+
+
+class SpreadStatistics(NamedTuple):
+    a: str
+    b: str
+    matched: int
+    missing_a: int
+    missing_b: int
+    mean: Decimal
+    minimum: Decimal
+    maximum: Decimal
+    correlation: Decimal | None
+    intervals: list[SpreadInterval]
+
+
+class RecordWindow(NamedTuple):
+    """A page of a state's raw records, in timestamp order.
+
+    ``next_cursor`` is the timestamp to pass as ``after`` for the next page,
+    or None when the window holds the last matching record.
+    """
+
+    state: str
+    timestamps: Sequence[int]
+    prices: Sequence[int]
+    next_cursor: datetime | None = None
+
+
+class RecordStream(NamedTuple):
+    """A state's raw records as ``(timestamps, prices)`` chunks, in timestamp order."""
+
+    state: str
+    chunks: Iterator[tuple[Sequence[int], Sequence[int]]]
+
+
+class MeanPriceQuery(NamedTuple):
+    state: str
+    start: datetime | None = None
+    end: datetime | None = None
+
+
 class StateNotFoundError(Exception):
     pass
 
 
+class NoPricesInRangeError(Exception):
+    pass
+
+
+def no_prices_in_range(state: str) -> NoPricesInRangeError:
+    return NoPricesInRangeError(f"No prices for state '{state}' in the requested range")
+
+
+MeanPriceResult = PriceStatistics | StateNotFoundError | NoPricesInRangeError
+
+
+class _ServedStates(NamedTuple):
+    """The states a backend serves, with their lookup table and not-found hint."""
+
+    table: StateTable
+    names: list[str]
+    hint: str
+
+    @classmethod
+    def of(cls, backend: StorageBackend, configured: StateTable | None) -> "_ServedStates":
+        names = backend.get_available_states()
+        table = StateTable(names) if configured is None else configured.restricted_to(names)
+        return cls(table, names, f"Available states: {names}")
+
+
+class _QueryKey(NamedTuple):
+    """A normalised query; ``digest`` pins it to the content of the state's series."""
+
+    statistic: str
+    state: str
+    digest: bytes
+    start: int | None = None
+    end: int | None = None
+    params: tuple[Any, ...] = ()
+
+
+def _correlation(summary: SpreadSummary) -> Decimal | None:
+    """Pearson correlation of the shared prices; None when either state is constant."""
+    n = summary.matched
+    a_spread = n * summary.a_square_total - summary.a_total**2
+    b_spread = n * summary.b_square_total - summary.b_total**2
+    if a_spread == 0 or b_spread == 0:
+        return None
+
+    covariance = n * summary.product_total - summary.a_total * summary.b_total
+    correlation = Decimal(covariance) / (Decimal(a_spread) * Decimal(b_spread)).sqrt()
+    return correlation.quantize(Decimal(1).scaleb(-_CORRELATION_PLACES), rounding=ROUND_HALF_UP)
+
+
+def _epoch_or_none(timestamp: datetime | None) -> int | None:
+    return None if timestamp is None else to_epoch(timestamp)
+
+
 class PriceService:
-    def __init__(self, data_loader: DataLoader, decimal_places: int = 2):
-        self._data_loader = data_loader
+    """Price queries over a dataset that can be swapped while serving.
+
+    The dataset is a ``storage.StorageBackend``; passing a ``DataLoader``
+    serves it from memory. Queries read the backend reference once and
+    never take a lock; ``reload`` swaps in a refreshed backend with a single
+    assignment, so every query sees either the old or the new data.
+
+    Results are cached in a bounded LRU keyed by the normalised query and
+    the content digest of the state's series, so entries for states that a
+    reload left untouched stay valid and entries for changed states can no
+    longer be reached. Concurrent misses for the same query are computed once.
+
+    Every public method may be called from any number of threads. Series,
+    backends and cached results are never modified once published; a
+    refresh builds new ones and shares what it left unchanged. The rest of
+    the shared state (this cache, the backends' index caches, the partition
+    store and the SQLite connection pool) is guarded by locks held only for
+    bookkeeping, never while a query is computed, so a slow query does not
+    delay cached ones.
+    """
+
+    def __init__(
+        self,
+        data_loader: DataLoader | None = None,
+        decimal_places: int = 2,
+        cache_max_entries: int = 4096,
+        cache_max_bytes: int | None = 64 * 1024 * 1024,
+        cache_ttl: float | None = None,
+        backend: StorageBackend | None = None,
+        states: StateTable | None = None,
+    ):
+        if backend is None:
+            if data_loader is None:
+                raise ValueError("A data loader or storage backend is required")
+            backend = InMemoryBackend(data_loader)
+        self._backend = backend
+        # Aliases accepted for the served states, e.g. from ``StateTable.from_config``.
+        self._configured_states = states
+        self._states = _ServedStates.of(backend, states)
         self._decimal_places = decimal_places
-        self._stats_cache: dict[str, PriceStatistics] = {}
+        self._quantum = Decimal("0." + "0" * decimal_places)
+        self._reload_lock = threading.Lock()
+        self._results = QueryCache(cache_max_entries, max_bytes=cache_max_bytes, ttl=cache_ttl)
+        self.cache_stats = {"results": self._results.stats, **backend.cache_stats}
+
+    def get_mean_price(
+        self, state: str, start: datetime | None = None, end: datetime | None = None
+    ) -> PriceStatistics:
+        return self._get_mean_price(self._backend, state, start, end)
+
+    def get_mean_prices(self, queries: list[MeanPriceQuery]) -> list[MeanPriceResult]:
+        """Answer several mean-price queries against one consistent dataset.
+
+        Each item is either the statistics for that query or the error it
+        raised, in query order.
+        """
+        backend = self._backend
+        results: list[MeanPriceResult] = []
+
+        for query in queries:
+            try:
+                results.append(self._get_mean_price(backend, *query))
+            except (StateNotFoundError, NoPricesInRangeError) as e:
+                results.append(e)
+
+        return results
+
+    def _get_mean_price(
+        self, backend: StorageBackend, state: str, start: datetime | None, end: datetime | None
+    ) -> PriceStatistics:
+        normalised_state = self.resolve_state(state)
+        key = self._key(backend, "mean", normalised_state, state, start, end)
+
+        def compute() -> PriceStatistics:
+            count, total = backend.range_total(normalised_state, key.start, key.end)
+            if count == 0:
+                raise no_prices_in_range(normalised_state)
+            return PriceStatistics(
+                mean=self._round_mean(total, count), record_count=count, state=normalised_state
+            )
+
+        return self._cached(key, compute)
+
+    def get_interval_statistics(
+        self,
+        state: str,
+        interval: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[IntervalStatistics]:
+        """Return per-``interval`` statistics for buckets starting in ``[start, end)``.
+
+        ``interval`` is one of ``rollups.ROLLUP_INTERVALS``. In memory,
+        hourly buckets are built once per state on first use and merged into
+        daily and weekly ones; later calls only slice the stored columns.
+        """
+        if interval not in ROLLUP_INTERVALS:
+            raise ValueError(f"Unsupported interval '{interval}'")
+
+        backend = self._backend
+        normalised_state = self.resolve_state(state)
+        key = self._key(backend, "aggregate", normalised_state, state, start, end, interval)
+
+        def compute() -> list[IntervalStatistics]:
+            buckets = backend.interval_buckets(normalised_state, interval, key.start, key.end)
+
+            return [
+                IntervalStatistics(
+                    start=from_epoch(buckets.starts[i]),
+                    record_count=buckets.counts[i],
+                    mean=self._round_mean(buckets.totals[i], buckets.counts[i]),
+                    minimum=from_fixed(buckets.minimums[i]),
+                    maximum=from_fixed(buckets.maximums[i]),
+                )
+                for i in range(len(buckets))
+            ]
+
+        return self._cached(key, compute)
+
+    def get_distribution_statistics(
+        self,
+        state: str,
+        percentiles: list[float],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> DistributionStatistics:
+        """Return mean, population standard deviation, extremes and percentiles.
+
+        Percentiles use the nearest-rank definition, so each one is a price
+        that occurs in the data. They are exact over the whole history and
+        over ranges of up to ``distributions.EXACT_RANGE_LIMIT`` records;
+        wider in-memory ranges, and any wider range over shards, are
+        estimated from quantile sketches and ``exact`` is False. The other
+        figures are always exact.
+        """
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+
+        backend = self._backend
+        normalised_state = self.resolve_state(state)
+        key = self._key(backend, "stats", normalised_state, state, start, end, tuple(percentiles))
+
+        def compute() -> DistributionStatistics:
+            described = backend.describe(normalised_state, key.start, key.end, percentiles)
+            if described is None:
+                raise no_prices_in_range(normalised_state)
+
+            total, summary = described
+            count = summary.record_count
+
+            return DistributionStatistics(
+                state=normalised_state,
+                record_count=count,
+                mean=self._round_mean(total, count),
+                std=self._round_std(total, summary.square_total, count),
+                minimum=from_fixed(summary.minimum),
+                maximum=from_fixed(summary.maximum),
+                percentiles=dict(
+                    zip(percentiles, map(from_fixed, summary.percentiles), strict=True)
+                ),
+                exact=summary.exact,
+            )
+
+        return self._cached(key, compute)
+
+    def get_downsampled_series(
+        self,
+        state: str,
+        points: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        method: str = "lttb",
+    ) -> DownsampledSeries:
+        """Return at most ``points`` records that trace the prices in ``[start, end)``.
+
+        ``method`` is one of ``downsampling.DOWNSAMPLING_METHODS``; ranges with
+        no more than ``points`` records are returned whole. The records are
+        read in one pass, so the work is linear in the size of the range.
+        """
+        if method not in DOWNSAMPLING_METHODS:
+            raise ValueError(f"Unsupported downsampling method '{method}'")
+        if points < MIN_POINTS:
+            raise ValueError(f"At least {MIN_POINTS} points are required")
+
+        backend = self._backend
+        normalised_state = self.resolve_state(state)
+        key = self._key(backend, "series", normalised_state, state, start, end, points, method)
+
+        def compute() -> DownsampledSeries:
+            count, _ = backend.range_total(normalised_state, key.start, key.end)
+            if count == 0:
+                raise no_prices_in_range(normalised_state)
+
+            chunks = backend.iter_chunks(normalised_state, key.start, key.end, _DOWNSAMPLE_CHUNK)
+            timestamps, prices = DOWNSAMPLERS[method](chunks, count, points)
+            return DownsampledSeries(
+                state=normalised_state,
+                record_count=count,
+                method=method,
+                points=[
+                    SeriesPoint(from_epoch(seconds), from_fixed(units))
+                    for seconds, units in zip(timestamps, prices, strict=True)
+                ],
+            )
+
+        return self._cached(key, compute)
 
-    def get_mean_price(self, state: str) -> PriceStatistics:
-        normalised_state = state.upper().strip()
+    def get_rolling_statistics(
+        self,
+        state: str,
+        window: int,
+        statistic: str = "mean",
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> RollingSeries:
+        """Return ``statistic`` over each run of ``window`` consecutive records in ``[start, end)``.
 
-        if normalised_state in self._stats_cache:
-            logger.debug(f"Cache hit for state: {normalised_state}")
-            return self._stats_cache[normalised_state]
+        ``statistic`` is one of ``rolling.ROLLING_STATISTICS``; ``std`` is the
+        population standard deviation. Windows never reach outside the range,
+        so a range with fewer than ``window`` records has no points.
+        """
+        if statistic not in ROLLING_STATISTICS:
+            raise ValueError(f"Unsupported rolling statistic '{statistic}'")
+        if window < 1:
+            raise ValueError("Window must hold at least one record")
 
-        records = self._data_loader.get_prices_for_state(normalised_state)
+        backend = self._backend
+        normalised_state = self.resolve_state(state)
+        key = self._key(backend, "rolling", normalised_state, state, start, end, window, statistic)
 
-        if records is None:
-            available = self._data_loader.get_available_states()
-            raise StateNotFoundError(f"State '{state}' not found. Available states: {available}")
+        def compute() -> RollingSeries:
+            count, _ = backend.range_total(normalised_state, key.start, key.end)
+            if count == 0:
+                raise no_prices_in_range(normalised_state)
 
-        stats = self._calculate_statistics(records, normalised_state)
+            chunks = backend.iter_chunks(normalised_state, key.start, key.end, _DOWNSAMPLE_CHUNK)
+            if statistic == "mean":
+                points = [
+                    SeriesPoint(from_epoch(seconds), self._round_mean(total, window))
+                    for seconds, total, _ in rolling_sums(chunks, window)
+                ]
+            elif statistic == "std":
+                points = [
+                    SeriesPoint(from_epoch(seconds), self._round_std(total, squares, window))
+                    for seconds, total, squares in rolling_sums(chunks, window)
+                ]
+            else:
+                extremes = rolling_min if statistic == "min" else rolling_max
+                points = [
+                    SeriesPoint(from_epoch(seconds), from_fixed(units))
+                    for seconds, units in extremes(chunks, window)
+                ]
+            return RollingSeries(normalised_state, count, window, statistic, points)
 
-        self._stats_cache[normalised_state] = stats
-        logger.debug(f"Cached statistics for state: {normalised_state}")
+        return self._cached(key, compute)
 
-        return stats
+    def get_spread_statistics(
+        self,
+        a: str,
+        b: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> SpreadStatistics:
+        """Return ``a - b`` per timestamp in ``[start, end)`` with summary statistics.
 
-    def _calculate_statistics(self, records: list[PriceRecord], state: str) -> PriceStatistics:
-        total = sum((r.price for r in records), Decimal(0))
-        count = len(records)
+        Timestamps where only one state has a price are listed with None for
+        the other and counted as missing; the mean, extremes and Pearson
+        correlation cover the timestamps both states share. When a state has
+        several records at one timestamp, the last is used.
+        """
+        backend = self._backend
+        a_state, b_state = self.resolve_state(a), self.resolve_state(b)
+        b_digest = self._require_state(backend, b_state, b)
+        # Keyed by the first state; entries that a change to the second state
+        # leaves behind are unreachable and age out of the LRU.
+        key = self._key(backend, "spread", a_state, a, start, end, b_state, b_digest)
 
-        mean = total / count
+        def compute() -> SpreadStatistics:
+            a_page = backend.records(a_state, key.start, key.end)
+            b_page = backend.records(b_state, key.start, key.end)
+            aligned = align(
+                *last_per_timestamp(a_page.timestamps, a_page.prices),
+                *last_per_timestamp(b_page.timestamps, b_page.prices),
+            )
+            summary = summarize(aligned)
+            if summary.minimum is None or summary.maximum is None:
+                raise NoPricesInRangeError(
+                    f"No prices at shared timestamps for '{a_state}' and '{b_state}' "
+                    "in the requested range"
+                )
 
-        quantize_str = "0." + "0" * self._decimal_places
-        rounded_mean = mean.quantize(Decimal(quantize_str), rounding=ROUND_HALF_UP)
+            return SpreadStatistics(
+                a=a_state,
+                b=b_state,
+                matched=summary.matched,
+                missing_a=summary.missing_a,
+                missing_b=summary.missing_b,
+                mean=self._round_mean(summary.spread_total, summary.matched),
+                minimum=from_fixed(summary.minimum),
+                maximum=from_fixed(summary.maximum),
+                correlation=_correlation(summary),
+                intervals=[
+                    SpreadInterval(
+                        from_epoch(seconds),
+                        None if x is None else from_fixed(x),
+                        None if y is None else from_fixed(y),
+                        None if x is None or y is None else from_fixed(x - y),
+                    )
+                    for seconds, x, y in zip(*aligned, strict=True)
+                ],
+            )
 
-        return PriceStatistics(mean=rounded_mean, record_count=count, state=state)
+        return self._cached(key, compute)
+
+    def get_record_window(
+        self,
+        state: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after: datetime | None = None,
+        limit: int | None = None,
+    ) -> RecordWindow:
+        """Return the records in ``[start, end)`` later than ``after``, at most ``limit`` of them.
+
+        A page never ends inside a run of equal timestamps, so it may hold
+        a few more than ``limit`` records; resuming strictly after the last
+        timestamp then never skips a record.
+        """
+        backend = self._backend
+        normalised_state = self.resolve_state(state)
+        self._require_state(backend, normalised_state, state)
+
+        page = backend.records(
+            normalised_state,
+            _epoch_or_none(start),
+            _epoch_or_none(end),
+            _epoch_or_none(after),
+            limit,
+        )
+        next_cursor = None if page.next_cursor is None else from_epoch(page.next_cursor)
+        return RecordWindow(normalised_state, page.timestamps, page.prices, next_cursor)
+
+    def stream_records(
+        self,
+        state: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        chunk_size: int = 4096,
+    ) -> RecordStream:
+        """Return the records in ``[start, end)`` as chunks of up to ``chunk_size`` records.
+
+        The chunks are read lazily from the dataset current at the call.
+        """
+        backend = self._backend
+        normalised_state = self.resolve_state(state)
+        self._require_state(backend, normalised_state, state)
+
+        chunks = backend.iter_chunks(
+            normalised_state, _epoch_or_none(start), _epoch_or_none(end), chunk_size
+        )
+        return RecordStream(normalised_state, chunks)
+
+    def _cached(self, key: _QueryKey, compute: Callable[[], T]) -> T:
+        """Look ``key`` up in the result cache, computing it on a miss, inside timing spans."""
+        if not tracing():
+            return self._results.get_or_compute(key, compute)  # type: ignore[no-any-return]
+
+        fields = {"statistic": key.statistic, "state": key.state}
+        computed = False
+
+        def timed_compute() -> T:
+            nonlocal computed
+            computed = True
+            with span("query.compute", **fields):
+                return compute()
+
+        with span("query", **fields) as query_fields:
+            result = self._results.get_or_compute(key, timed_compute)
+            query_fields["cached"] = not computed
+        return result  # type: ignore[no-any-return]
+
+    def _key(
+        self,
+        backend: StorageBackend,
+        statistic: str,
+        normalised_state: str,
+        state: str,
+        start: datetime | None,
+        end: datetime | None,
+        *params: Any,
+    ) -> _QueryKey:
+        return _QueryKey(
+            statistic,
+            normalised_state,
+            self._require_state(backend, normalised_state, state),
+            _epoch_or_none(start),
+            _epoch_or_none(end),
+            (*params, self._decimal_places),
+        )
+
+    def canonical_state(self, state: str) -> str | None:
+        """The code of the served state ``state`` spells in any accepted way, or None."""
+        return self._states.table.resolve(state)
+
+    def resolve_state(self, state: str) -> str:
+        """Like ``canonical_state``, but raises StateNotFoundError for unknown states."""
+        states = self._states
+        code = states.table.resolve(state)
+        if code is None:
+            raise StateNotFoundError(f"State '{state}' not found. {states.hint}")
+        return code
+
+    def _require_state(self, backend: StorageBackend, normalised_state: str, state: str) -> bytes:
+        """The state's content digest; raises StateNotFoundError for unknown states."""
+        digest = backend.state_digest(normalised_state)
+
+        if digest is None:
+            raise StateNotFoundError(f"State '{state}' not found. {self._states.hint}")
+
+        return digest
+
+    def _round_mean(self, total: int, count: int) -> Decimal:
+        mean = Decimal(total) / (count * PRICE_SCALE)
+        return mean.quantize(self._quantum, rounding=ROUND_HALF_UP)
+
+    def _round_std(self, total: int, square_total: int, count: int) -> Decimal:
+        # count**2 * variance in fixed-point units squared; exact until the square root.
+        scaled_variance = count * square_total - total * total
+        std = Decimal(scaled_variance).sqrt() / (count * PRICE_SCALE)
+        return std.quantize(self._quantum, rounding=ROUND_HALF_UP)
+
+    def warm_indexes(self) -> None:
+        """Build every state's rollup and distribution indexes now instead of on first use.
+
+        Does nothing for backends that load states lazily, where it would
+        read the whole dataset.
+        """
+        backend = self._backend
+        if backend.loads_lazily:
+            return
+        for state in backend.get_available_states():
+            backend.interval_buckets(state, ROLLUP_INTERVALS[0], None, None)
+            backend.describe(state, None, None, [])
 
     def get_available_states(self) -> list[str]:
-        return self._data_loader.get_available_states()
+        return self._states.names
+
+    @property
+    def record_count(self) -> int:
+        return self._backend.record_count
+
+    def get_record_counts(self) -> dict[str, int]:
+        return self._backend.get_record_counts()
+
+    @property
+    def loads_lazily(self) -> bool:
+        """True when state histories are read from storage on use rather than held in memory."""
+        return self._backend.loads_lazily
+
+    @property
+    def load_timings(self) -> dict[str, float]:
+        """Seconds per phase of the load or refresh that produced the current dataset."""
+        return self._backend.load_timings
+
+    @property
+    def dataset_version(self) -> str:
+        return self._backend.version
+
+    @property
+    def last_modified(self) -> datetime | None:
+        return self._backend.last_modified
+
+    def reload(self) -> frozenset[str]:
+        """Apply changes to the underlying dataset and return the affected states.
+
+        Cached results are kept for every state whose data did not change.
+        """
+        with self._reload_lock:
+            current = self._backend
+            backend, changed = current.refresh()
+            if backend is current:
+                return changed
+            if backend.get_available_states() != self._states.names:
+                self._states = _ServedStates.of(backend, self._configured_states)
+            self._backend = backend
+
+        # Results carry the digest they were computed from, so a changed
+        # state's results are never served again; free their byte budget now.
+        self._results.discard(lambda key: key.state in changed)
+
+        logger.info(
+            f"Dataset reloaded, version {backend.version}, changed states: {sorted(changed)}"
+        )
+        return changed
 
     def clear_cache(self) -> None:
-        self._stats_cache.clear()
+        self._results.clear()
+        self._backend.clear_cache()
         logger.debug("Statistics cache cleared")
@@ -0,0 +1,46 @@
+import logging
+import threading
+
+from app.data.data_loader import DataLoadError
+from app.services.price_service import PriceService
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetReloader:
+    """Background thread that polls the data file and reloads the service."""
+
+    def __init__(self, price_service: PriceService, interval: float):
+        self._price_service = price_service
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dataset-reloader", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+        logger.info(f"Watching data file for changes every {self._interval}s")
+
+    def restarted(self) -> "DatasetReloader":
+        """A new, started reloader for the same service, e.g. in a forked worker.
+
+        Threads do not survive ``fork()``, so a child must replace the
+        parent's reloader rather than rely on it.
+        """
+        reloader = DatasetReloader(self._price_service, self._interval)
+        reloader.start()
+        return reloader
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self._price_service.reload()
+            except DataLoadError as e:
+                logger.error(f"Dataset reload failed, keeping current data: {e}")
+            except Exception:
+                # Backends can also fail with sqlite3, partition or OS errors;
+                # the thread must outlive them or the worker serves stale data.
+                logger.exception("Dataset reload failed, keeping current data")
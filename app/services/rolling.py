@@ -0,0 +1,64 @@
+"""Sliding-window statistics over a timestamp-ordered price history.
+
+Windows are counted in records, not time, and every window ends at a
+record, from the ``window``-th record onwards. Each function reads the
+records once as ``(timestamps, prices)`` chunks, so the work is linear in
+the number of records whatever the window size: means and standard
+deviations keep running integer sums, and extremes keep a monotonic deque
+of the candidates that can still become a window's minimum or maximum.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from operator import ge, le
+
+ROLLING_STATISTICS = ("mean", "std", "min", "max")
+
+Chunks = Iterable[tuple[Sequence[int], Sequence[int]]]
+
+
+def _records(chunks: Chunks) -> Iterator[tuple[int, int]]:
+    for timestamps, prices in chunks:
+        yield from zip(timestamps, prices, strict=True)
+
+
+def rolling_sums(chunks: Chunks, window: int) -> Iterator[tuple[int, int, int]]:
+    """Yield ``(timestamp, total, square_total)`` of each window, in fixed-point units."""
+    prices: deque[int] = deque()
+    total = square_total = 0
+    for timestamp, price in _records(chunks):
+        prices.append(price)
+        total += price
+        square_total += price * price
+        if len(prices) > window:
+            leaving = prices.popleft()
+            total -= leaving
+            square_total -= leaving * leaving
+        if len(prices) == window:
+            yield timestamp, total, square_total
+
+
+def _rolling_extreme(
+    chunks: Chunks, window: int, dominates: Callable[[int, int], bool]
+) -> Iterator[tuple[int, int]]:
+    # (index, price) pairs with prices strictly improving from back to front;
+    # a candidate dominated by a later price can never be an extreme again.
+    candidates: deque[tuple[int, int]] = deque()
+    for index, (timestamp, price) in enumerate(_records(chunks)):
+        while candidates and dominates(price, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((index, price))
+        if candidates[0][0] <= index - window:
+            candidates.popleft()
+        if index + 1 >= window:
+            yield timestamp, candidates[0][1]
+
+
+def rolling_min(chunks: Chunks, window: int) -> Iterator[tuple[int, int]]:
+    """Yield ``(timestamp, minimum)`` of each window."""
+    return _rolling_extreme(chunks, window, le)
+
+
+def rolling_max(chunks: Chunks, window: int) -> Iterator[tuple[int, int]]:
+    """Yield ``(timestamp, maximum)`` of each window."""
+    return _rolling_extreme(chunks, window, ge)
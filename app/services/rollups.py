@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from app.data.data_loader import PriceSeries
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# The epoch fell on a Thursday; shifting by four days aligns weeks to Monday.
+_WEEK_OFFSET = 4 * DAY
+
+ROLLUP_INTERVALS = ("hour", "day", "week")
+
+# Bucket width and alignment in seconds for each interval.
+INTERVAL_ALIGNMENT = {"hour": (HOUR, 0), "day": (DAY, 0), "week": (WEEK, _WEEK_OFFSET)}
+
+
+class RollupBuckets:
+    """Per-interval count, sum, min and max in parallel int64 columns.
+
+    ``starts`` holds the epoch second each bucket begins at and is sorted,
+    so a time range maps to a slice of buckets by bisection. Buckets are
+    only present for intervals that contain at least one record.
+    """
+
+    __slots__ = ("starts", "counts", "totals", "minimums", "maximums")
+
+    def __init__(self) -> None:
+        self.starts: array[int] = array("q")
+        self.counts: array[int] = array("q")
+        self.totals: array[int] = array("q")
+        self.minimums: array[int] = array("q")
+        self.maximums: array[int] = array("q")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def window(self, start: int | None = None, end: int | None = None) -> tuple[int, int]:
+        lo = 0 if start is None else bisect_left(self.starts, start)
+        hi = len(self.starts) if end is None else bisect_left(self.starts, end)
+        return lo, max(lo, hi)
+
+    def between(self, start: int | None = None, end: int | None = None) -> RollupBuckets:
+        """A copy holding only the buckets that start in ``[start, end)``."""
+        lo, hi = self.window(start, end)
+        selected = RollupBuckets()
+        for name in self.__slots__:
+            setattr(selected, name, getattr(self, name)[lo:hi])
+        return selected
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[int, int, int, int, int]]) -> RollupBuckets:
+        """Build from ``(start, count, total, minimum, maximum)`` rows in start order."""
+        buckets = cls()
+        for row in rows:
+            buckets._append(*row)
+        return buckets
+
+    @classmethod
+    def merged(cls, parts: Iterable[RollupBuckets]) -> RollupBuckets:
+        """Combine buckets built from disjoint sets of records, merging equal starts."""
+        merged = cls()
+        rows = heapq.merge(
+            *(zip(p.starts, p.counts, p.totals, p.minimums, p.maximums, strict=True) for p in parts)
+        )
+        for start, count, total, minimum, maximum in rows:
+            if merged.starts and merged.starts[-1] == start:
+                merged.counts[-1] += count
+                merged.totals[-1] += total
+                merged.minimums[-1] = min(merged.minimums[-1], minimum)
+                merged.maximums[-1] = max(merged.maximums[-1], maximum)
+            else:
+                merged._append(start, count, total, minimum, maximum)
+        return merged
+
+    def _append(self, start: int, count: int, total: int, minimum: int, maximum: int) -> None:
+        self.starts.append(start)
+        self.counts.append(count)
+        self.totals.append(total)
+        self.minimums.append(minimum)
+        self.maximums.append(maximum)
+
+    @classmethod
+    def from_series(cls, series: PriceSeries, width: int) -> RollupBuckets:
+        """Group a timestamp-ordered series into buckets of ``width`` seconds.
+
+        Bucket edges are found by bisection and each bucket is reduced with
+        slice operations on the columns, so the Python-level loop runs once
+        per bucket rather than once per record.
+        """
+        assert series.prefix_sums is not None
+        buckets = cls()
+        timestamps, prices, prefix_sums = series.timestamps, series.prices, series.prefix_sums
+        n = len(timestamps)
+        lo = 0
+        while lo < n:
+            start = timestamps[lo] - timestamps[lo] % width
+            hi = bisect_left(timestamps, start + width, lo)
+            window = prices[lo:hi]
+            buckets._append(
+                start, hi - lo, prefix_sums[hi] - prefix_sums[lo], min(window), max(window)
+            )
+            lo = hi
+        return buckets
+
+    def coarsen(self, width: int, offset: int = 0) -> RollupBuckets:
+        """Merge these buckets into wider ones whose edges fall on ``offset`` mod ``width``."""
+        merged = RollupBuckets()
+        starts = self.starts
+        n = len(starts)
+        lo = 0
+        while lo < n:
+            start = starts[lo] - (starts[lo] - offset) % width
+            hi = bisect_left(starts, start + width, lo)
+            merged._append(
+                start,
+                sum(self.counts[lo:hi]),
+                sum(self.totals[lo:hi]),
+                min(self.minimums[lo:hi]),
+                max(self.maximums[lo:hi]),
+            )
+            lo = hi
+        return merged
+
+
+class StateRollups(NamedTuple):
+    hour: RollupBuckets
+    day: RollupBuckets
+    week: RollupBuckets
+
+    @classmethod
+    def from_series(cls, series: PriceSeries) -> StateRollups:
+        hourly = RollupBuckets.from_series(series, HOUR)
+        daily = hourly.coarsen(DAY)
+        weekly = daily.coarsen(WEEK, offset=_WEEK_OFFSET)
+        return cls(hour=hourly, day=daily, week=weekly)
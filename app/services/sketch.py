@@ -0,0 +1,125 @@
+"""A mergeable KLL quantile sketch (Karnin, Lang and Liberty, 2016).
+
+Values are kept in a stack of compactors. Level ``h`` holds items that
+each stand for ``2**h`` original values; when a level outgrows its
+capacity it is sorted and every other item is promoted to the level
+above. Capacities shrink geometrically towards the bottom of the stack,
+so a sketch of ``n`` values holds roughly ``3 * k`` items whatever ``n``
+is, and two sketches merge by concatenating their levels and compacting.
+
+Compaction alternates which half it keeps instead of tossing a coin, so
+the same inputs merged in the same order always give the same answer.
+That also means the published KLL error bounds, which assume random
+compaction, are not a guarantee here. The 1.7% rank tolerance used for
+the default ``k = 200`` is an observed figure: it is what
+``test_rank_error_within_bound`` in ``tests/test_distributions.py``
+asserts for 200,000 uniform values merged from 4,096-value blocks, where
+the worst of the 99 percentiles is off by about 0.3% of the rank.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from math import ceil
+
+DEFAULT_K = 200
+
+_CAPACITY_DECAY = 2 / 3
+_MIN_CAPACITY = 2
+
+
+class KllSketch:
+    __slots__ = ("k", "count", "minimum", "maximum", "_levels", "_offset")
+
+    def __init__(self, k: int = DEFAULT_K):
+        if k < _MIN_CAPACITY:
+            raise ValueError(f"k must be at least {_MIN_CAPACITY}")
+        self.k = k
+        self.count = 0
+        self.minimum: int | None = None
+        self.maximum: int | None = None
+        self._levels: list[list[int]] = [[]]
+        self._offset = 0
+
+    def __len__(self) -> int:
+        """Number of items retained, not the number of values seen."""
+        return sum(len(level) for level in self._levels)
+
+    def update(self, values: Iterable[int]) -> None:
+        items = list(values)
+        if not items:
+            return
+
+        self.count += len(items)
+        low, high = min(items), max(items)
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+        self._levels[0].extend(items)
+        self._compress()
+
+    def merge(self, other: KllSketch) -> None:
+        if other.count == 0:
+            return
+        if other.k != self.k:
+            raise ValueError("Cannot merge sketches with different k")
+
+        self.count += other.count
+        assert other.minimum is not None and other.maximum is not None
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for level, items in zip(self._levels, other._levels, strict=False):
+            level.extend(items)
+        self._compress()
+
+    def quantiles(self, ranks: Iterable[float]) -> list[int]:
+        """Estimate the nearest-rank value for each fraction in ``ranks`` (0 to 1).
+
+        Rank 0 and 1 return the exact minimum and maximum.
+        """
+        if self.count == 0:
+            raise ValueError("Sketch is empty")
+        assert self.minimum is not None and self.maximum is not None
+
+        weighted = sorted(
+            (item, 1 << height) for height, level in enumerate(self._levels) for item in level
+        )
+        cumulative = []
+        seen = 0
+        for _, weight in weighted:
+            seen += weight
+            cumulative.append(seen)
+
+        results = []
+        for rank in ranks:
+            if rank <= 0:
+                results.append(self.minimum)
+            elif rank >= 1:
+                results.append(self.maximum)
+            else:
+                target = ceil(rank * seen)
+                results.append(weighted[bisect_left(cumulative, target)][0])
+        return results
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self._levels) - height - 1
+        return max(_MIN_CAPACITY, ceil(self.k * _CAPACITY_DECAY**depth))
+
+    def _compress(self) -> None:
+        """Compact the lowest full level until the sketch fits its total capacity."""
+        while len(self) >= sum(self._capacity(h) for h in range(len(self._levels))):
+            height = next(
+                h for h, items in enumerate(self._levels) if len(items) >= self._capacity(h)
+            )
+            if height + 1 == len(self._levels):
+                self._levels.append([])
+
+            items = sorted(self._levels[height])
+            kept = [items.pop()] if len(items) % 2 else []
+            self._levels[height + 1].extend(items[self._offset :: 2])
+            self._levels[height] = kept
+            self._offset ^= 1
@@ -0,0 +1,114 @@
+"""Timestamp-aligned joins of two states' price histories.
+
+Both inputs are sorted by timestamp, so they are aligned with one
+merge-join pass instead of per-record lookups. When both states have
+records at exactly the same timestamps, which is the usual case, the join
+is a single column comparison.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from operator import lt
+from typing import NamedTuple
+
+
+class AlignedPrices(NamedTuple):
+    """The union of both states' timestamps, with None where a state has no price."""
+
+    timestamps: list[int]
+    a: list[int | None]
+    b: list[int | None]
+
+
+class SpreadSummary(NamedTuple):
+    """Integer sums over the timestamps both states share; spreads are ``a - b``."""
+
+    matched: int
+    missing_a: int
+    missing_b: int
+    spread_total: int
+    minimum: int | None
+    maximum: int | None
+    a_total: int
+    b_total: int
+    a_square_total: int
+    b_square_total: int
+    product_total: int
+
+
+def last_per_timestamp(
+    timestamps: Sequence[int], prices: Sequence[int]
+) -> tuple[Sequence[int], Sequence[int]]:
+    """Keep only the last record of each run of equal timestamps."""
+    if all(map(lt, timestamps[:-1], timestamps[1:])):
+        return timestamps, prices
+
+    last = len(timestamps) - 1
+    keep = [i for i in range(last) if timestamps[i] != timestamps[i + 1]] + [last]
+    return [timestamps[i] for i in keep], [prices[i] for i in keep]
+
+
+def align(
+    a_timestamps: Sequence[int],
+    a_prices: Sequence[int],
+    b_timestamps: Sequence[int],
+    b_prices: Sequence[int],
+) -> AlignedPrices:
+    """Merge-join two timestamp-sorted columns with unique timestamps."""
+    if a_timestamps == b_timestamps:
+        return AlignedPrices(list(a_timestamps), list(a_prices), list(b_prices))
+
+    timestamps: list[int] = []
+    a: list[int | None] = []
+    b: list[int | None] = []
+    i = j = 0
+    while i < len(a_timestamps) and j < len(b_timestamps):
+        a_time, b_time = a_timestamps[i], b_timestamps[j]
+        if a_time == b_time:
+            timestamps.append(a_time)
+            a.append(a_prices[i])
+            b.append(b_prices[j])
+            i += 1
+            j += 1
+        elif a_time < b_time:
+            timestamps.append(a_time)
+            a.append(a_prices[i])
+            b.append(None)
+            i += 1
+        else:
+            timestamps.append(b_time)
+            a.append(None)
+            b.append(b_prices[j])
+            j += 1
+
+    timestamps.extend(a_timestamps[i:])
+    a.extend(a_prices[i:])
+    b.extend([None] * (len(a_timestamps) - i))
+    timestamps.extend(b_timestamps[j:])
+    a.extend([None] * (len(b_timestamps) - j))
+    b.extend(b_prices[j:])
+    return AlignedPrices(timestamps, a, b)
+
+
+def summarize(aligned: AlignedPrices) -> SpreadSummary:
+    pairs = [
+        (x, y) for x, y in zip(aligned.a, aligned.b, strict=True) if x is not None and y is not None
+    ]
+    a_prices = [x for x, _ in pairs]
+    b_prices = [y for _, y in pairs]
+    spreads = [x - y for x, y in pairs]
+
+    return SpreadSummary(
+        matched=len(pairs),
+        missing_a=aligned.a.count(None),
+        missing_b=aligned.b.count(None),
+        spread_total=sum(spreads),
+        minimum=min(spreads, default=None),
+        maximum=max(spreads, default=None),
+        a_total=sum(a_prices),
+        b_total=sum(b_prices),
+        a_square_total=sum(x * x for x in a_prices),
+        b_square_total=sum(y * y for y in b_prices),
+        product_total=sum(x * y for x, y in pairs),
+    )
@@ -0,0 +1,828 @@
+"""Storage backends behind ``PriceService``.
+
+A backend answers the primitive queries the service builds its results
+from: which states exist, range totals, interval buckets, distribution
+summaries and raw record scans. ``InMemoryBackend`` serves them from a
+``DataLoader``'s columns and per-state indexes; ``SqliteBackend`` pushes
+them down into SQL so the dataset never has to fit in memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import logging
+import time
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice, pairwise
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, NamedTuple, Protocol, TypeVar
+
+from app.data.data_loader import (
+    DataLoader,
+    DataLoadError,
+    PriceSeries,
+    dataset_version,
+)
+from app.data.shards import is_sharded, shard_paths
+from app.data.sqlite_store import SqliteStore
+from app.data.states import StateTable
+from app.services.cache import CacheStats, QueryCache
+from app.services.distributions import (
+    EXACT_RANGE_LIMIT,
+    DistributionPart,
+    PriceDistribution,
+    StateDistribution,
+    exact_distribution,
+    merge_parts,
+    percentile_rank,
+)
+from app.services.rollups import INTERVAL_ALIGNMENT, RollupBuckets, StateRollups
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+W = TypeVar("W")
+
+BACKENDS = ("memory", "sqlite")
+
+# Per-state indexes (rollups, distributions) are large but there is one of each
+# per state, so they are bounded by count rather than size.
+_INDEX_CACHE_ENTRIES = 64
+
+# Records read per chunk when a page of sharded records is assembled.
+_RECORD_CHUNK = 8192
+
+
+class RecordPage(NamedTuple):
+    """Records in timestamp order; ``next_cursor`` is the ``after`` of the next page."""
+
+    timestamps: Sequence[int]
+    prices: Sequence[int]
+    next_cursor: int | None = None
+
+
+class StorageBackend(Protocol):
+    """The queries ``PriceService`` needs from a dataset.
+
+    States are passed already normalised and known to exist. Timestamps are
+    epoch seconds and prices fixed-point units; ranges are ``[start, end)``
+    with None for an open bound. ``refresh`` returns the backend itself and
+    no changed states when the data on disk is unchanged.
+    """
+
+    cache_stats: dict[str, CacheStats]
+
+    @property
+    def record_count(self) -> int: ...
+
+    @property
+    def version(self) -> str: ...
+
+    @property
+    def last_modified(self) -> datetime | None: ...
+
+    @property
+    def load_timings(self) -> dict[str, float]: ...
+
+    @property
+    def loads_lazily(self) -> bool: ...
+
+    def get_available_states(self) -> list[str]: ...
+
+    def get_record_counts(self) -> dict[str, int]: ...
+
+    def state_digest(self, state: str) -> bytes | None: ...
+
+    def range_total(self, state: str, start: int | None, end: int | None) -> tuple[int, int]: ...
+
+    def interval_buckets(
+        self, state: str, interval: str, start: int | None, end: int | None
+    ) -> RollupBuckets: ...
+
+    def describe(
+        self, state: str, start: int | None, end: int | None, percentiles: list[float]
+    ) -> tuple[int, PriceDistribution] | None: ...
+
+    def records(
+        self,
+        state: str,
+        start: int | None,
+        end: int | None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> RecordPage: ...
+
+    def iter_chunks(
+        self, state: str, start: int | None, end: int | None, size: int
+    ) -> Iterator[tuple[Sequence[int], Sequence[int]]]: ...
+
+    def refresh(self) -> tuple[StorageBackend, frozenset[str]]: ...
+
+    def clear_cache(self) -> None: ...
+
+
+class _IndexKey(NamedTuple):
+    kind: str
+    state: str
+    digest: bytes
+
+
+class _IndexCache(QueryCache):
+    """Per-state indexes (rollups, distributions), keyed by the series digest."""
+
+    def index(self, kind: str, series: PriceSeries, build: Callable[[PriceSeries], T]) -> T:
+        def compute() -> T:
+            index = build(series)
+            logger.debug(f"Built {kind} index for state: {series.state}")
+            return index
+
+        key = _IndexKey(kind, series.state, series.digest())
+        return self.get_or_compute(key, compute)  # type: ignore[no-any-return]
+
+
+class InMemoryBackend:
+    """Serves queries from a ``DataLoader``'s fixed-point columns.
+
+    Rollups and distributions are built per state on first use and kept in
+    a count-bounded cache keyed by the series digest, which the backends
+    produced by later refreshes share.
+    """
+
+    def __init__(self, loader: DataLoader, indexes: _IndexCache | None = None):
+        self.loader = loader
+        self._indexes = indexes if indexes is not None else _IndexCache(_INDEX_CACHE_ENTRIES)
+        self.cache_stats = {"indexes": self._indexes.stats}
+
+    @property
+    def record_count(self) -> int:
+        return self.loader.record_count
+
+    @property
+    def version(self) -> str:
+        return self.loader.version
+
+    @property
+    def last_modified(self) -> datetime | None:
+        return self.loader.last_modified
+
+    @property
+    def load_timings(self) -> dict[str, float]:
+        return self.loader.load_timings
+
+    @property
+    def loads_lazily(self) -> bool:
+        return self.loader.partitions is not None
+
+    def get_available_states(self) -> list[str]:
+        return self.loader.get_available_states()
+
+    def get_record_counts(self) -> dict[str, int]:
+        return self.loader.get_record_counts()
+
+    def state_digest(self, state: str) -> bytes | None:
+        return self.loader.get_state_digest(state)
+
+    def range_total(self, state: str, start: int | None, end: int | None) -> tuple[int, int]:
+        return _range_total(self.get_series(state), start, end)
+
+    def interval_buckets(
+        self, state: str, interval: str, start: int | None, end: int | None
+    ) -> RollupBuckets:
+        rollups = self._indexes.index("rollups", self.get_series(state), StateRollups.from_series)
+        buckets: RollupBuckets = getattr(rollups, interval)
+        return buckets.between(start, end)
+
+    def describe(
+        self, state: str, start: int | None, end: int | None, percentiles: list[float]
+    ) -> tuple[int, PriceDistribution] | None:
+        return _describe(self._indexes, self.get_series(state), start, end, percentiles)
+
+    def records(
+        self,
+        state: str,
+        start: int | None,
+        end: int | None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> RecordPage:
+        return _record_page(self.get_series(state), start, end, after, limit)
+
+    def iter_chunks(
+        self, state: str, start: int | None, end: int | None, size: int
+    ) -> Iterator[tuple[Sequence[int], Sequence[int]]]:
+        return _series_chunks(self.get_series(state), start, end, size)
+
+    def get_series(self, state: str) -> PriceSeries:
+        series = self.loader.get_prices_for_state(state)
+        if series is None:
+            raise KeyError(state)
+        return series
+
+    def refresh(self) -> tuple[InMemoryBackend, frozenset[str]]:
+        loader, changed = self.loader.refresh()
+        if loader is self.loader:
+            return self, changed
+        # The new backend shares this index cache. A changed state's old
+        # rollups and distributions would hold a slot until LRU eviction.
+        self._indexes.discard(lambda key: key.state in changed)
+        return InMemoryBackend(loader, self._indexes), changed
+
+    def clear_cache(self) -> None:
+        self._indexes.clear()
+
+
+def _range_total(series: PriceSeries, start: int | None, end: int | None) -> tuple[int, int]:
+    if start is None and end is None:
+        return len(series), series.price_total()
+    lo, hi = series.window(start, end)
+    return hi - lo, series.range_total(lo, hi)
+
+
+def _describe(
+    indexes: _IndexCache,
+    series: PriceSeries,
+    start: int | None,
+    end: int | None,
+    percentiles: list[float],
+) -> tuple[int, PriceDistribution] | None:
+    lo, hi = series.window(start, end)
+    if lo == hi:
+        return None
+    distribution = indexes.index("distribution", series, StateDistribution)
+    return series.range_total(lo, hi), distribution.describe(lo, hi, percentiles)
+
+
+def _record_page(
+    series: PriceSeries,
+    start: int | None,
+    end: int | None,
+    after: int | None,
+    limit: int | None,
+) -> RecordPage:
+    timestamps = series.timestamps
+
+    lo, hi = series.window(start, end)
+    if after is not None:
+        lo = max(lo, bisect_right(timestamps, after))
+        hi = max(lo, hi)
+
+    next_cursor = None
+    if limit is not None and hi - lo > limit:
+        stop = bisect_right(timestamps, timestamps[lo + limit - 1], lo + limit, hi)
+        if stop < hi:
+            next_cursor = timestamps[stop - 1]
+        hi = stop
+
+    return RecordPage(memoryview(timestamps)[lo:hi], memoryview(series.prices)[lo:hi], next_cursor)
+
+
+def _series_chunks(
+    series: PriceSeries, start: int | None, end: int | None, size: int
+) -> Iterator[tuple[Sequence[int], Sequence[int]]]:
+    return _window_chunks(series, *series.window(start, end), size)
+
+
+def _window_chunks(
+    series: PriceSeries, lo: int, hi: int, size: int
+) -> Iterator[tuple[Sequence[int], Sequence[int]]]:
+    timestamps = memoryview(series.timestamps)
+    prices = memoryview(series.prices)
+    for chunk_start in range(lo, hi, size):
+        chunk_end = min(chunk_start + size, hi)
+        yield timestamps[chunk_start:chunk_end], prices[chunk_start:chunk_end]
+
+
+class SqliteBackend:
+    """Serves queries from a database written by ``sqlite_store.import_csv``.
+
+    Totals, extremes and interval buckets are aggregated by SQLite and
+    percentiles read from one ordered scan, so memory use follows the size
+    of the result rather than of the dataset. Percentiles are always exact.
+    """
+
+    def __init__(self, store: SqliteStore, load_timings: dict[str, float] | None = None):
+        self.store = store
+        self.cache_stats: dict[str, CacheStats] = {}
+        self._load_timings = load_timings or {}
+        self._version = dataset_version(info.digest for info in store.states.values())
+
+    @classmethod
+    def open(cls, path: Path) -> SqliteBackend:
+        started = time.perf_counter()
+        store = SqliteStore(path)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Opened database {path} with {len(store.states)} states in {elapsed:.2f}s")
+        return cls(store, {"open": elapsed})
+
+    @property
+    def record_count(self) -> int:
+        return sum(info.record_count for info in self.store.states.values())
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    @property
+    def last_modified(self) -> datetime | None:
+        return self.store.last_modified
+
+    @property
+    def load_timings(self) -> dict[str, float]:
+        return self._load_timings
+
+    @property
+    def loads_lazily(self) -> bool:
+        return True
+
+    def get_available_states(self) -> list[str]:
+        return list(self.store.states)
+
+    def get_record_counts(self) -> dict[str, int]:
+        return {state: info.record_count for state, info in self.store.states.items()}
+
+    def state_digest(self, state: str) -> bytes | None:
+        info = self.store.states.get(state)
+        return None if info is None else info.digest
+
+    def range_total(self, state: str, start: int | None, end: int | None) -> tuple[int, int]:
+        return self.store.range_total(state, start, end)
+
+    def interval_buckets(
+        self, state: str, interval: str, start: int | None, end: int | None
+    ) -> RollupBuckets:
+        width, offset = INTERVAL_ALIGNMENT[interval]
+        return RollupBuckets.from_rows(self.store.buckets(state, width, offset, start, end))
+
+    def describe(
+        self, state: str, start: int | None, end: int | None, percentiles: list[float]
+    ) -> tuple[int, PriceDistribution] | None:
+        summary = self.store.summarize(state, start, end)
+        if summary.record_count == 0:
+            return None
+        assert summary.minimum is not None and summary.maximum is not None
+
+        ranks = [percentile_rank(summary.record_count, p) for p in percentiles]
+        values = self.store.order_statistics(state, start, end, ranks)
+        return summary.total, PriceDistribution(
+            record_count=summary.record_count,
+            square_total=summary.square_total,
+            minimum=summary.minimum,
+            maximum=summary.maximum,
+            percentiles=[values[rank] for rank in ranks],
+            exact=True,
+        )
+
+    def records(
+        self,
+        state: str,
+        start: int | None,
+        end: int | None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> RecordPage:
+        return RecordPage(*self.store.records(state, start, end, after, limit))
+
+    def iter_chunks(
+        self, state: str, start: int | None, end: int | None, size: int
+    ) -> Iterator[tuple[Sequence[int], Sequence[int]]]:
+        return self.store.iter_chunks(state, start, end, size)
+
+    def refresh(self) -> tuple[SqliteBackend, frozenset[str]]:
+        try:
+            fingerprint = self.store.current_fingerprint()
+        except OSError as e:
+            raise DataLoadError(f"Database not found: {self.store.path}") from e
+        if fingerprint == self.store.fingerprint:
+            return self, frozenset()
+
+        refreshed = SqliteBackend.open(self.store.path)
+        changed = frozenset(
+            state
+            for state in self.store.states.keys() | refreshed.store.states.keys()
+            if self.state_digest(state) != refreshed.state_digest(state)
+        )
+        self.store.close()
+        return refreshed, changed
+
+    def clear_cache(self) -> None:
+        pass
+
+
+class ShardSummary(NamedTuple):
+    """Figures for one state in one shard, precomputed when the shard is loaded."""
+
+    record_count: int
+    total: int
+    first: int
+    last: int
+    square_total: int
+    minimum: int
+    maximum: int
+
+
+class Shard(NamedTuple):
+    path: Path
+    loader: DataLoader
+    summaries: dict[str, ShardSummary]
+
+    @classmethod
+    def from_loader(cls, path: Path, loader: DataLoader) -> Shard:
+        summaries = {}
+        for state in loader.get_available_states():
+            series = loader.get_prices_for_state(state)
+            assert series is not None
+            prices = series.prices
+            summaries[state] = ShardSummary(
+                len(series),
+                series.price_total(),
+                series.timestamps[0],
+                series.timestamps[-1],
+                sum(price * price for price in prices),
+                min(prices),
+                max(prices),
+            )
+        return cls(path, loader, summaries)
+
+    def series(self, state: str) -> PriceSeries:
+        series = self.loader.get_prices_for_state(state)
+        assert series is not None
+        return series
+
+    def covers(self, state: str, start: int | None, end: int | None) -> bool:
+        """Whether every record of ``state`` in this shard lies in ``[start, end)``."""
+        summary = self.summaries[state]
+        return (start is None or summary.first >= start) and (end is None or summary.last < end)
+
+
+class _ShardWindow(NamedTuple):
+    """Records ``lo`` to ``hi`` of one shard's series for a state."""
+
+    shard: Shard
+    series: PriceSeries
+    lo: int
+    hi: int
+
+    @property
+    def whole(self) -> bool:
+        return self.lo == 0 and self.hi == len(self.series)
+
+
+class ShardedBackend:
+    """Serves queries from a set of shard files, each loaded by its own ``DataLoader``.
+
+    Range totals and interval buckets fan out to the shards that hold the
+    state and overlap the range, on a thread pool when ``shard_workers`` is
+    above 1. Shards entirely inside the range answer from their precomputed
+    totals; partial results are integers and merge exactly. Distributions
+    merge each shard's counts, sums of squares and extremes, and estimate
+    wide ranges' percentiles from the shards' merged KLL sketches. Raw
+    records are read from the same pruned shards in timestamp order, so no
+    query copies a state's whole history. A refresh loads only new or
+    changed shards.
+    """
+
+    def __init__(
+        self,
+        spec: Path,
+        shards: list[Shard],
+        indexes: _IndexCache | None = None,
+        executor: ThreadPoolExecutor | None = None,
+        load_timings: dict[str, float] | None = None,
+        memory_budget: int | None = None,
+        workers: int = 1,
+        states: StateTable | None = None,
+    ):
+        self.spec = spec
+        self.shards = shards
+        self._indexes = (
+            indexes if indexes is not None else _IndexCache(_INDEX_CACHE_ENTRIES * len(shards))
+        )
+        self._executor = executor
+        self._load_timings = load_timings or {}
+        self._memory_budget = memory_budget
+        self._workers = workers
+        self._states = states
+        self.cache_stats = {"indexes": self._indexes.stats}
+        self._digests = _state_digests(shards)
+        self._version = dataset_version(self._digests.values())
+
+    @classmethod
+    def load(
+        cls,
+        spec: Path,
+        memory_budget: int | None = None,
+        workers: int = 1,
+        shard_workers: int = 1,
+        states: StateTable | None = None,
+    ) -> ShardedBackend:
+        paths = shard_paths(spec)
+        if not paths:
+            raise DataLoadError(f"No shards found for {spec}")
+
+        loaders = [DataLoader(path, memory_budget, workers, states).load() for path in paths]
+        shards = [
+            Shard.from_loader(path, loader) for path, loader in zip(paths, loaders, strict=True)
+        ]
+        executor = (
+            ThreadPoolExecutor(max_workers=shard_workers, thread_name_prefix="shard")
+            if shard_workers > 1
+            else None
+        )
+        backend = cls(
+            spec, shards, None, executor, _summed_timings(loaders), memory_budget, workers, states
+        )
+        logger.info(f"Loaded {backend.record_count} records from {len(shards)} shards")
+        return backend
+
+    @property
+    def record_count(self) -> int:
+        return sum(shard.loader.record_count for shard in self.shards)
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    @property
+    def last_modified(self) -> datetime | None:
+        return max(
+            (m for shard in self.shards if (m := shard.loader.last_modified) is not None),
+            default=None,
+        )
+
+    @property
+    def load_timings(self) -> dict[str, float]:
+        return self._load_timings
+
+    @property
+    def loads_lazily(self) -> bool:
+        return False
+
+    def get_available_states(self) -> list[str]:
+        return list(self._digests)
+
+    def get_record_counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for shard in self.shards:
+            for state, summary in shard.summaries.items():
+                counts[state] = counts.get(state, 0) + summary.record_count
+        return dict(sorted(counts.items()))
+
+    def state_digest(self, state: str) -> bytes | None:
+        return self._digests.get(state)
+
+    def range_total(self, state: str, start: int | None, end: int | None) -> tuple[int, int]:
+        def shard_total(shard: Shard) -> tuple[int, int]:
+            if shard.covers(state, start, end):
+                summary = shard.summaries[state]
+                return summary.record_count, summary.total
+            return _range_total(shard.series(state), start, end)
+
+        parts = self._fan_out(shard_total, self._overlapping(state, start, end))
+        return sum(count for count, _ in parts), sum(total for _, total in parts)
+
+    def interval_buckets(
+        self, state: str, interval: str, start: int | None, end: int | None
+    ) -> RollupBuckets:
+        width, offset = INTERVAL_ALIGNMENT[interval]
+
+        def bucket_start(timestamp: int) -> int:
+            return timestamp - (timestamp - offset) % width
+
+        # A bucket may start before a shard's first record, so shards are
+        # pruned by the buckets their records fall in.
+        shards = [
+            shard
+            for shard in self._overlapping(state, None, None)
+            if (start is None or bucket_start(shard.summaries[state].last) >= start)
+            and (end is None or bucket_start(shard.summaries[state].first) < end)
+        ]
+
+        def shard_buckets(shard: Shard) -> RollupBuckets:
+            rollups = self._indexes.index("rollups", shard.series(state), StateRollups.from_series)
+            buckets: RollupBuckets = getattr(rollups, interval)
+            return buckets.between(start, end)
+
+        return RollupBuckets.merged(self._fan_out(shard_buckets, shards))
+
+    def describe(
+        self, state: str, start: int | None, end: int | None, percentiles: list[float]
+    ) -> tuple[int, PriceDistribution] | None:
+        windows = self._windows(state, start, end)
+        count = sum(window.hi - window.lo for window in windows)
+        if count == 0:
+            return None
+        total = sum(window.series.range_total(window.lo, window.hi) for window in windows)
+
+        if count <= EXACT_RANGE_LIMIT:
+            prices = array("q")
+            for window in windows:
+                prices.extend(memoryview(window.series.prices)[window.lo : window.hi])
+            return total, exact_distribution(prices, percentiles)
+
+        def shard_part(window: _ShardWindow) -> DistributionPart:
+            if window.whole and not percentiles:
+                summary = window.shard.summaries[state]
+                return DistributionPart(
+                    summary.record_count,
+                    summary.square_total,
+                    summary.minimum,
+                    summary.maximum,
+                    None,
+                )
+            distribution = self._indexes.index("distribution", window.series, StateDistribution)
+            return distribution.part(window.lo, window.hi)
+
+        return total, merge_parts(self._fan_out(shard_part, windows), percentiles)
+
+    def records(
+        self,
+        state: str,
+        start: int | None,
+        end: int | None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> RecordPage:
+        if after is not None:
+            start = after + 1 if start is None else max(start, after + 1)
+
+        timestamps = array("q")
+        prices = array("q")
+        for chunk_timestamps, chunk_prices in self.iter_chunks(state, start, end, _RECORD_CHUNK):
+            timestamps.extend(chunk_timestamps)
+            prices.extend(chunk_prices)
+            # Read on past the limit until the run of equal timestamps it ends in is complete.
+            if (
+                limit is not None
+                and len(timestamps) > limit
+                and (timestamps[-1] > timestamps[limit - 1])
+            ):
+                break
+
+        next_cursor = None
+        if limit is not None and len(timestamps) > limit:
+            stop = bisect_right(timestamps, timestamps[limit - 1], limit)
+            if stop < len(timestamps):
+                next_cursor = timestamps[stop - 1]
+                del timestamps[stop:]
+                del prices[stop:]
+        return RecordPage(timestamps, prices, next_cursor)
+
+    def iter_chunks(
+        self, state: str, start: int | None, end: int | None, size: int
+    ) -> Iterator[tuple[Sequence[int], Sequence[int]]]:
+        windows = self._windows(state, start, end)
+        if all(
+            a.series.timestamps[a.hi - 1] <= b.series.timestamps[b.lo] for a, b in pairwise(windows)
+        ):
+            for window in windows:
+                yield from _window_chunks(window.series, window.lo, window.hi, size)
+            return
+
+        # Overlapping shards: records with equal timestamps keep shard order.
+        rows = heapq.merge(
+            *(
+                zip(
+                    memoryview(w.series.timestamps)[w.lo : w.hi],
+                    memoryview(w.series.prices)[w.lo : w.hi],
+                    strict=True,
+                )
+                for w in windows
+            ),
+            key=itemgetter(0),
+        )
+        while batch := list(islice(rows, size)):
+            yield array("q", map(itemgetter(0), batch)), array("q", map(itemgetter(1), batch))
+
+    def refresh(self) -> tuple[ShardedBackend, frozenset[str]]:
+        paths = shard_paths(self.spec)
+        if not paths:
+            raise DataLoadError(f"No shards found for {self.spec}")
+
+        current = {shard.path: shard for shard in self.shards}
+        shards: list[Shard] = []
+        reloaded: list[DataLoader] = []
+        for path in paths:
+            shard = current.get(path)
+            if shard is None:
+                loader = DataLoader(path, self._memory_budget, self._workers, self._states).load()
+            else:
+                loader, _ = shard.loader.refresh()
+                if loader is shard.loader:
+                    shards.append(shard)
+                    continue
+            reloaded.append(loader)
+            shards.append(Shard.from_loader(path, loader))
+
+        if not reloaded and len(shards) == len(self.shards):
+            return self, frozenset()
+
+        refreshed = ShardedBackend(
+            self.spec,
+            shards,
+            self._indexes,
+            self._executor,
+            _summed_timings(reloaded),
+            self._memory_budget,
+            self._workers,
+            self._states,
+        )
+        changed = frozenset(
+            state
+            for state in self._digests.keys() | refreshed._digests.keys()
+            if self._digests.get(state) != refreshed._digests.get(state)
+        )
+        live = refreshed._live_digests()
+        self._indexes.discard(lambda key: key.digest not in live)
+        self._indexes.resize(_INDEX_CACHE_ENTRIES * len(shards))
+        logger.info(f"Shards refreshed: {len(reloaded)} loaded, {len(changed)} states changed")
+        return refreshed, changed
+
+    def clear_cache(self) -> None:
+        self._indexes.clear()
+
+    def _overlapping(self, state: str, start: int | None, end: int | None) -> list[Shard]:
+        return [
+            shard
+            for shard in self.shards
+            if (summary := shard.summaries.get(state)) is not None
+            and (start is None or summary.last >= start)
+            and (end is None or summary.first < end)
+        ]
+
+    def _fan_out(self, task: Callable[[W], T], items: list[W]) -> list[T]:
+        """Run ``task`` on each shard (or shard window), on the pool if there is one."""
+        if self._executor is None or len(items) < 2:
+            return [task(item) for item in items]
+        return list(self._executor.map(task, items))
+
+    def _windows(self, state: str, start: int | None, end: int | None) -> list[_ShardWindow]:
+        """The non-empty part of ``[start, end)`` in each shard, by first timestamp."""
+        windows = []
+        for shard in self._overlapping(state, start, end):
+            series = shard.series(state)
+            if shard.covers(state, start, end):
+                lo, hi = 0, len(series)
+            else:
+                lo, hi = series.window(start, end)
+            if lo < hi:
+                windows.append(_ShardWindow(shard, series, lo, hi))
+        windows.sort(key=lambda window: window.series.timestamps[window.lo])
+        return windows
+
+    def _live_digests(self) -> set[bytes]:
+        live = set(self._digests.values())
+        for shard in self.shards:
+            live.update(shard.series(state).digest() for state in shard.summaries)
+        return live
+
+
+def _state_digests(shards: list[Shard]) -> dict[str, bytes]:
+    """Per-state digests over the state's series in every shard, in shard order."""
+    hashers: dict[str, Any] = {}
+    for shard in shards:
+        for state in shard.summaries:
+            hasher = hashers.get(state)
+            if hasher is None:
+                hasher = hashers[state] = hashlib.blake2b(state.encode("utf-8"), digest_size=16)
+            hasher.update(shard.series(state).digest())
+    return {state: hasher.digest() for state, hasher in sorted(hashers.items())}
+
+
+def _summed_timings(loaders: list[DataLoader]) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for loader in loaders:
+        for phase, seconds in loader.load_timings.items():
+            timings[phase] = timings.get(phase, 0.0) + seconds
+    return timings
+
+
+def open_backend(
+    kind: str,
+    data_file: Path,
+    database: Path,
+    memory_budget: int | None = None,
+    workers: int = 1,
+    shard_workers: int = 1,
+    states: StateTable | None = None,
+) -> StorageBackend:
+    """Open the configured backend.
+
+    ``memory`` loads ``data_file``, which may also name a set of shards
+    (see ``shards``), keeping only rows whose state ``states`` accepts;
+    ``sqlite`` opens ``database``, whose states were checked on import.
+    """
+    if kind == "sqlite":
+        return SqliteBackend.open(Path(database))
+    if kind == "memory":
+        data_file = Path(data_file)
+        if is_sharded(data_file):
+            return ShardedBackend.load(data_file, memory_budget, workers, shard_workers, states)
+        loader = DataLoader(data_file, memory_budget=memory_budget, workers=workers, states=states)
+        return InMemoryBackend(loader.load())
+    raise ValueError(f"Unknown storage backend '{kind}', expected one of {BACKENDS}")
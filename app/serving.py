@@ -0,0 +1,56 @@
+"""Process setup for serving one preloaded dataset from forked gunicorn workers.
+
+See ``app.gunicorn_conf`` for the hooks that call these.
+"""
+
+import gc
+import logging
+
+from flask import Flask
+
+from app.metrics import memory_usage
+
+logger = logging.getLogger(__name__)
+
+_MIB = 1024 * 1024
+
+
+def prepare_for_fork(app: Flask) -> None:
+    """Finish every allocation workers can share, then freeze the master's heap.
+
+    Indexes built here live in pages the workers share instead of being
+    rebuilt by each of them. ``gc.freeze()`` moves every tracked object to
+    the permanent generation, so collections in a worker never write to
+    (and so never copy) the pages holding them.
+    """
+    service = app.config.get("PRICE_SERVICE")
+    if service is not None:
+        service.warm_indexes()
+
+    reloader = app.config.get("PRICE_RELOADER")
+    if reloader is not None:
+        # Each worker starts its own after the fork.
+        reloader.stop()
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Froze {gc.get_freeze_count()} objects before forking workers")
+    log_memory_usage("Master")
+
+
+def start_worker(app: Flask) -> None:
+    """Restart the per-process parts of a preloaded app in a freshly forked worker."""
+    reloader = app.config.get("PRICE_RELOADER")
+    if reloader is not None:
+        app.config["PRICE_RELOADER"] = reloader.restarted()
+
+
+def log_memory_usage(process: str) -> None:
+    usage = memory_usage()
+    if usage is None:
+        return
+    logger.info(
+        f"{process} memory: {usage.shared / _MIB:.1f} MiB shared, "
+        f"{usage.private / _MIB:.1f} MiB private, "
+        f"{usage.proportional / _MIB:.1f} MiB proportional"
+    )
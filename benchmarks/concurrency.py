@@ -0,0 +1,211 @@
+"""Measure cached-query latency while gunicorn holds many idle connections.
+
+Usage::
+
+    python -m benchmarks.concurrency --idle 2000 --silent 500 --clients 16
+    python -m benchmarks.concurrency --config app.gunicorn_conf --idle 200
+
+Starts gunicorn with ``--config`` on a synthetic dataset and opens
+``--idle`` keep-alive connections that make one request and then stay
+open, plus ``--silent`` connections that never send anything, as slow
+mobile clients do. ``--clients`` threads then each time ``--requests``
+cached queries over their own keep-alive connection. Finally every idle
+connection makes a second request, to check that none were dropped.
+
+Gunicorn runs a ``sync`` worker class as ``gthread`` unless ``--threads``
+is 1, so compare with ``--worker-class sync --threads 1``.
+"""
+
+import argparse
+import http.client
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from statistics import quantiles
+
+from benchmarks.generator import STATES, write_synthetic_csv
+
+URLS = [
+    *(f"/api/v1/prices/mean?state={state}" for state in STATES),
+    *(f"/api/v1/prices/stats?state={state}" for state in STATES),
+    *(f"/api/v1/prices/aggregate?state={state}&interval=week" for state in STATES),
+]
+
+
+def _raise_open_file_limit() -> int:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _get(connection: http.client.HTTPConnection, url: str) -> int:
+    connection.request("GET", url)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def _wait_until_serving(port: int, server: subprocess.Popen[bytes], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            if _get(connection, "/api/v1/health") == 200:
+                connection.close()
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"gunicorn did not start within {timeout:g}s")
+
+
+def _start_server(args: argparse.Namespace, data_file: Path, port: int) -> subprocess.Popen[bytes]:
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "-c",
+        f"python:{args.config}",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--log-level",
+        "warning",
+    ]
+    if args.worker_class:
+        command += ["--worker-class", args.worker_class]
+    env = {**os.environ, "FLASK_ENV": "production", "PRICE_DATA_FILE": str(data_file)}
+    return subprocess.Popen(command, env=env)
+
+
+def _open_idle(port: int, count: int) -> list[http.client.HTTPConnection]:
+    connections = []
+    for _ in range(count):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        _get(connection, "/api/v1/states")
+        connections.append(connection)
+    return connections
+
+
+def _open_silent(port: int, count: int) -> list[socket.socket]:
+    return [socket.create_connection(("127.0.0.1", port)) for _ in range(count)]
+
+
+def _client(
+    port: int, requests: int, offset: int, latencies: list[float], failures: list[str]
+) -> None:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    samples = []
+    for i in range(requests):
+        started = time.perf_counter()
+        try:
+            status = _get(connection, URLS[(offset + i) % len(URLS)])
+        except (OSError, http.client.HTTPException) as e:
+            failures.append(repr(e))
+            break
+        samples.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            failures.append(f"status {status}")
+    connection.close()
+    latencies.extend(samples)
+
+
+def _run_clients(port: int, clients: int, requests: int) -> tuple[float, list[float], list[str]]:
+    latencies: list[float] = []
+    failures: list[str] = []
+    threads = [
+        threading.Thread(target=_client, args=(port, requests, offset, latencies, failures))
+        for offset in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, failures
+
+
+def _still_open(connections: list[http.client.HTTPConnection]) -> int:
+    served = 0
+    for connection in connections:
+        try:
+            connection.auto_open = 0  # a reconnect would hide a dropped connection
+            served += _get(connection, "/api/v1/states") == 200
+        except (OSError, http.client.HTTPException):
+            pass
+        connection.close()
+    return served
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--file", type=Path, help="reuse or create this CSV instead of a temp file")
+    parser.add_argument("--config", default="app.gunicorn_threaded", help="gunicorn config module")
+    parser.add_argument("--worker-class", help="override the config's worker class")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--idle", type=int, default=2000, help="idle keep-alive connections")
+    parser.add_argument("--silent", type=int, default=0, help="connections that never send")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent active clients")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per active client")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    limit = _raise_open_file_limit()
+    if args.idle + args.silent + args.clients + 64 > limit:
+        raise SystemExit(f"Open file limit {limit} is too low; raise it with ulimit -n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or Path(tmp) / "prices.csv"
+        if not path.exists():
+            print(f"Generating {args.rows:,} rows -> {path}")
+            write_synthetic_csv(path, args.rows)
+
+        port = _free_port()
+        server = _start_server(args, path, port)
+        try:
+            _wait_until_serving(port, server, args.startup_timeout)
+            _run_clients(port, 1, len(URLS))  # fill the caches
+
+            idle = _open_idle(port, args.idle)
+            silent = _open_silent(port, args.silent)
+            elapsed, latencies, failures = _run_clients(port, args.clients, args.requests)
+            served = _still_open(idle)
+            for sock in silent:
+                sock.close()
+        finally:
+            server.terminate()
+            server.wait(30)
+
+    if len(latencies) < 2:
+        raise SystemExit(f"Too few requests completed: {', '.join(sorted(set(failures)))}")
+    cuts = quantiles(latencies, n=100, method="inclusive")
+    print(f"{'open connections':<24} {args.idle + args.silent + args.clients:>10,}")
+    print(f"{'requests/sec':<24} {len(latencies) / elapsed:>10,.0f}")
+    print(f"{'p50 ms':<24} {cuts[49]:>10.2f}")
+    print(f"{'p99 ms':<24} {cuts[98]:>10.2f}")
+    print(f"{'max ms':<24} {max(latencies):>10.2f}")
+    print(f"{'failed requests':<24} {len(failures):>10,}")
+    print(f"{'idle connections kept':<24} {served:>10,} / {args.idle:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Write deterministic synthetic price CSVs in the ``state,price,timestamp`` schema.
+
+Usage::
+
+    python -m benchmarks.generator --rows 1000000 data/synthetic.csv
+
+The same ``--rows``, ``--seed`` and ``--interval`` always produce a
+byte-identical file. Rows are written one market interval at a time, one
+row per state, so a file of any size streams in constant memory.
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.data.data_loader import DataLoader
+
+STATES = ("NSW", "QLD", "SA", "TAS", "Vic")
+
+# Casing seen in real exports; the loader normalises all of these.
+STATE_SPELLINGS = {
+    "NSW": ("nsw", "Nsw"),
+    "QLD": ("qld", "Qld"),
+    "SA": ("sa", "Sa"),
+    "TAS": ("tas", "Tas"),
+    "Vic": ("VIC", "vic"),
+}
+
+# The NEM market price floor and cap, $/MWh.
+PRICE_FLOOR = -1000.0
+PRICE_CAP = 17500.0
+
+DEFAULT_START = datetime(2020, 1, 1)
+DEFAULT_INTERVAL = timedelta(minutes=30)
+
+
+def write_synthetic_csv(
+    path: Path,
+    rows: int,
+    start: datetime = DEFAULT_START,
+    interval: timedelta = DEFAULT_INTERVAL,
+    seed: int = 0,
+    messy_ratio: float = 0.01,
+) -> None:
+    """Write ``rows`` data rows to ``path``.
+
+    Each state follows its own mean-reverting random walk with occasional
+    price spikes and negative-price intervals. About ``messy_ratio`` of
+    rows spell the state in a different case.
+    """
+    rng = random.Random(seed)
+    levels = {state: 60.0 + 10 * i for i, state in enumerate(STATES)}
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("state,price,timestamp\n")
+        written = 0
+        timestamp = start
+        while written < rows:
+            stamp = timestamp.strftime(DataLoader.TIMESTAMP_FORMAT)
+            batch = []
+            for state in STATES[: rows - written]:
+                level = levels[state] = _next_price(rng, levels[state])
+                name = state
+                if rng.random() < messy_ratio:
+                    name = rng.choice(STATE_SPELLINGS[state])
+                batch.append(f"{name},{level:.2f},{stamp}\n")
+            f.writelines(batch)
+            written += len(batch)
+            timestamp += interval
+
+
+def _next_price(rng: random.Random, level: float) -> float:
+    roll = rng.random()
+    if roll < 0.002:
+        return min(PRICE_CAP, level + rng.uniform(500, 5000))
+    if roll < 0.01:
+        return max(PRICE_FLOOR, rng.uniform(-150, 0))
+
+    drift = 0.1 * (75.0 - level)
+    return min(PRICE_CAP, max(PRICE_FLOOR, level + drift + rng.gauss(0, 8)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=int, default=30, help="minutes between rows")
+    parser.add_argument("--messy-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+
+    write_synthetic_csv(
+        args.path,
+        args.rows,
+        interval=timedelta(minutes=args.interval),
+        seed=args.seed,
+        messy_ratio=args.messy_ratio,
+    )
+    print(f"Wrote {args.rows:,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
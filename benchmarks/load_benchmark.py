@@ -0,0 +1,38 @@
+"""Measure DataLoader ingestion throughput on a synthetic CSV.
+
+Usage::
+
+    python -m benchmarks.load_benchmark --rows 10000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.data.data_loader import DataLoader
+from benchmarks.generator import write_synthetic_csv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--file", type=Path, help="reuse or create this CSV instead of a temp file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or Path(tmp) / "prices.csv"
+        if not path.exists():
+            print(f"Generating {args.rows:,} rows -> {path}")
+            write_synthetic_csv(path, args.rows)
+
+        started = time.perf_counter()
+        loader = DataLoader(path).load()
+        elapsed = time.perf_counter() - started
+
+    rows = loader.record_count
+    print(f"Loaded {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
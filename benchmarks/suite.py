@@ -0,0 +1,235 @@
+"""Benchmark ingestion, memory, query latency and HTTP throughput.
+
+Usage::
+
+    python -m benchmarks.suite --rows 1000000 --output results.json
+    python -m benchmarks.suite --rows 1000000 --baseline benchmarks/baseline.json
+
+Results are written as JSON. With ``--baseline`` every metric is compared
+with the stored run and the command exits non-zero if any moved in the
+wrong direction by more than ``--tolerance`` percent.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from statistics import quantiles
+from typing import Any
+
+from app import create_app
+from app.data.data_loader import DataLoader, from_epoch
+from app.services.price_service import PriceService
+from benchmarks.generator import STATES, write_synthetic_csv
+
+HIGHER = "higher"
+LOWER = "lower"
+
+Metrics = dict[str, dict[str, Any]]
+
+
+def _metric(metrics: Metrics, name: str, value: float, unit: str, better: str) -> None:
+    metrics[name] = {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _time_ms(call: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def _latency(metrics: Metrics, name: str, samples: list[float]) -> None:
+    cuts = quantiles(samples, n=100, method="inclusive")
+    _metric(metrics, f"{name}_p50_ms", cuts[49], "ms", LOWER)
+    _metric(metrics, f"{name}_p99_ms", cuts[98], "ms", LOWER)
+
+
+class _RangeSampler:
+    """Random ``(start, end)`` windows covering 1-50% of a series' history."""
+
+    def __init__(self, loader: DataLoader, state: str, seed: int):
+        series = loader.get_prices_for_state(state)
+        if series is None:
+            raise SystemExit(f"Dataset has no rows for {state}")
+        self._first = from_epoch(series.timestamps[0])
+        self._span = from_epoch(series.timestamps[-1]) - self._first
+        self._rng = random.Random(seed)
+
+    def __call__(self) -> tuple[datetime, datetime]:
+        start = self._first + self._span * self._rng.random() * 0.5
+        return start, start + self._span * self._rng.uniform(0.01, 0.5)
+
+
+def bench_ingestion(metrics: Metrics, path: Path) -> DataLoader:
+    started = time.perf_counter()
+    loader = DataLoader(path).load()
+    elapsed = time.perf_counter() - started
+
+    _metric(metrics, "ingest_rows_per_sec", loader.record_count / elapsed, "rows/s", HIGHER)
+    _metric(metrics, "ingest_seconds", elapsed, "s", LOWER)
+    _metric(metrics, "peak_rss_mb", _peak_rss_mb(), "MB", LOWER)
+    return loader
+
+
+def bench_parallel_ingestion(metrics: Metrics, path: Path, workers: int) -> None:
+    started = time.perf_counter()
+    loader = DataLoader(path, workers=workers).load()
+    elapsed = time.perf_counter() - started
+
+    _metric(
+        metrics, "ingest_parallel_rows_per_sec", loader.record_count / elapsed, "rows/s", HIGHER
+    )
+
+
+def bench_queries(metrics: Metrics, loader: DataLoader, samples: int) -> None:
+    state = STATES[0]
+    random_range = _RangeSampler(loader, state, seed=0)
+    queries: dict[str, Callable[[PriceService], Any]] = {
+        "mean": lambda s: s.get_mean_price(state),
+        "mean_range": lambda s: s.get_mean_price(state, *random_range()),
+        "aggregate_day": lambda s: s.get_interval_statistics(state, "day"),
+        "stats": lambda s: s.get_distribution_statistics(state, [5, 50, 95, 99]),
+        "stats_range": lambda s: s.get_distribution_statistics(
+            state, [5, 50, 95, 99], *random_range()
+        ),
+    }
+
+    for name, query in queries.items():
+        # A fresh service per query type, so the first call builds its own caches.
+        call = partial(query, PriceService(loader))
+        _metric(metrics, f"cold_{name}_ms", _time_ms(call), "ms", LOWER)
+        _latency(metrics, f"warm_{name}", [_time_ms(call) for _ in range(samples)])
+
+
+def bench_http(metrics: Metrics, loader: DataLoader, requests: int) -> None:
+    app = create_app("testing")
+    app.config["PRICE_SERVICE"] = PriceService(loader)
+    client = app.test_client()
+
+    rng = random.Random(1)
+    random_range = _RangeSampler(loader, STATES[0], seed=1)
+    urls = []
+    for i in range(requests):
+        state = STATES[i % len(STATES)]
+        start, end = random_range()
+        urls.append(
+            rng.choice(
+                [
+                    f"/api/v1/prices/mean?state={state}",
+                    f"/api/v1/prices/mean?state={state}&from={start:%Y-%m-%dT%H:%M:%S}"
+                    f"&to={end:%Y-%m-%dT%H:%M:%S}",
+                    f"/api/v1/prices/aggregate?state={state}&interval=week",
+                    f"/api/v1/prices/stats?state={state}",
+                    "/api/v1/states",
+                ]
+            )
+        )
+
+    for url in urls[:10]:
+        client.get(url)
+
+    latencies = []
+    started = time.perf_counter()
+    for url in urls:
+        latencies.append(_time_ms(partial(client.get, url)))
+    elapsed = time.perf_counter() - started
+
+    _metric(metrics, "http_requests_per_sec", len(urls) / elapsed, "req/s", HIGHER)
+    _latency(metrics, "http", latencies)
+
+
+def run(path: Path, samples: int, requests: int, workers: int = 1) -> dict[str, Any]:
+    metrics: Metrics = {}
+    loader = bench_ingestion(metrics, path)
+    if workers > 1:
+        bench_parallel_ingestion(metrics, path, workers)
+    bench_queries(metrics, loader, samples)
+    bench_http(metrics, loader, requests)
+
+    return {
+        "meta": {
+            "rows": loader.record_count,
+            "workers": workers,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Return a line per metric that got worse than ``baseline`` by more than ``tolerance`` %."""
+    regressions = []
+    for name, current in results["metrics"].items():
+        previous = baseline["metrics"].get(name)
+        if previous is None or not previous["value"]:
+            continue
+
+        change = (current["value"] - previous["value"]) / previous["value"] * 100
+        worse = change < -tolerance if current["better"] == HIGHER else change > tolerance
+        if worse:
+            regressions.append(
+                f"{name}: {previous['value']} -> {current['value']} {current['unit']} "
+                f"({change:+.1f}%)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--file", type=Path, help="reuse or create this CSV instead of a temp file")
+    parser.add_argument("--samples", type=int, default=200, help="warm calls per query type")
+    parser.add_argument("--requests", type=int, default=2000, help="HTTP requests to time")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processes for the parallel ingestion run; 1 skips it",
+    )
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="compare with this results JSON")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed change in percent")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or Path(tmp) / "prices.csv"
+        if not path.exists():
+            print(f"Generating {args.rows:,} rows -> {path}")
+            write_synthetic_csv(path, args.rows)
+        results = run(path, args.samples, args.requests, args.workers)
+
+    for name, metric in results["metrics"].items():
+        print(f"{name:<32} {metric['value']:>14,.3f} {metric['unit']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:g}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from app.data.data_loader import DataLoader
+from benchmarks.generator import write_synthetic_csv
+from benchmarks.suite import HIGHER, LOWER, compare
+
+
+class TestGenerator:
+    def test_deterministic(self, tmp_path):
+        first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+        write_synthetic_csv(first, 1000, seed=3)
+        write_synthetic_csv(second, 1000, seed=3)
+
+        assert first.read_bytes() == second.read_bytes()
+
+    def test_loads_with_messy_casing(self, tmp_path):
+        path = tmp_path / "prices.csv"
+        write_synthetic_csv(path, 1003, messy_ratio=0.5)
+
+        lines = path.read_text().splitlines()
+        loader = DataLoader(path).load()
+
+        assert len(lines) == 1004
+        assert {line.split(",")[0] for line in lines[1:]} > {"NSW", "Vic"}
+        assert loader.record_count == 1003
+        assert loader.get_available_states() == ["NSW", "QLD", "SA", "TAS", "VIC"]
+
+
+class TestCompare:
+    def _results(self, **values):
+        return {
+            "metrics": {
+                name: {"value": value, "unit": "x", "better": better}
+                for name, (value, better) in values.items()
+            }
+        }
+
+    def test_flags_regressions_in_either_direction(self):
+        baseline = self._results(rows=(100.0, HIGHER), latency=(10.0, LOWER), rss=(50.0, LOWER))
+        results = self._results(rows=(80.0, HIGHER), latency=(12.0, LOWER), rss=(40.0, LOWER))
+
+        regressions = compare(results, baseline, tolerance=10)
+
+        assert [line.split(":")[0] for line in regressions] == ["rows", "latency"]
+
+    def test_within_tolerance_and_new_metrics_pass(self):
+        baseline = self._results(rows=(100.0, HIGHER))
+        results = self._results(rows=(95.0, HIGHER), new=(1.0, LOWER))
+
+        assert compare(results, baseline, tolerance=10) == []
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+from app.services.cache import QueryCache, approximate_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryCache:
+    def test_least_recently_used_entry_evicted(self):
+        cache = QueryCache(max_entries=2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("c", lambda: 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (1, 3, 1)
+
+    def test_byte_bound(self):
+        cache = QueryCache(max_entries=100, max_bytes=250, sizeof=lambda value: value)
+        cache.get_or_compute("a", lambda: 100)
+        cache.get_or_compute("b", lambda: 100)
+        cache.get_or_compute("c", lambda: 100)
+        cache.get_or_compute("huge", lambda: 1000)
+
+        assert len(cache) == 2
+        assert cache.size_bytes == 200
+        assert "a" not in cache
+        assert "huge" not in cache
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = QueryCache(max_entries=10, ttl=30, clock=clock)
+        cache.get_or_compute("a", lambda: 1)
+
+        clock.now = 29
+        assert cache.get_or_compute("a", lambda: 2) == 1
+        clock.now = 30
+        assert cache.get_or_compute("a", lambda: 2) == 2
+
+    def test_exceptions_not_cached(self):
+        cache = QueryCache(max_entries=10)
+
+        def fail():
+            raise LookupError("boom")
+
+        with pytest.raises(LookupError):
+            cache.get_or_compute("a", fail)
+        assert cache.get_or_compute("a", lambda: 1) == 1
+
+    def test_single_flight(self):
+        cache = QueryCache(max_entries=10)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return object()
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        time.sleep(0.05)  # let the followers reach the in-flight entry
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 4
+        assert all(result is results[0] for result in results)
+
+    def test_waiters_see_the_leaders_exception(self):
+        cache = QueryCache(max_entries=10)
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise LookupError("boom")
+
+        def call():
+            try:
+                cache.get_or_compute("k", fail)
+            except LookupError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)  # let the followers reach the in-flight entry
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 3
+        assert cache.stats.misses == 1
+
+    def test_discard_and_clear(self):
+        cache = QueryCache(max_entries=10)
+        for key in ("nsw-1", "nsw-2", "vic-1"):
+            cache.get_or_compute(key, lambda: 0)
+
+        assert cache.discard(lambda key: key.startswith("nsw")) == 2
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.size_bytes == 0
+        assert cache.stats.evictions == 3
+
+    def test_resize_evicts_the_oldest_entries(self):
+        cache = QueryCache(max_entries=3)
+        for key in ("a", "b", "c"):
+            cache.get_or_compute(key, lambda: 0)
+
+        cache.resize(1)
+
+        assert cache.max_entries == 1
+        assert "c" in cache
+        assert len(cache) == 1
+        with pytest.raises(ValueError):
+            cache.resize(0)
+
+    def test_approximate_size_grows_with_content(self):
+        assert approximate_size(list(range(1000))) > approximate_size(list(range(10)))
+        assert approximate_size({"a": "x" * 100}) > approximate_size({"a": "x"})
@@ -1,9 +1,20 @@
+from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 
 import pytest
 
-from app.data.data_loader import DataLoader, DataLoadError, PriceRecord
+from app.config import Config
+from app.data.data_loader import (
+    DataLoader,
+    DataLoadError,
+    PriceRecord,
+    PriceSeries,
+    format_fixed,
+    parse_fixed,
+    to_fixed,
+)
+from app.data.states import StateTable
 
 
 class TestDataLoader:
@@ -78,11 +89,446 @@ class TestDataLoader:
         assert loader.get_prices_for_state("UNKNOWN") is None
 
 
+class TestStateValidation:
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        csv_path = tmp_path / "states.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "Vic,10.00,2025-01-01 00:00:00\n"
+            "WA,20.00,2025-01-01 00:00:00\n"
+            "Victoria,30.00,2025-01-01 00:30:00\n"
+            " nsw ,40.00,2025-01-01 00:00:00\n"
+            "wa,50.00,2025-01-01 00:30:00\n"
+        )
+        return csv_path
+
+    def test_lenient_skips_unknown_states(self, csv_path, caplog):
+        loader = DataLoader(csv_path, states=StateTable.from_config(vars(Config))).load()
+
+        assert loader.get_available_states() == ["NSW", "VIC"]
+        assert loader.record_count == 3
+        assert [r.price for r in loader.get_prices_for_state("VIC")] == [
+            Decimal("10"),
+            Decimal("30"),
+        ]
+        assert "Skipped 2 rows with unknown states: ['WA', 'wa']" in caplog.text
+
+    def test_strict_rejects_unknown_states(self, csv_path):
+        states = StateTable(Config.VALID_STATES, Config.STATE_ALIASES, strict=True)
+
+        with pytest.raises(DataLoadError, match="Line 3: Unknown state 'WA'"):
+            DataLoader(csv_path, states=states).load()
+
+    def test_refresh_keeps_validating(self, csv_path):
+        loader = DataLoader(csv_path, states=StateTable(["NSW", "VIC"])).load()
+        with open(csv_path, "a") as f:
+            f.write("SA,1.00,2025-01-01 01:00:00\nvic,2.00,2025-01-01 01:00:00\n")
+
+        refreshed, changed = loader.refresh()
+
+        assert changed == {"VIC"}
+        assert refreshed.get_available_states() == ["NSW", "VIC"]
+
+
 class TestPriceRecord:
     def test_immutable(self):
-        from datetime import datetime
-
         record = PriceRecord("NSW", Decimal("100.00"), datetime.now())
 
         with pytest.raises(AttributeError):
             record.price = Decimal("200.00")  # type: ignore[misc]
+
+
+class TestPriceSeries:
+    def test_columnar_storage(self, sample_csv):
+        series = DataLoader(sample_csv).load().get_prices_for_state("VIC")
+
+        assert series is not None
+        assert series.timestamps.typecode == "q"
+        assert series.prices.typecode == "q"
+        assert list(series.prices) == [1_500_000, -500_000]
+
+    def test_records_built_on_demand(self, sample_csv):
+        series = DataLoader(sample_csv).load().get_prices_for_state("NSW")
+
+        assert series is not None
+        assert len(series) == 2
+        assert series[1] == PriceRecord("NSW", Decimal("200.00"), datetime(2025, 1, 1, 0, 30))
+        assert [r.price for r in series] == [Decimal("100"), Decimal("200")]
+
+    def test_slice_returns_series(self, sample_csv):
+        series = DataLoader(sample_csv).load().get_prices_for_state("NSW")
+
+        assert series is not None
+        head = series[:1]
+        assert isinstance(head, PriceSeries)
+        assert head.price_total() == 1_000_000
+
+    def test_price_precision_limit(self, tmp_path):
+        csv_path = tmp_path / "too_precise.csv"
+        csv_path.write_text("state,price,timestamp\nNSW,1.00001,2025-01-01 00:00:00\n")
+
+        with pytest.raises(DataLoadError, match="decimal places"):
+            DataLoader(csv_path).load()
+
+    @pytest.mark.parametrize(
+        "text",
+        ["0", "-0.00", "100", "-50.5", "+12.25", ".5", "-.0001", "7.", "17500.0000", "-1000"],
+    )
+    def test_fixed_point_parse_matches_decimal(self, text):
+        assert parse_fixed(text) == to_fixed(Decimal(text))
+
+    @pytest.mark.parametrize("text", ["", "-", ".", "1e3", " 5", "1.00001", "1_0", "1.2.3", "٣"])
+    def test_fixed_point_parse_defers_unusual_input(self, text):
+        assert parse_fixed(text) is None
+
+    @pytest.mark.parametrize(
+        "units, text",
+        [
+            (0, "0.00"),
+            (1_000_000, "100.00"),
+            (-500_000, "-50.00"),
+            (123_456, "12.3456"),
+            (-1, "-0.0001"),
+        ],
+    )
+    def test_format_fixed(self, units, text):
+        assert format_fixed(units) == text
+        assert parse_fixed(text) == units
+
+    def test_decimal_fallback_for_unusual_prices(self, tmp_path):
+        csv_path = tmp_path / "unusual.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "NSW, 1.5e2 ,2025-01-01 00:00:00\n"
+            "NSW,2.50000,2025-01-01 00:30:00\n"
+        )
+
+        series = DataLoader(csv_path).load().get_prices_for_state("NSW")
+
+        assert series is not None
+        assert list(series.prices) == [1_500_000, 25_000]
+
+    def test_price_out_of_range_rejected(self, tmp_path):
+        csv_path = tmp_path / "huge.csv"
+        csv_path.write_text("state,price,timestamp\nNSW,1e20,2025-01-01 00:00:00\n")
+
+        with pytest.raises(DataLoadError, match="Line 2: .* out of range"):
+            DataLoader(csv_path).load()
+
+    def test_price_total_overflow_rejected(self, tmp_path):
+        csv_path = tmp_path / "overflow.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "NSW,900000000000000,2025-01-01 00:00:00\n"
+            "NSW,900000000000000,2025-01-01 00:30:00\n"
+        )
+
+        with pytest.raises(DataLoadError, match="64-bit"):
+            DataLoader(csv_path).load()
+
+    def test_non_finite_price_rejected(self, tmp_path):
+        csv_path = tmp_path / "nan.csv"
+        csv_path.write_text("state,price,timestamp\nNSW,NaN,2025-01-01 00:00:00\n")
+
+        with pytest.raises(DataLoadError, match="Invalid price"):
+            DataLoader(csv_path).load()
+
+    def test_sorted_by_timestamp(self, tmp_path):
+        csv_path = tmp_path / "unsorted.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "NSW,3.00,2025-01-01 01:00:00\n"
+            "NSW,1.00,2025-01-01 00:00:00\n"
+            "NSW,2.00,2025-01-01 00:30:00\n"
+        )
+
+        series = DataLoader(csv_path).load().get_prices_for_state("NSW")
+
+        assert series is not None
+        assert [r.price for r in series] == [Decimal("1"), Decimal("2"), Decimal("3")]
+        assert list(series.prefix_sums) == [0, 10_000, 30_000, 60_000]
+
+    def test_window_bounds(self, sample_csv):
+        series = DataLoader(sample_csv).load().get_prices_for_state("NSW")
+        midnight = 1735689600  # 2025-01-01 00:00:00
+
+        assert series is not None
+        assert series.window() == (0, 2)
+        assert series.window(midnight, midnight + 1800) == (0, 1)
+        assert series.window(midnight + 1, None) == (1, 2)
+        assert series.window(midnight + 3600, None) == (2, 2)
+        assert series.range_total(0, 2) == 3_000_000
+
+
+class TestFastIngestion:
+    def test_matches_strptime_for_non_canonical_timestamps(self, tmp_path):
+        csv_path = tmp_path / "lenient.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "NSW,1.00, 2025-01-01 00:30:00 \n"
+            "NSW,2.00,2025-1-1 1:00:00\n"
+            "NSW,3.00,2025-01-01 01:30:00\n"
+        )
+
+        series = DataLoader(csv_path).load().get_prices_for_state("NSW")
+
+        assert series is not None
+        assert [r.timestamp for r in series] == [
+            datetime(2025, 1, 1, 0, 30),
+            datetime(2025, 1, 1, 1, 0),
+            datetime(2025, 1, 1, 1, 30),
+        ]
+
+    def test_out_of_range_time_rejected(self, tmp_path):
+        csv_path = tmp_path / "bad_time.csv"
+        csv_path.write_text(
+            "state,price,timestamp\nNSW,1.00,2025-01-01 00:00:00\nNSW,1.00,2025-01-01 24:00:00\n"
+        )
+
+        with pytest.raises(DataLoadError, match="Line 3: Invalid timestamp"):
+            DataLoader(csv_path).load()
+
+    def test_invalid_date_rejected(self, tmp_path):
+        csv_path = tmp_path / "bad_date.csv"
+        csv_path.write_text("state,price,timestamp\nNSW,1.00,2025-02-30 00:00:00\n")
+
+        with pytest.raises(DataLoadError, match="Line 2: Invalid timestamp"):
+            DataLoader(csv_path).load()
+
+    def test_error_line_number(self, tmp_path):
+        csv_path = tmp_path / "bad_line.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "NSW,1.00,2025-01-01 00:00:00\n"
+            "NSW,1.00,2025-01-01 00:30:00\n"
+            "NSW,oops,2025-01-01 01:00:00\n"
+        )
+
+        with pytest.raises(DataLoadError, match="Line 4: Invalid price value 'oops'"):
+            DataLoader(csv_path).load()
+
+    def test_short_row_reports_missing_column(self, tmp_path):
+        csv_path = tmp_path / "short.csv"
+        csv_path.write_text("state,price,timestamp\nNSW,1.00\n")
+
+        with pytest.raises(DataLoadError, match="Line 2: Missing column 'timestamp'"):
+            DataLoader(csv_path).load()
+
+    def test_column_order_independent(self, tmp_path):
+        csv_path = tmp_path / "reordered.csv"
+        csv_path.write_text("timestamp,extra,price,state\n2025-01-01 00:00:00,x,12.50,sa\n")
+
+        series = DataLoader(csv_path).load().get_prices_for_state("SA")
+
+        assert series is not None
+        assert series[0].price == Decimal("12.50")
+
+    def test_blank_lines_skipped(self, tmp_path):
+        csv_path = tmp_path / "blank.csv"
+        csv_path.write_text("state,price,timestamp\n\nNSW,1.00,2025-01-01 00:00:00\n\n")
+
+        assert DataLoader(csv_path).load().record_count == 1
+
+
+class TestRefresh:
+    def test_unchanged_file(self, sample_csv):
+        loader = DataLoader(sample_csv).load()
+
+        assert loader.refresh() == (loader, frozenset())
+
+    def test_appended_rows(self, sample_csv):
+        loader = DataLoader(sample_csv).load()
+        with open(sample_csv, "a") as f:
+            f.write("NSW,300.00,2025-01-01 01:00:00\nSA,10.00,2025-01-01 00:00:00\n")
+
+        updated, changed = loader.refresh()
+
+        assert changed == {"NSW", "SA"}
+        assert updated.record_count == 6
+        assert loader.record_count == 4
+        assert updated.get_prices_for_state("NSW").price_total() == 6_000_000
+        assert updated.get_prices_for_state("VIC") is loader.get_prices_for_state("VIC")
+        assert updated.refresh() == (updated, frozenset())
+
+    def test_partial_line_waits_for_newline(self, sample_csv):
+        loader = DataLoader(sample_csv).load()
+        with open(sample_csv, "a") as f:
+            f.write("NSW,300.0")
+
+        updated, changed = loader.refresh()
+        assert changed == frozenset()
+        assert updated.record_count == 4
+
+        with open(sample_csv, "a") as f:
+            f.write("0,2025-01-01 01:00:00\n")
+
+        updated, changed = updated.refresh()
+        assert changed == {"NSW"}
+        assert updated.get_prices_for_state("NSW")[-1].price == Decimal("300.00")
+
+    def test_partial_last_line_at_load_waits_for_newline(self, sample_csv):
+        with open(sample_csv, "a") as f:
+            f.write("NSW,300.0")
+
+        loader = DataLoader(sample_csv).load()
+        assert loader.record_count == 4
+
+        with open(sample_csv, "a") as f:
+            f.write("0,2025-01-01 01:00:00\n")
+
+        updated, changed = loader.refresh()
+        assert changed == {"NSW"}
+        assert updated.record_count == 5
+        assert updated.get_prices_for_state("NSW")[-1].price == Decimal("300.00")
+
+    def test_last_row_without_newline_is_loaded(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text(
+            "state,price,timestamp\nNSW,1.00,2025-01-01 00:00:00\nNSW,3.00,2025-01-01 00:30:00"
+        )
+
+        loader = DataLoader(csv_path).load()
+        assert loader.record_count == 2
+
+        with open(csv_path, "a") as f:
+            f.write("\nNSW,5.00,2025-01-01 01:00:00\n")
+        updated, changed = loader.refresh()
+
+        assert changed == {"NSW"}
+        assert [record.price for record in updated.get_prices_for_state("NSW")] == [
+            Decimal("1.00"),
+            Decimal("3.00"),
+            Decimal("5.00"),
+        ]
+        assert updated._line_count == 4
+
+    def test_single_row_without_newline(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text("state,price,timestamp\nVIC,2.00,2025-01-01 00:00:00")
+
+        assert DataLoader(csv_path).load().record_count == 1
+
+    def test_extended_last_row_reloads_in_full(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text("state,price,timestamp\nNSW,1.00,2025-01-01 00:00:00,a")
+
+        loader = DataLoader(csv_path).load()
+        with open(csv_path, "a") as f:
+            f.write("b\n")
+        updated, changed = loader.refresh()
+
+        assert changed == {"NSW"}
+        assert updated.record_count == 1
+
+    def test_out_of_order_append_is_sorted(self, sample_csv):
+        loader = DataLoader(sample_csv).load()
+        with open(sample_csv, "a") as f:
+            f.write("NSW,50.00,2024-12-31 23:30:00\n")
+
+        updated, _ = loader.refresh()
+        series = updated.get_prices_for_state("NSW")
+
+        assert series[0].price == Decimal("50.00")
+        assert list(series.prefix_sums) == [0, 500_000, 1_500_000, 3_500_000]
+
+    def test_appended_error_uses_file_line_number(self, sample_csv):
+        loader = DataLoader(sample_csv).load()
+        with open(sample_csv, "a") as f:
+            f.write("NSW,1.00,2025-01-01 01:00:00\nNSW,bad,2025-01-01 01:30:00\n")
+
+        with pytest.raises(DataLoadError, match="Line 7: Invalid price"):
+            loader.refresh()
+
+    def test_rewritten_file_reloads_in_full(self, sample_csv):
+        loader = DataLoader(sample_csv).load()
+        sample_csv.write_text("state,price,timestamp\nQLD,1.00,2025-01-01 00:00:00\n")
+
+        updated, changed = loader.refresh()
+
+        assert changed == {"NSW", "VIC", "QLD"}
+        assert updated.get_available_states() == ["QLD"]
+
+    def test_version_is_content_derived(self, sample_csv, tmp_path):
+        copy = tmp_path / "copy.csv"
+        copy.write_text(sample_csv.read_text())
+        loader = DataLoader(sample_csv).load()
+
+        assert loader.version == DataLoader(copy).load().version
+
+        with open(sample_csv, "a") as f:
+            f.write("NSW,1.00,2025-01-01 01:00:00\n")
+        updated, _ = loader.refresh()
+
+        assert updated.version != loader.version
+
+
+class TestParallelIngestion:
+    @pytest.fixture
+    def parallel(self, monkeypatch):
+        monkeypatch.setattr(DataLoader, "_PARALLEL_MIN_BYTES", 0)
+        monkeypatch.setattr(DataLoader, "_PARALLEL_RANGE_BYTES", 256)
+
+    @pytest.fixture
+    def large_csv(self, tmp_path):
+        csv_path = tmp_path / "large.csv"
+        lines = ["state,price,timestamp"]
+        for i in range(400):
+            state = ("NSW", "vic", " QLD ")[i % 3]
+            # Out of order within each state, so the merge must re-sort.
+            lines.append(
+                f"{state},{i % 97 - 20}.{i % 100:02d},2025-01-{1 + (i * 7) % 28:02d} 00:00:00"
+            )
+        csv_path.write_text("\n".join(lines) + "\n")
+        return csv_path
+
+    def test_matches_serial(self, parallel, large_csv):
+        serial = DataLoader(large_csv).load()
+        parallel_loader = DataLoader(large_csv, workers=2).load()
+
+        assert parallel_loader.record_count == serial.record_count == 400
+        assert parallel_loader.version == serial.version
+        assert parallel_loader._line_count == serial._line_count == 401
+        for state in serial.get_available_states():
+            assert list(parallel_loader.get_prices_for_state(state)) == list(
+                serial.get_prices_for_state(state)
+            )
+
+    def test_validates_states_in_workers(self, parallel, large_csv):
+        states = StateTable(["NSW", "VIC"])
+        serial = DataLoader(large_csv, states=states).load()
+        parallel_loader = DataLoader(large_csv, workers=2, states=states).load()
+
+        assert parallel_loader.get_available_states() == ["NSW", "VIC"]
+        assert parallel_loader.version == serial.version
+        assert parallel_loader.record_count == 267
+
+    def test_error_reports_absolute_line(self, parallel, large_csv):
+        lines = large_csv.read_text().splitlines()
+        lines[350] = "NSW,abc,2025-01-01 00:00:00"
+        large_csv.write_text("\n".join(lines) + "\n")
+
+        with pytest.raises(DataLoadError, match="Line 351: Invalid price value 'abc'"):
+            DataLoader(large_csv, workers=2).load()
+
+    def test_partial_last_line(self, parallel, large_csv):
+        with open(large_csv, "a") as f:
+            f.write("NSW,1.0")
+
+        loader = DataLoader(large_csv, workers=2).load()
+        assert loader.record_count == 400
+
+        with open(large_csv, "a") as f:
+            f.write("0,2025-02-01 00:00:00\n")
+        updated, changed = loader.refresh()
+
+        assert changed == {"NSW"}
+        assert updated.record_count == 401
+
+    def test_refresh_after_parallel_load(self, parallel, large_csv):
+        loader = DataLoader(large_csv, workers=2).load()
+        with open(large_csv, "a") as f:
+            f.write("NSW,1.00,2025-02-01 00:00:00\nNSW,bad,2025-02-01 00:30:00\n")
+
+        with pytest.raises(DataLoadError, match="Line 403"):
+            loader.refresh()
@@ -0,0 +1,96 @@
+import random
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.data.data_loader import DataLoader
+from app.services import distributions
+from app.services.distributions import StateDistribution, nearest_rank
+from app.services.sketch import KllSketch
+
+
+def _series(tmp_path, prices):
+    start = datetime(2025, 1, 1)
+    csv_path = tmp_path / "distribution.csv"
+    csv_path.write_text(
+        "state,price,timestamp\n"
+        + "".join(
+            f"NSW,{p},{start + timedelta(minutes=5 * i):%Y-%m-%d %H:%M:%S}\n"
+            for i, p in enumerate(prices)
+        )
+    )
+    return DataLoader(csv_path).load().get_prices_for_state("NSW")
+
+
+class TestKllSketch:
+    def test_small_inputs_are_exact(self):
+        sketch = KllSketch()
+        sketch.update([5, 1, 4, 2, 3])
+
+        assert sketch.count == 5
+        assert sketch.quantiles([0, 0.2, 0.5, 1]) == [1, 1, 3, 5]
+
+    def test_rank_error_within_bound(self):
+        rng = random.Random(10)
+        values = [rng.randint(-10_000_000, 175_000_000) for _ in range(200_000)]
+        sketch = KllSketch()
+        for lo in range(0, len(values), 4096):
+            block = KllSketch()
+            block.update(values[lo : lo + 4096])
+            sketch.merge(block)
+
+        ordered = sorted(values)
+        ranks = [i / 100 for i in range(1, 100)]
+        for rank, estimate in zip(ranks, sketch.quantiles(ranks), strict=True):
+            low = bisect_left(ordered, estimate) / len(ordered)
+            high = bisect_right(ordered, estimate) / len(ordered)
+            assert low - 0.017 <= rank <= high + 0.017
+
+        assert sketch.count == len(values)
+        assert len(sketch) < 4 * sketch.k
+        assert (sketch.minimum, sketch.maximum) == (ordered[0], ordered[-1])
+
+    def test_merge_requires_same_k(self):
+        other = KllSketch(k=100)
+        other.update([1])
+
+        with pytest.raises(ValueError, match="different k"):
+            KllSketch().merge(other)
+
+    def test_empty_sketch(self):
+        with pytest.raises(ValueError, match="empty"):
+            KllSketch().quantiles([0.5])
+
+
+class TestStateDistribution:
+    def test_nearest_rank(self):
+        values = [10, 20, 30, 40]
+
+        assert [nearest_rank(values, p) for p in (0, 25, 26, 50, 100)] == [10, 10, 20, 20, 40]
+
+    def test_whole_history_is_exact(self, tmp_path):
+        series = _series(tmp_path, ["-5.00", "10.00", "2.50", "7.00"])
+        distribution = StateDistribution(series)
+
+        summary = distribution.describe(0, len(series), [50, 100])
+
+        assert summary.exact
+        assert summary.percentiles == [25_000, 100_000]
+        assert (summary.minimum, summary.maximum) == (-50_000, 100_000)
+        assert summary.square_total == sum(p * p for p in series.prices)
+
+    def test_wide_range_uses_sketches(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(distributions, "BLOCK_SIZE", 8)
+        monkeypatch.setattr(distributions, "EXACT_RANGE_LIMIT", 4)
+        prices = [f"{(i * 37) % 101 - 50}.25" for i in range(60)]
+        series = _series(tmp_path, prices)
+        distribution = StateDistribution(series)
+
+        summary = distribution.describe(5, 50, [0, 50, 100])
+
+        window = sorted(series.prices[5:50])
+        assert not summary.exact
+        assert summary.record_count == 45
+        assert summary.square_total == sum(p * p for p in window)
+        assert summary.percentiles == [window[0], nearest_rank(window, 50), window[-1]]
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.downsampling import lttb, minmax
+
+
+def _chunks(values, size=4):
+    timestamps = list(range(0, 1800 * len(values), 1800))
+    return [(timestamps[i : i + size], values[i : i + size]) for i in range(0, len(values), size)]
+
+
+class TestLttb:
+    def test_short_ranges_are_returned_whole(self):
+        values = [5, 1, 3]
+
+        assert lttb(_chunks(values), 3, 10) == ([0, 1800, 3600], values)
+
+    def test_keeps_end_points_and_spikes(self):
+        values = [10] * 40
+        values[17] = 500
+        values[31] = -300
+
+        timestamps, prices = lttb(_chunks(values, size=7), len(values), 6)
+
+        assert len(prices) == 6
+        assert timestamps[0] == 0 and timestamps[-1] == 39 * 1800
+        assert 500 in prices and -300 in prices
+        assert timestamps == sorted(timestamps)
+
+    def test_chunking_does_not_change_the_result(self):
+        values = [(i * 37) % 101 - 50 for i in range(250)]
+
+        expected = lttb(_chunks(values, size=250), 250, 20)
+        assert lttb(_chunks(values, size=3), 250, 20) == expected
+
+    def test_fewer_records_than_counted(self):
+        with pytest.raises(ValueError, match="Fewer records"):
+            lttb(_chunks([1, 2, 3, 4]), 10, 3)
+
+
+class TestMinMax:
+    def test_keeps_each_buckets_extremes_in_order(self):
+        values = [3, 9, 1, 4, 8, 2, 7, 7]
+
+        timestamps, prices = minmax(_chunks(values, size=3), len(values), 4)
+
+        assert prices == [9, 1, 8, 2]
+        assert timestamps == [1800, 3600, 7200, 9000]
+
+    def test_flat_bucket_keeps_one_record(self):
+        assert minmax(_chunks([5] * 8), 8, 4)[1] == [5, 5]
@@ -0,0 +1,73 @@
+from app import create_app
+from app.config import TestingConfig
+from app.metrics import Histogram, memory_usage
+
+
+def _samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+class TestHistogram:
+    def test_cumulative_buckets(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(("a",), value)
+
+        samples = _samples("\n".join(histogram.collect()))
+
+        assert samples['latency_seconds_bucket{route="a",le="0.1"}'] == "1"
+        assert samples['latency_seconds_bucket{route="a",le="1"}'] == "3"
+        assert samples['latency_seconds_bucket{route="a",le="+Inf"}'] == "4"
+        assert samples['latency_seconds_count{route="a"}'] == "4"
+        assert float(samples['latency_seconds_sum{route="a"}']) == 4.05
+
+    def test_label_values_escaped(self):
+        histogram = Histogram("h", "H.", ("path",), buckets=())
+        histogram.observe(('say "hi"\n',), 1.0)
+
+        assert 'h_count{path="say \\"hi\\"\\n"} 1' in list(histogram.collect())
+
+
+class TestMetricsEndpoint:
+    def test_request_durations_by_endpoint_and_status(self, client):
+        client.get("/api/v1/prices/mean?state=NSW")
+        client.get("/api/v1/prices/mean?state=UNKNOWN")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        samples = _samples(response.get_data(as_text=True))
+        labels = 'endpoint="prices.get_mean_price",method="GET"'
+        assert samples[f'http_request_duration_seconds_count{{{labels},status="200"}}'] == "1"
+        assert samples[f'http_request_duration_seconds_count{{{labels},status="404"}}'] == "1"
+
+    def test_cache_counters(self, client):
+        client.get("/api/v1/prices/mean?state=NSW&from=2025-01-01T00:00:00")
+        client.get("/api/v1/prices/stats?state=NSW")
+        client.get("/api/v1/prices/stats?state=NSW&percentiles=50")
+
+        samples = _samples(client.get("/metrics").get_data(as_text=True))
+
+        assert samples['price_cache_requests_total{cache="indexes",result="miss"}'] == "1"
+        assert samples['price_cache_requests_total{cache="indexes",result="hit"}'] == "1"
+        assert samples['price_cache_requests_total{cache="results",result="miss"}'] == "3"
+        assert 'price_cache_evictions_total{cache="serialized_responses"}' in samples
+
+    def test_dataset_and_process_gauges(self, client):
+        samples = _samples(client.get("/metrics").get_data(as_text=True))
+
+        assert samples['price_dataset_records{state="NSW"}'] == "2"
+        assert samples['price_dataset_records{state="VIC"}'] == "2"
+        assert float(samples["price_dataset_load_duration_seconds"]) > 0
+        assert 'price_dataset_load_phase_seconds{phase="parse"}' in samples
+        assert int(samples["process_max_resident_memory_bytes"]) > 0
+        if memory_usage() is not None:
+            assert int(samples["process_shared_memory_bytes"]) > 0
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(TestingConfig, "METRICS_ENABLED", False)
+
+        client = create_app("testing").test_client()
+
+        assert client.get("/metrics").status_code == 404
@@ -0,0 +1,193 @@
+import json
+import threading
+
+import pytest
+
+from app import create_app
+from app.data.data_loader import DataLoader, DataLoadError
+from app.data.partitions import BYTES_PER_RECORD, read_manifest
+from app.data.states import StateTable
+from app.services.price_service import PriceService
+
+
+@pytest.fixture
+def months_csv(tmp_path):
+    csv_path = tmp_path / "months.csv"
+    csv_path.write_text(
+        "state,price,timestamp\n"
+        "NSW,100.00,2025-01-31 23:30:00\n"
+        "NSW,200.00,2025-02-01 00:00:00\n"
+        "NSW,300.00,2025-12-31 23:30:00\n"
+        "NSW,400.00,2026-01-01 00:00:00\n"
+        "QLD,10.00,2025-02-01 00:00:00\n"
+        "VIC,150.00,2025-01-01 00:00:00\n"
+        "VIC,-50.00,2025-01-01 00:30:00\n"
+    )
+    return csv_path
+
+
+@pytest.fixture
+def partition_dir(sample_csv, tmp_path):
+    directory = tmp_path / "partitions"
+    DataLoader(sample_csv).load().save_partitions(directory)
+    return directory
+
+
+class TestPartitions:
+    def test_states_and_counts_come_from_the_manifest(self, partition_dir):
+        loader = DataLoader(partition_dir).load()
+
+        assert loader.get_available_states() == ["NSW", "VIC"]
+        assert loader.get_record_counts() == {"NSW": 2, "VIC": 2}
+        assert loader.record_count == 4
+        assert loader.partitions is not None
+        assert loader.partitions.loaded_states() == []
+
+    def test_loads_state_on_first_access(self, sample_csv, partition_dir):
+        loader = DataLoader(partition_dir).load()
+        from_csv = DataLoader(sample_csv).load()
+
+        series = loader.get_prices_for_state("nsw")
+
+        assert series is not None
+        assert list(series) == list(from_csv.get_prices_for_state("NSW"))
+        assert series.price_total() == 3_000_000
+        assert loader.get_prices_for_state("NSW") is series
+        assert loader.partitions.loaded_states() == ["NSW"]
+        assert loader.get_prices_for_state("WA") is None
+
+    def test_states_outside_the_table_are_skipped(self, partition_dir):
+        loader = DataLoader(partition_dir, states=StateTable(["NSW", "QLD"])).load()
+
+        assert loader.get_available_states() == ["NSW"]
+        assert loader.record_count == 2
+        assert loader.get_prices_for_state("VIC") is None
+        with pytest.raises(DataLoadError, match="unknown state 'VIC'"):
+            DataLoader(partition_dir, states=StateTable(["NSW"], strict=True)).load()
+
+    def test_version_matches_unpartitioned(self, sample_csv, partition_dir):
+        assert DataLoader(partition_dir).load().version == DataLoader(sample_csv).load().version
+
+    def test_memory_budget_evicts_least_recently_used(self, partition_dir):
+        loader = DataLoader(partition_dir, memory_budget=3 * BYTES_PER_RECORD).load()
+
+        nsw = loader.get_prices_for_state("NSW")
+        loader.get_prices_for_state("VIC")
+
+        assert loader.partitions.loaded_states() == ["VIC"]
+        assert loader.partitions.evictions == 1
+        assert loader.partitions.loaded_bytes == 2 * BYTES_PER_RECORD
+        # Evicted series stay usable by whoever still holds them.
+        assert nsw.price_total() == 3_000_000
+
+        loader.get_prices_for_state("NSW")
+        assert loader.partitions.loads == 3
+
+    def test_cached_results_do_not_reload_evicted_states(self, partition_dir):
+        loader = DataLoader(partition_dir, memory_budget=1).load()
+        service = PriceService(loader)
+
+        for state in ("NSW", "VIC", "NSW", "VIC", "NSW"):
+            service.get_mean_price(state)
+
+        assert service.cache_stats["results"].hits == 3
+        assert loader.partitions.loads == 2
+        assert loader.partitions.evictions == 1
+
+    def test_loading_a_state_does_not_block_others(self, partition_dir, monkeypatch):
+        loader = DataLoader(partition_dir).load()
+        store = loader.partitions
+        load = store._load
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_load(state, entry):
+            if state == "NSW":
+                started.set()
+                release.wait(5)
+            return load(state, entry)
+
+        monkeypatch.setattr(store, "_load", slow_load)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(store.get("NSW"))) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+
+        assert store.get("VIC") is not None
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert results[0] is results[1]
+        assert store.loaded_states() == ["VIC", "NSW"]
+        assert store.loads == 2
+
+    def test_by_month(self, months_csv, tmp_path):
+        directory = tmp_path / "monthly"
+        from_csv = DataLoader(months_csv).load()
+        from_csv.save_partitions(directory, by_month=True)
+
+        manifest = read_manifest(directory)
+        files = [p.file.split(".")[0] for p in manifest.states["NSW"].partitions]
+        assert files == ["NSW-2025-01", "NSW-2025-02", "NSW-2025-12", "NSW-2026-01"]
+
+        loader = DataLoader(directory).load()
+        series = loader.get_prices_for_state("NSW")
+        assert list(series) == list(from_csv.get_prices_for_state("NSW"))
+        assert series.range_total(1, 3) == 5_000_000
+        assert loader.version == from_csv.version
+
+    def test_refresh_keeps_unchanged_states(self, sample_csv, partition_dir):
+        loader = DataLoader(partition_dir).load()
+        vic = loader.get_prices_for_state("VIC")
+
+        with open(sample_csv, "a") as f:
+            f.write("NSW,300.00,2025-01-01 01:00:00\n")
+        DataLoader(sample_csv).load().save_partitions(partition_dir)
+
+        refreshed, changed = loader.refresh()
+
+        assert changed == {"NSW"}
+        assert refreshed.get_record_counts() == {"NSW": 3, "VIC": 2}
+        assert refreshed.partitions.loaded_states() == ["VIC"]
+        assert refreshed.get_prices_for_state("VIC") is vic
+        assert refreshed.refresh() == (refreshed, frozenset())
+
+    def test_invalid_manifest(self, partition_dir):
+        manifest = partition_dir / "manifest.json"
+        manifest.write_text(json.dumps({"format": 99}))
+
+        with pytest.raises(DataLoadError, match="Unsupported manifest format"):
+            DataLoader(partition_dir).load()
+
+
+class TestPartitionedApp:
+    def test_states_and_health_without_loading(self, partition_dir, monkeypatch):
+        monkeypatch.setattr("app.config.TestingConfig.DATA_FILE", partition_dir)
+        app = create_app("testing")
+        client = app.test_client()
+
+        assert client.get("/api/v1/states").get_json() == {"states": ["NSW", "VIC"]}
+        assert client.get("/api/v1/health").get_json()["record_count"] == 4
+
+        service: PriceService = app.config["PRICE_SERVICE"]
+        assert service.loads_lazily
+        assert service._backend.loader.partitions.loaded_states() == []
+
+        response = client.get("/api/v1/prices/mean?state=VIC")
+        assert response.get_json()["mean_price"] == 50.0
+        assert service._backend.loader.partitions.loaded_states() == ["VIC"]
+
+    def test_build_partitions_command(self, app, sample_csv, tmp_path):
+        destination = tmp_path / "out"
+
+        result = app.test_cli_runner().invoke(
+            args=["build-partitions", str(sample_csv), str(destination), "--by-month"]
+        )
+
+        assert result.exit_code == 0
+        assert "Wrote 4 records" in result.output
+        assert DataLoader(destination).load().get_record_counts() == {"NSW": 2, "VIC": 2}
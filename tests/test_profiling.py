@@ -0,0 +1,120 @@
+import json
+import logging
+
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.profiling import PROFILE_FILE_HEADER, SPAN_LOGGER, span
+
+MEAN_URL = "/api/v1/prices/mean?state=NSW&from=2025-06-25T00:00:00"
+
+
+@pytest.fixture(autouse=True)
+def restore_span_level():
+    logger = logging.getLogger(SPAN_LOGGER)
+    level = logger.level
+    yield
+    logger.setLevel(level)
+
+
+def _spans(caplog):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.name == SPAN_LOGGER]
+
+
+class TestSpans:
+    def test_disabled_by_default(self, caplog):
+        caplog.set_level(logging.INFO)
+        client = create_app("testing").test_client()
+
+        assert client.get(MEAN_URL).status_code == 200
+        assert _spans(caplog) == []
+
+    def test_request_load_query_and_serialisation_spans(self, monkeypatch, caplog):
+        monkeypatch.setattr(TestingConfig, "TRACE_SPANS", True)
+        caplog.set_level(logging.INFO)
+        client = create_app("testing").test_client()
+
+        loaded = [entry for entry in _spans(caplog) if entry["span"].startswith("load.")]
+        assert [entry["span"] for entry in loaded] == ["load.parse", "load.index"]
+        assert all(entry["records"] > 0 and "trace" not in entry for entry in loaded)
+
+        caplog.clear()
+        client.get(MEAN_URL)
+        client.get(MEAN_URL.replace("NSW", "nsw"))
+
+        spans = _spans(caplog)
+        first, second = spans[:4], spans[4:]
+        assert [entry["span"] for entry in first] == [
+            "query.compute",
+            "query",
+            "json.dump",
+            "request",
+        ]
+        assert [entry["span"] for entry in second] == ["query", "json.dump", "request"]
+        assert len({entry["trace"] for entry in first}) == 1
+        assert len({entry["trace"] for entry in second}) == 1
+        assert first[0]["trace"] != second[0]["trace"]
+        assert (first[1]["cached"], second[0]["cached"]) == (False, True)
+        assert first[1]["statistic"] == "mean" and first[1]["state"] == "NSW"
+        assert first[2]["bytes"] > 0
+        assert first[3]["endpoint"] == "prices.get_mean_price"
+        assert first[3]["status"] == 200
+
+    def test_queries_skip_spans_when_disabled(self, monkeypatch):
+        client = create_app("testing").test_client()
+        logging.getLogger(SPAN_LOGGER).setLevel(logging.WARNING)
+
+        def no_span(*args, **kwargs):
+            raise AssertionError("span created while tracing is off")
+
+        monkeypatch.setattr("app.services.price_service.span", no_span)
+        assert client.get(MEAN_URL).status_code == 200
+        with span("idle", key="a") as fields:
+            fields["attempt"] = 1
+
+    def test_span_logs_failures(self, caplog):
+        caplog.set_level(logging.INFO)
+        logging.getLogger(SPAN_LOGGER).setLevel(logging.INFO)
+
+        with pytest.raises(KeyError), span("lookup", key="a") as fields:
+            fields["attempt"] = 1
+            raise KeyError("a")
+
+        [entry] = _spans(caplog)
+        assert entry["span"] == "lookup"
+        assert (entry["key"], entry["attempt"]) == ("a", 1)
+        assert entry["ms"] >= 0
+
+
+class TestRequestProfiling:
+    def test_returns_a_report(self, monkeypatch):
+        monkeypatch.setattr(TestingConfig, "PROFILING_ENABLED", True)
+        client = create_app("testing").test_client()
+
+        response = client.get(MEAN_URL, headers={"X-Profile": "1"})
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        assert "function calls" in response.get_data(as_text=True)
+        assert client.get(MEAN_URL).is_json
+
+    def test_writes_profiles_to_a_directory(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(TestingConfig, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(TestingConfig, "PROFILE_DIR", str(tmp_path / "profiles"))
+        client = create_app("testing").test_client()
+
+        response = client.get(MEAN_URL, headers={"X-Profile": "1"})
+
+        assert response.is_json
+        path = response.headers[PROFILE_FILE_HEADER]
+        assert path.startswith(str(tmp_path / "profiles" / "prices.get_mean_price-"))
+        assert (tmp_path / "profiles").exists()
+
+    def test_ignored_unless_enabled(self):
+        client = create_app("testing").test_client()
+
+        response = client.get(MEAN_URL, headers={"X-Profile": "1"})
+
+        assert response.is_json
+        assert PROFILE_FILE_HEADER not in response.headers
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from app.services.rolling import rolling_max, rolling_min, rolling_sums
+
+
+def _chunks(prices, size):
+    timestamps = [i * 1800 for i in range(len(prices))]
+    return [(timestamps[i : i + size], prices[i : i + size]) for i in range(0, len(prices), size)]
+
+
+@pytest.fixture
+def prices():
+    rng = random.Random(7)
+    return [rng.randrange(-5_000, 200_000) for _ in range(300)]
+
+
+class TestRollingWindows:
+    @pytest.mark.parametrize("window", [1, 2, 48, 300])
+    def test_sums_match_brute_force(self, prices, window):
+        expected = [
+            (
+                i * 1800,
+                sum(prices[i - window + 1 : i + 1]),
+                sum(p * p for p in prices[i - window + 1 : i + 1]),
+            )
+            for i in range(window - 1, len(prices))
+        ]
+
+        assert list(rolling_sums(_chunks(prices, 7), window)) == expected
+
+    @pytest.mark.parametrize("window", [1, 3, 48, 300])
+    def test_extremes_match_brute_force(self, prices, window):
+        windows = [
+            (i * 1800, prices[i - window + 1 : i + 1]) for i in range(window - 1, len(prices))
+        ]
+
+        assert list(rolling_min(_chunks(prices, 64), window)) == [(t, min(w)) for t, w in windows]
+        assert list(rolling_max(_chunks(prices, 64), window)) == [(t, max(w)) for t, w in windows]
+
+    def test_repeated_prices(self):
+        prices = [5, 5, 5, 1, 1, 9, 9, 9]
+
+        assert [p for _, p in rolling_min(_chunks(prices, 3), 3)] == [5, 1, 1, 1, 1, 9]
+        assert [p for _, p in rolling_max(_chunks(prices, 3), 3)] == [5, 5, 5, 9, 9, 9]
+
+    def test_fewer_records_than_the_window(self):
+        assert list(rolling_sums(_chunks([1, 2], 1), 3)) == []
+        assert list(rolling_max(_chunks([1, 2], 1), 3)) == []
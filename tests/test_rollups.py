@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from app.data.data_loader import DataLoader, to_epoch
+from app.services.rollups import DAY, RollupBuckets, StateRollups
+
+
+def _series(tmp_path, rows):
+    csv_path = tmp_path / "rollups.csv"
+    csv_path.write_text("state,price,timestamp\n" + "".join(f"NSW,{p},{t}\n" for p, t in rows))
+    return DataLoader(csv_path).load().get_prices_for_state("NSW")
+
+
+class TestRollupBuckets:
+    def test_hourly_buckets(self, tmp_path):
+        series = _series(
+            tmp_path,
+            [
+                ("10.00", "2025-01-01 00:00:00"),
+                ("-20.00", "2025-01-01 00:30:00"),
+                ("30.00", "2025-01-01 02:00:00"),
+            ],
+        )
+
+        hourly = RollupBuckets.from_series(series, 3600)
+
+        assert list(hourly.starts) == [
+            to_epoch(datetime(2025, 1, 1, 0)),
+            to_epoch(datetime(2025, 1, 1, 2)),
+        ]
+        assert list(hourly.counts) == [2, 1]
+        assert list(hourly.totals) == [-100_000, 300_000]
+        assert list(hourly.minimums) == [-200_000, 300_000]
+        assert list(hourly.maximums) == [100_000, 300_000]
+
+    def test_coarser_intervals_merge_finer_ones(self, tmp_path):
+        series = _series(
+            tmp_path,
+            [
+                ("1.00", "2025-01-05 23:30:00"),  # Sunday
+                ("2.00", "2025-01-06 00:00:00"),  # Monday
+                ("3.00", "2025-01-06 12:00:00"),
+            ],
+        )
+
+        rollups = StateRollups.from_series(series)
+
+        assert list(rollups.day.counts) == [1, 2]
+        assert list(rollups.day.totals) == [10_000, 50_000]
+        assert list(rollups.week.starts) == [
+            to_epoch(datetime(2024, 12, 30)),
+            to_epoch(datetime(2025, 1, 6)),
+        ]
+        assert all(start % DAY == 0 for start in rollups.week.starts)
+        assert list(rollups.week.counts) == [1, 2]
+        assert list(rollups.week.minimums) == [10_000, 20_000]
+
+    def test_window(self, tmp_path):
+        series = _series(
+            tmp_path,
+            [("1.00", "2025-01-01 00:00:00"), ("2.00", "2025-01-02 00:00:00")],
+        )
+        daily = StateRollups.from_series(series).day
+
+        assert daily.window(to_epoch(datetime(2025, 1, 2)), None) == (1, 2)
+        assert daily.window(None, to_epoch(datetime(2025, 1, 2))) == (0, 1)
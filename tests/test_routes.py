@@ -1,3 +1,13 @@
+import gzip
+import json
+
+import pytest
+from flask import jsonify
+
+from app.data.states import StateTable
+from app.services.price_service import PriceService
+
+
 class TestMeanPriceEndpoint:
     def test_valid_state(self, client):
         response = client.get("/api/v1/prices/mean?state=NSW")
@@ -19,6 +29,18 @@ class TestMeanPriceEndpoint:
         prices = [r.get_json()["mean_price"] for r in responses]
         assert len(set(prices)) == 1
 
+    def test_state_aliases(self, app, data_loader):
+        app.config["PRICE_SERVICE"] = PriceService(
+            data_loader, states=StateTable.from_config(app.config)
+        )
+        client = app.test_client()
+
+        response = client.get("/api/v1/prices/mean?state=New%20South%20Wales")
+        assert response.status_code == 200
+        assert response.get_json()["state"] == "NSW"
+        assert client.get("/api/v1/prices/spread?a=victoria&b=VIC").status_code == 400
+        assert client.get("/api/v1/prices/mean?state=Tasmania").status_code == 404
+
     def test_missing_state_parameter(self, client):
         response = client.get("/api/v1/prices/mean")
 
@@ -61,6 +83,394 @@ class TestMeanPriceEndpoint:
 
         assert response.status_code == 400
 
+    def test_time_range(self, client):
+        response = client.get(
+            "/api/v1/prices/mean?state=VIC&from=2025-01-01T00:00:00&to=2025-01-01T00:30:00"
+        )
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["mean_price"] == 150.0
+        assert data["record_count"] == 1
+        assert data["from"] == "2025-01-01T00:00:00"
+        assert data["to"] == "2025-01-01T00:30:00"
+
+    def test_invalid_range_timestamp(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW&from=yesterday")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+    def test_timezone_offset_rejected(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW&from=2025-01-01T00:00:00%2B10:00")
+
+        assert response.status_code == 400
+
+    def test_inverted_range(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW&from=2025-01-02&to=2025-01-01")
+
+        assert response.status_code == 400
+
+    def test_empty_range(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW&from=2030-01-01")
+
+        assert response.status_code == 404
+
+
+class TestBatchMeanPrice:
+    def test_comma_separated_states(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW,vic,QLD")
+
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert [r["state"] for r in results] == ["NSW", "VIC", "QLD"]
+        assert results[0]["mean_price"] == 150.0
+        assert results[1]["mean_price"] == 50.0
+        assert results[2]["status"] == 404
+        assert "Available states" in results[2]["error"]
+
+    def test_comma_separated_states_share_range(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW,VIC&from=2025-01-01T00:30:00")
+
+        results = response.get_json()["results"]
+        assert [r["mean_price"] for r in results] == [200.0, -50.0]
+        assert all(r["from"] == "2025-01-01T00:30:00" for r in results)
+
+    def test_comma_separated_invalid_range(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW,VIC&from=soon")
+
+        assert response.status_code == 400
+
+    def test_post_batch(self, client):
+        response = client.post(
+            "/api/v1/prices/mean/batch",
+            json={
+                "queries": [
+                    {"state": "NSW", "to": "2025-01-01T00:30:00"},
+                    {"state": "VIC"},
+                    {"state": "N$W"},
+                    {"state": "VIC", "from": "2026-01-01T00:00:00"},
+                    {"state": 5},
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert results[0] == {
+            "state": "NSW",
+            "mean_price": 100.0,
+            "record_count": 1,
+            "to": "2025-01-01T00:30:00",
+        }
+        assert results[1]["mean_price"] == 50.0
+        assert results[2]["status"] == 400
+        assert results[3]["status"] == 404
+        assert results[4]["status"] == 400
+
+    def test_post_batch_invalid_body(self, client):
+        response = client.post("/api/v1/prices/mean/batch", json=["NSW"])
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+    def test_post_batch_too_many_queries(self, client, app):
+        app.config["MAX_BATCH_QUERIES"] = 2
+
+        response = client.post(
+            "/api/v1/prices/mean/batch", json={"queries": [{"state": "NSW"}] * 3}
+        )
+
+        assert response.status_code == 400
+
+
+class TestAggregateEndpoint:
+    def test_daily_aggregate(self, client):
+        response = client.get("/api/v1/prices/aggregate?state=vic&interval=day")
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["state"] == "VIC"
+        assert data["interval"] == "day"
+        assert data["buckets"] == [
+            {
+                "start": "2025-01-01T00:00:00",
+                "record_count": 2,
+                "mean_price": 50.0,
+                "min_price": -50.0,
+                "max_price": 150.0,
+            }
+        ]
+
+    def test_defaults_to_daily(self, client):
+        response = client.get("/api/v1/prices/aggregate?state=NSW")
+
+        assert response.get_json()["interval"] == "day"
+
+    def test_invalid_interval(self, client):
+        response = client.get("/api/v1/prices/aggregate?state=NSW&interval=month")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+    def test_unknown_state(self, client):
+        response = client.get("/api/v1/prices/aggregate?state=UNKNOWN")
+
+        assert response.status_code == 404
+
+    def test_missing_state(self, client):
+        response = client.get("/api/v1/prices/aggregate?interval=day")
+
+        assert response.status_code == 400
+
+
+class TestStatsEndpoint:
+    def test_default_percentiles(self, client):
+        response = client.get("/api/v1/prices/stats?state=VIC")
+
+        assert response.status_code == 200
+        assert response.get_json() == {
+            "state": "VIC",
+            "record_count": 2,
+            "mean_price": 50.0,
+            "std_price": 100.0,
+            "min_price": -50.0,
+            "max_price": 150.0,
+            "percentiles": {"5": -50.0, "50": -50.0, "95": 150.0, "99": 150.0},
+            "exact": True,
+        }
+
+    def test_custom_percentiles_and_range(self, client):
+        response = client.get(
+            "/api/v1/prices/stats?state=NSW&percentiles=50,99.5,50&from=2025-01-01T00:00:00"
+        )
+
+        data = response.get_json()
+        assert data["percentiles"] == {"50": 100.0, "99.5": 200.0}
+        assert data["from"] == "2025-01-01T00:00:00"
+
+    @pytest.mark.parametrize(
+        "percentiles", ["abc", "-1", "100.5", ",".join(str(i) for i in range(21))]
+    )
+    def test_invalid_percentiles(self, client, percentiles):
+        response = client.get(f"/api/v1/prices/stats?state=NSW&percentiles={percentiles}")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+    def test_empty_range(self, client):
+        response = client.get("/api/v1/prices/stats?state=NSW&to=2024-01-01T00:00:00")
+
+        assert response.status_code == 404
+
+
+class TestExportEndpoint:
+    def test_csv(self, client):
+        response = client.get("/api/v1/prices/export?state=nsw")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        assert response.is_streamed
+        assert response.headers["Content-Disposition"] == 'attachment; filename="NSW.csv"'
+        assert response.get_data(as_text=True) == (
+            "state,price,timestamp\n"
+            "NSW,100.00,2025-01-01 00:00:00\n"
+            "NSW,200.00,2025-01-01 00:30:00\n"
+        )
+
+    def test_ndjson_with_range(self, client):
+        response = client.get(
+            "/api/v1/prices/export?state=VIC&format=ndjson&from=2025-01-01T00:30:00"
+        )
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert response.mimetype == "application/x-ndjson"
+        assert [json.loads(line) for line in lines] == [
+            {"state": "VIC", "timestamp": "2025-01-01T00:30:00", "price": -50.0}
+        ]
+
+    def test_gzip(self, client):
+        response = client.get(
+            "/api/v1/prices/export?state=VIC", headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert gzip.decompress(response.get_data()).decode().splitlines()[1:] == [
+            "VIC,150.00,2025-01-01 00:00:00",
+            "VIC,-50.00,2025-01-01 00:30:00",
+        ]
+
+    def test_conditional_request(self, client):
+        etag = client.get("/api/v1/prices/export?state=VIC").headers["ETag"]
+
+        response = client.get("/api/v1/prices/export?state=VIC", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_gzip_body_has_its_own_etag(self, client):
+        identity = client.get("/api/v1/prices/export?state=VIC").headers["ETag"]
+        response = client.get(
+            "/api/v1/prices/export?state=VIC", headers={"Accept-Encoding": "gzip"}
+        )
+        etag = response.headers["ETag"]
+
+        assert etag != identity
+        gzip_headers = {"Accept-Encoding": "gzip", "If-None-Match": identity}
+        assert (
+            client.get("/api/v1/prices/export?state=VIC", headers=gzip_headers).status_code == 200
+        )
+
+        response = client.get(
+            "/api/v1/prices/export?state=VIC",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_unknown_state_with_matching_etag(self, client):
+        etag = client.get("/api/v1/prices/export?state=VIC").headers["ETag"]
+
+        response = client.get("/api/v1/prices/export?state=XYZ", headers={"If-None-Match": etag})
+
+        assert response.status_code == 404
+
+    def test_json_pages(self, client):
+        first = client.get("/api/v1/prices/export?state=NSW&format=json&limit=1").get_json()
+
+        assert first == {
+            "state": "NSW",
+            "records": [{"timestamp": "2025-01-01T00:00:00", "price": 100.0}],
+            "next_cursor": "2025-01-01T00:00:00",
+        }
+
+        second = client.get(
+            f"/api/v1/prices/export?state=NSW&format=json&limit=1&cursor={first['next_cursor']}"
+        ).get_json()
+
+        assert second["records"] == [{"timestamp": "2025-01-01T00:30:00", "price": 200.0}]
+        assert second["next_cursor"] is None
+
+    @pytest.mark.parametrize(
+        "query", ["format=xml", "format=json&limit=0", "format=json&limit=abc", "cursor=bad"]
+    )
+    def test_invalid_arguments(self, client, query):
+        response = client.get(f"/api/v1/prices/export?state=NSW&{query}&format=json")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+    def test_unknown_state(self, client):
+        assert client.get("/api/v1/prices/export?state=WA").status_code == 404
+
+
+class TestSeriesEndpoint:
+    def test_short_range_is_returned_whole(self, client):
+        response = client.get("/api/v1/prices/series?state=vic&points=3")
+
+        assert response.status_code == 200
+        assert response.get_json() == {
+            "state": "VIC",
+            "method": "lttb",
+            "record_count": 2,
+            "points": [
+                {"timestamp": "2025-01-01T00:00:00", "price": 150.0},
+                {"timestamp": "2025-01-01T00:30:00", "price": -50.0},
+            ],
+        }
+
+    def test_method_and_range(self, client):
+        response = client.get(
+            "/api/v1/prices/series?state=NSW&method=minmax&from=2025-01-01T00:30:00"
+        )
+
+        data = response.get_json()
+        assert data["method"] == "minmax"
+        assert data["from"] == "2025-01-01T00:30:00"
+        assert [p["price"] for p in data["points"]] == [200.0]
+
+    @pytest.mark.parametrize(
+        "query", ["state=NSW&points=2", "state=NSW&points=many", "state=NSW&method=mean"]
+    )
+    def test_invalid_parameters(self, client, query):
+        response = client.get(f"/api/v1/prices/series?{query}")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+
+class TestRollingEndpoint:
+    def test_rolling_mean(self, client):
+        response = client.get("/api/v1/prices/rolling?state=vic&window=2")
+
+        assert response.status_code == 200
+        assert response.get_json() == {
+            "state": "VIC",
+            "window": 2,
+            "stat": "mean",
+            "record_count": 2,
+            "points": [{"timestamp": "2025-01-01T00:30:00", "value": 50.0}],
+        }
+
+    def test_stat_and_range(self, client):
+        response = client.get(
+            "/api/v1/prices/rolling?state=NSW&window=1&stat=MAX&from=2025-01-01T00:30:00"
+        )
+
+        data = response.get_json()
+        assert (data["stat"], data["from"]) == ("max", "2025-01-01T00:30:00")
+        assert data["points"] == [{"timestamp": "2025-01-01T00:30:00", "value": 200.0}]
+
+    @pytest.mark.parametrize(
+        "query", ["state=NSW&window=0", "state=NSW&window=day", "state=NSW&stat=median", "window=2"]
+    )
+    def test_invalid_parameters(self, client, query):
+        response = client.get(f"/api/v1/prices/rolling?{query}")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+
+class TestSpreadEndpoint:
+    def test_spread(self, client):
+        response = client.get("/api/v1/prices/spread?a=nsw&b=VIC")
+
+        assert response.status_code == 200
+        assert response.get_json() == {
+            "a": "NSW",
+            "b": "VIC",
+            "matched": 2,
+            "missing": {"a": 0, "b": 0},
+            "mean_spread": 100.0,
+            "min_spread": -50.0,
+            "max_spread": 250.0,
+            "correlation": -1.0,
+            "intervals": [
+                {
+                    "timestamp": "2025-01-01T00:00:00",
+                    "a_price": 100.0,
+                    "b_price": 150.0,
+                    "spread": -50.0,
+                },
+                {
+                    "timestamp": "2025-01-01T00:30:00",
+                    "a_price": 200.0,
+                    "b_price": -50.0,
+                    "spread": 250.0,
+                },
+            ],
+        }
+
+    @pytest.mark.parametrize("query", ["a=NSW", "b=NSW", "a=NSW&b=nsw", "a=NSW&b=V1C"])
+    def test_invalid_parameters(self, client, query):
+        response = client.get(f"/api/v1/prices/spread?{query}")
+
+        assert response.status_code == 400
+        assert "hint" in response.get_json()
+
+    def test_unknown_state(self, client):
+        assert client.get("/api/v1/prices/spread?a=NSW&b=WA").status_code == 404
+
 
 class TestStatesEndpoint:
     def test_list_states(self, client):
@@ -73,6 +483,88 @@ class TestStatesEndpoint:
         assert set(data["states"]) == {"NSW", "VIC"}
 
 
+class TestHttpCaching:
+    def test_validators_and_cache_control(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW")
+
+        assert response.status_code == 200
+        assert (
+            response.headers["ETag"] == f'"{client.get("/api/v1/health").json["dataset_version"]}"'
+        )
+        assert response.headers["Last-Modified"]
+        assert "public" in response.headers["Cache-Control"]
+        assert "max-age=60" in response.headers["Cache-Control"]
+
+    def test_if_none_match_returns_304(self, client):
+        etag = client.get("/api/v1/prices/mean?state=NSW").headers["ETag"]
+
+        response = client.get("/api/v1/prices/mean?state=NSW", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_stale_etag_returns_body(self, client):
+        response = client.get("/api/v1/prices/mean?state=NSW", headers={"If-None-Match": '"old"'})
+
+        assert response.status_code == 200
+        assert response.get_json()["state"] == "NSW"
+
+    def test_body_matches_jsonify(self, app, client):
+        response = client.get("/api/v1/prices/mean?state=nsw")
+
+        with app.app_context():
+            expected = jsonify({"state": "NSW", "mean_price": 150.0, "record_count": 2}).data
+        assert response.data == expected
+
+    def test_whole_history_body_is_serialized_once(self, app, client):
+        client.get("/api/v1/prices/mean?state=NSW")
+        version, bodies = app.extensions["serialized_responses"]._entry
+        body = bodies["mean:NSW"]
+
+        client.get("/api/v1/prices/mean?state=nsw")
+
+        assert app.extensions["serialized_responses"]._entry[1]["mean:NSW"] is body
+
+    def test_range_and_aggregate_responses_are_conditional(self, client):
+        for url in (
+            "/api/v1/prices/mean?state=NSW&from=2025-01-01T00:30:00",
+            "/api/v1/prices/aggregate?state=NSW&interval=hour",
+            "/api/v1/states",
+        ):
+            etag = client.get(url).headers["ETag"]
+            assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    def test_etag_changes_after_reload(self, app, client, sample_csv):
+        etag = client.get("/api/v1/prices/mean?state=NSW").headers["ETag"]
+        with open(sample_csv, "a") as f:
+            f.write("NSW,600.00,2025-01-01 01:00:00\n")
+        app.config["PRICE_SERVICE"].reload()
+
+        response = client.get("/api/v1/prices/mean?state=NSW", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.get_json()["mean_price"] == 300.0
+
+    def test_errors_are_not_cacheable(self, client):
+        response = client.get("/api/v1/prices/mean?state=UNKNOWN")
+
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+    def test_matching_etag_does_not_hide_errors(self, client):
+        etag = client.get("/api/v1/prices/mean?state=NSW").headers["ETag"]
+
+        for url in (
+            "/api/v1/prices/mean?state=UNKNOWN",
+            "/api/v1/prices/stats?state=UNKNOWN",
+            "/api/v1/prices/mean?state=NSW&from=2030-01-01",
+            "/api/v1/prices/spread?a=NSW&b=UNKNOWN",
+        ):
+            assert client.get(url, headers={"If-None-Match": etag}).status_code == 404
+
+
 class TestHealthEndpoint:
     def test_health_check(self, client):
         response = client.get("/api/v1/health")
@@ -82,3 +574,4 @@ class TestHealthEndpoint:
         assert data["status"] == "healthy"
         assert "record_count" in data
         assert isinstance(data["record_count"], int)
+        assert isinstance(data["dataset_version"], str)
@@ -1,11 +1,25 @@
-from datetime import datetime
-from decimal import Decimal
+import random
+import statistics
+import threading
+import time
+from datetime import UTC, datetime
+from decimal import ROUND_HALF_UP, Decimal
 from unittest.mock import Mock
 
 import pytest
 
-from app.data.data_loader import PriceRecord
-from app.services.price_service import PriceService, PriceStatistics, StateNotFoundError
+from app.data.data_loader import DataLoader, PriceRecord, PriceSeries
+from app.data.states import StateTable
+from app.services.price_service import (
+    MeanPriceQuery,
+    NoPricesInRangeError,
+    PriceService,
+    PriceStatistics,
+    SeriesPoint,
+    StateNotFoundError,
+)
+from app.services.reloader import DatasetReloader
+from app.services.rollups import StateRollups
 
 
 class TestPriceService:
@@ -56,9 +70,9 @@ class TestPriceService:
     def test_decimal_precision(self):
         # Create mock loader with values that would cause float error
         mock_loader = Mock()
-        mock_loader.get_prices_for_state.return_value = [
-            PriceRecord("TEST", Decimal("0.1"), datetime.now()) for _ in range(10)
-        ]
+        mock_loader.get_prices_for_state.return_value = PriceSeries.from_records(
+            "TEST", [PriceRecord("TEST", Decimal("0.1"), datetime.now()) for _ in range(10)]
+        )
         mock_loader.get_available_states.return_value = ["TEST"]
 
         service = PriceService(mock_loader)
@@ -67,6 +81,536 @@ class TestPriceService:
         # With floats this would be 0.09999... not 0.10
         assert stats.mean == Decimal("0.10")
 
+    def test_mean_price_for_range(self, price_service):
+        stats = price_service.get_mean_price("NSW", start=datetime(2025, 1, 1, 0, 30))
+
+        assert stats.mean == Decimal("200.00")
+        assert stats.record_count == 1
+
+    def test_range_end_is_exclusive(self, price_service):
+        stats = price_service.get_mean_price("VIC", end=datetime(2025, 1, 1, 0, 30))
+
+        assert stats.mean == Decimal("150.00")
+        assert stats.record_count == 1
+
+    def test_range_not_cached(self, price_service):
+        price_service.get_mean_price("NSW", start=datetime(2025, 1, 1, 0, 30))
+
+        assert price_service.get_mean_price("NSW").mean == Decimal("150.00")
+
+    def test_empty_range(self, price_service):
+        with pytest.raises(NoPricesInRangeError):
+            price_service.get_mean_price("NSW", start=datetime(2026, 1, 1))
+
+    def test_range_matches_decimal_rounding(self, tmp_path):
+        csv_path = tmp_path / "rounding.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "SA,0.01,2025-01-01 00:00:00\n"
+            "SA,0.02,2025-01-01 00:30:00\n"
+            "SA,-0.005,2025-01-01 01:00:00\n"
+            "SA,10.00,2025-01-01 01:30:00\n"
+        )
+        service = PriceService(DataLoader(csv_path).load())
+
+        stats = service.get_mean_price(
+            "SA", start=datetime(2025, 1, 1, 0, 0), end=datetime(2025, 1, 1, 1, 30)
+        )
+
+        expected = (Decimal("0.01") + Decimal("0.02") + Decimal("-0.005")) / 3
+        assert stats.mean == expected.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    def test_get_mean_prices(self, price_service):
+        results = price_service.get_mean_prices(
+            [
+                MeanPriceQuery("NSW"),
+                MeanPriceQuery("UNKNOWN"),
+                MeanPriceQuery("VIC", start=datetime(2025, 1, 1, 0, 30)),
+                MeanPriceQuery("VIC", start=datetime(2030, 1, 1)),
+            ]
+        )
+
+        assert results[0] == PriceStatistics(Decimal("150.00"), 2, "NSW")
+        assert isinstance(results[1], StateNotFoundError)
+        assert results[2] == PriceStatistics(Decimal("-50.00"), 1, "VIC")
+        assert isinstance(results[3], NoPricesInRangeError)
+
+    def test_interval_statistics(self, price_service):
+        buckets = price_service.get_interval_statistics("VIC", "hour")
+
+        assert len(buckets) == 1
+        assert buckets[0].start == datetime(2025, 1, 1, 0, 0)
+        assert buckets[0].record_count == 2
+        assert buckets[0].mean == Decimal("50.00")
+        assert buckets[0].minimum == Decimal("-50.00")
+        assert buckets[0].maximum == Decimal("150.00")
+
+    def test_interval_statistics_are_built_once(self, price_service, monkeypatch):
+        calls = []
+        build = StateRollups.from_series
+        monkeypatch.setattr(
+            StateRollups, "from_series", lambda series: calls.append(series) or build(series)
+        )
+
+        price_service.get_interval_statistics("NSW", "day")
+        price_service.get_interval_statistics("NSW", "week")
+        price_service.get_interval_statistics("NSW", "day", end=datetime(2025, 2, 1))
+
+        assert len(calls) == 1
+
+    def test_interval_statistics_range(self, price_service):
+        assert price_service.get_interval_statistics("NSW", "day", end=datetime(2025, 1, 1)) == []
+
+    def test_interval_statistics_unknown_interval(self, price_service):
+        with pytest.raises(ValueError, match="Unsupported interval"):
+            price_service.get_interval_statistics("NSW", "month")
+
+    def test_interval_statistics_unknown_state(self, price_service):
+        with pytest.raises(StateNotFoundError):
+            price_service.get_interval_statistics("UNKNOWN", "day")
+
+    def test_distribution_statistics(self, price_service):
+        stats = price_service.get_distribution_statistics("vic", [0, 50, 100])
+
+        assert stats.state == "VIC"
+        assert stats.record_count == 2
+        assert stats.mean == Decimal("50.00")
+        assert stats.std == Decimal("100.00")
+        assert stats.minimum == Decimal("-50.00")
+        assert stats.maximum == Decimal("150.00")
+        assert stats.percentiles == {0: Decimal("-50"), 50: Decimal("-50"), 100: Decimal("150")}
+        assert stats.exact
+
+    def test_distribution_std_matches_statistics_module(self, tmp_path):
+        prices = ["12.5", "-3.25", "99.9999", "0", "41.01", "-120"]
+        csv_path = tmp_path / "std.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            + "".join(f"SA,{p},2025-01-01 00:{i:02d}:00\n" for i, p in enumerate(prices))
+        )
+        service = PriceService(DataLoader(csv_path).load())
+
+        stats = service.get_distribution_statistics("SA", [50])
+
+        expected = statistics.pstdev(Decimal(p) for p in prices)
+        assert stats.std == expected.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    def test_distribution_statistics_range(self, price_service):
+        stats = price_service.get_distribution_statistics(
+            "NSW", [50], start=datetime(2025, 1, 1, 0, 15)
+        )
+
+        assert stats.record_count == 1
+        assert stats.std == Decimal("0.00")
+        assert stats.percentiles == {50: Decimal("200")}
+
+    def test_distribution_statistics_empty_range(self, price_service):
+        with pytest.raises(NoPricesInRangeError):
+            price_service.get_distribution_statistics("NSW", [50], end=datetime(2024, 1, 1))
+
+    def test_distribution_statistics_invalid_percentile(self, price_service):
+        with pytest.raises(ValueError, match="between 0 and 100"):
+            price_service.get_distribution_statistics("NSW", [101])
+
+    def test_cache_stats(self, sample_csv):
+        service = PriceService(DataLoader(sample_csv).load())
+        service.get_mean_price("NSW")
+        service.get_mean_price("NSW")
+        service.get_mean_price("VIC")
+        service.get_mean_price("NSW", start=datetime(2025, 1, 1))
+
+        with open(sample_csv, "a") as f:
+            f.write("NSW,300.00,2025-01-01 01:00:00\n")
+        service.reload()
+
+        stats = service.cache_stats["results"]
+        assert (stats.hits, stats.misses, stats.evictions) == (1, 3, 2)
+
+    def test_range_queries_are_cached(self, price_service):
+        start = datetime(2025, 1, 1, 0, 15)
+        first = price_service.get_mean_price("nsw", start=start)
+
+        assert price_service.get_mean_price("NSW ", start=start) is first
+        assert price_service.get_mean_price("NSW", end=start) is not first
+
+    def test_concurrent_misses_compute_once(self, price_service, monkeypatch):
+        calls = []
+        release = threading.Event()
+        backend = price_service._backend
+        range_total = backend.range_total
+
+        def slow_range_total(*args):
+            calls.append(args)
+            release.wait(5)
+            return range_total(*args)
+
+        monkeypatch.setattr(backend, "range_total", slow_range_total)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(price_service.get_mean_price("NSW")))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 4
+        assert all(result is results[0] for result in results)
+
+    def test_queries_during_reloads(self, sample_csv):
+        service = PriceService(DataLoader(sample_csv).load())
+        vic = service.get_distribution_statistics("VIC", [50])
+        stop = threading.Event()
+        errors = []
+
+        def query():
+            try:
+                while not stop.is_set():
+                    nsw = service.get_mean_price("nsw")
+                    assert nsw.mean == Decimal("150.00")
+                    assert service.get_distribution_statistics("VIC", [50]) == vic
+                    assert service.get_interval_statistics("NSW", "day")[0].mean == Decimal(
+                        "150.00"
+                    )
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for minute in range(20):
+            with open(sample_csv, "a") as f:
+                f.write(f"NSW,150.00,2025-01-01 01:{minute:02d}:00\n")
+            assert service.reload() == {"NSW"}
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert service.get_mean_price("NSW").record_count == 22
+
+    def test_load_timings(self, price_service):
+        assert set(price_service.load_timings) == {"parse", "index"}
+        assert price_service.get_record_counts() == {"NSW": 2, "VIC": 2}
+
+    def test_reload_invalidates_only_changed_states(self, sample_csv):
+        service = PriceService(DataLoader(sample_csv).load())
+        nsw = service.get_mean_price("NSW")
+        vic = service.get_mean_price("VIC")
+        version = service.dataset_version
+
+        with open(sample_csv, "a") as f:
+            f.write("NSW,600.00,2025-01-01 01:00:00\n")
+
+        assert service.reload() == {"NSW"}
+        assert service.get_mean_price("VIC") is vic
+        assert service.get_mean_price("NSW").mean == Decimal("300.00")
+        assert nsw.mean == Decimal("150.00")
+        assert service.record_count == 5
+        assert service.dataset_version != version
+
+    def test_reload_without_changes(self, price_service):
+        version = price_service.dataset_version
+
+        assert price_service.reload() == frozenset()
+        assert price_service.dataset_version == version
+
+
+class TestRecordWindow:
+    @pytest.fixture
+    def service(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "NSW,1.00,2025-01-01 00:00:00\n"
+            "NSW,2.00,2025-01-01 00:30:00\n"
+            "NSW,3.00,2025-01-01 00:30:00\n"
+            "NSW,4.00,2025-01-01 01:00:00\n"
+        )
+        return PriceService(DataLoader(csv_path).load())
+
+    def test_whole_history(self, service):
+        window = service.get_record_window("nsw")
+
+        assert window.state == "NSW"
+        assert list(window.prices) == [10_000, 20_000, 30_000, 40_000]
+        assert window.next_cursor is None
+
+    def test_pages_never_split_equal_timestamps(self, service):
+        first = service.get_record_window("NSW", limit=2)
+
+        assert len(first.timestamps) == 3
+        assert first.next_cursor == datetime(2025, 1, 1, 0, 30)
+
+        second = service.get_record_window("NSW", after=first.next_cursor, limit=2)
+        assert list(second.prices) == [40_000]
+        assert second.next_cursor is None
+
+    def test_range_and_cursor(self, service):
+        window = service.get_record_window(
+            "NSW",
+            start=datetime(2025, 1, 1, 0, 30),
+            end=datetime(2025, 1, 1, 1, 0),
+            after=datetime(2025, 1, 1, 0, 0),
+        )
+
+        assert list(window.prices) == [20_000, 30_000]
+
+
+class TestDownsampledSeries:
+    @pytest.fixture
+    def service(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        rows = [
+            f"NSW,{(i * 7) % 23}.00,2025-01-01 {i // 2:02d}:{i % 2 * 30:02d}:00" for i in range(48)
+        ]
+        csv_path.write_text("state,price,timestamp\n" + "\n".join(rows) + "\n")
+        return PriceService(DataLoader(csv_path).load())
+
+    def test_lttb(self, service):
+        series = service.get_downsampled_series("nsw", 10)
+
+        assert series.state == "NSW"
+        assert series.record_count == 48
+        assert len(series.points) == 10
+        assert series.points[0] == SeriesPoint(datetime(2025, 1, 1), Decimal("0.00"))
+        assert series.points[-1].timestamp == datetime(2025, 1, 1, 23, 30)
+        assert service.get_downsampled_series("NSW", 10) is series
+
+    def test_minmax_over_range(self, service):
+        series = service.get_downsampled_series(
+            "NSW", 4, start=datetime(2025, 1, 1, 12), method="minmax"
+        )
+
+        assert series.record_count == 24
+        assert min(p.price for p in series.points) == 0
+        assert max(p.price for p in series.points) == 22
+
+    def test_invalid_arguments(self, service):
+        with pytest.raises(ValueError, match="method"):
+            service.get_downsampled_series("NSW", 10, method="average")
+        with pytest.raises(ValueError, match="At least 3 points"):
+            service.get_downsampled_series("NSW", 2)
+        with pytest.raises(NoPricesInRangeError):
+            service.get_downsampled_series("NSW", 10, start=datetime(2026, 1, 1))
+
+
+class TestRollingStatistics:
+    @pytest.fixture
+    def service(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "SA,10.00,2025-01-01 00:00:00\n"
+            "SA,30.00,2025-01-01 00:30:00\n"
+            "SA,20.00,2025-01-01 01:00:00\n"
+            "SA,-5.50,2025-01-01 01:30:00\n"
+            "SA,40.00,2025-01-01 02:00:00\n"
+        )
+        return PriceService(DataLoader(csv_path).load())
+
+    @pytest.mark.parametrize(
+        ("statistic", "expected"),
+        [
+            ("mean", ["20.00", "14.83", "18.17"]),
+            ("std", ["8.16", "14.95", "18.62"]),
+            ("min", ["10", "-5.5", "-5.5"]),
+            ("max", ["30", "30", "40"]),
+        ],
+    )
+    def test_statistics(self, service, statistic, expected):
+        series = service.get_rolling_statistics("sa", 3, statistic)
+
+        assert (series.state, series.record_count, series.window) == ("SA", 5, 3)
+        assert [point.price for point in series.points] == [Decimal(v) for v in expected]
+        assert [point.timestamp.minute for point in series.points] == [0, 30, 0]
+
+    def test_std_matches_statistics_module(self, service):
+        series = service.get_rolling_statistics("SA", 4, "std")
+
+        assert [float(point.price) for point in series.points] == [
+            round(statistics.pstdev(w), 2) for w in ([10, 30, 20, -5.5], [30, 20, -5.5, 40])
+        ]
+
+    def test_window_stays_inside_the_range(self, service):
+        start = datetime(2025, 1, 1, 1)
+
+        assert [p.price for p in service.get_rolling_statistics("SA", 2, "max", start).points] == [
+            Decimal("20"),
+            Decimal("40"),
+        ]
+        assert service.get_rolling_statistics("SA", 6).points == []
+
+    def test_results_are_cached(self, service):
+        first = service.get_rolling_statistics("SA", 3, "mean")
+
+        assert service.get_rolling_statistics("sa", 3, "mean") is first
+        assert service.get_rolling_statistics("SA", 3, "std") is not first
+
+    def test_errors(self, service):
+        with pytest.raises(ValueError, match="Unsupported rolling statistic"):
+            service.get_rolling_statistics("SA", 3, "median")
+        with pytest.raises(ValueError, match="at least one"):
+            service.get_rolling_statistics("SA", 0)
+        with pytest.raises(StateNotFoundError):
+            service.get_rolling_statistics("WA", 3)
+        with pytest.raises(NoPricesInRangeError):
+            service.get_rolling_statistics("SA", 3, start=datetime(2026, 1, 1))
+
+
+class TestSpreadStatistics:
+    @pytest.fixture
+    def service(self, tmp_path):
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            "VIC,10.00,2025-01-01 00:00:00\n"
+            "VIC,20.00,2025-01-01 00:30:00\n"
+            "VIC,35.00,2025-01-01 01:00:00\n"
+            "VIC,30.00,2025-01-01 01:00:00\n"
+            "VIC,40.00,2025-01-01 01:30:00\n"
+            "SA,15.00,2025-01-01 00:00:00\n"
+            "SA,35.00,2025-01-01 01:00:00\n"
+            "SA,45.50,2025-01-01 01:30:00\n"
+            "SA,50.00,2025-01-01 02:00:00\n"
+        )
+        return PriceService(DataLoader(csv_path).load())
+
+    def test_spread(self, service):
+        stats = service.get_spread_statistics("vic", "sa")
+
+        assert (stats.a, stats.b) == ("VIC", "SA")
+        assert (stats.matched, stats.missing_a, stats.missing_b) == (3, 1, 1)
+        assert stats.mean == Decimal("-5.17")
+        assert (stats.minimum, stats.maximum) == (Decimal("-5.5"), Decimal("-5"))
+        assert stats.correlation == round(
+            Decimal(statistics.correlation([10, 30, 40], [15, 35, 45.5])), 4
+        )
+        assert [i.spread for i in stats.intervals] == [
+            Decimal("-5"),
+            None,
+            Decimal("-5"),
+            Decimal("-5.5"),
+            None,
+        ]
+        assert stats.intervals[1].b is None
+        assert stats.intervals[4].a is None
+
+    def test_range(self, service):
+        stats = service.get_spread_statistics("VIC", "SA", start=datetime(2025, 1, 1, 1))
+
+        assert stats.matched == 2
+        assert [i.timestamp.hour for i in stats.intervals] == [1, 1, 2]
+
+    def test_cached_until_either_state_changes(self, service):
+        stats = service.get_spread_statistics("VIC", "SA")
+
+        assert service.get_spread_statistics("VIC", "SA") is stats
+        assert service.get_spread_statistics("SA", "VIC").mean == -stats.mean
+
+    def test_errors(self, service):
+        with pytest.raises(StateNotFoundError):
+            service.get_spread_statistics("VIC", "WA")
+        with pytest.raises(NoPricesInRangeError):
+            service.get_spread_statistics("VIC", "SA", start=datetime(2025, 1, 1, 2))
+
+
+class TestFixedPointArithmetic:
+    def test_means_match_decimal_arithmetic(self, tmp_path):
+        rng = random.Random(9)
+        rows = []
+        for i in range(2000):
+            price = Decimal(rng.randint(-10_000_000, 175_000_000)).scaleb(-rng.randint(0, 4))
+            rows.append((rng.choice(["NSW", "VIC", "SA"]), price, i * 300))
+
+        csv_path = tmp_path / "prices.csv"
+        csv_path.write_text(
+            "state,price,timestamp\n"
+            + "".join(
+                f"{state},{price},{datetime.fromtimestamp(ts, UTC):%Y-%m-%d %H:%M:%S}\n"
+                for state, price, ts in rows
+            )
+        )
+        service = PriceService(DataLoader(csv_path).load())
+
+        for state in ("NSW", "VIC", "SA"):
+            prices = [price for row_state, price, _ in rows if row_state == state]
+            expected = (sum(prices) / len(prices)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            assert str(service.get_mean_price(state).mean) == str(expected)
+
+
+class TestStateResolution:
+    def test_casings_and_aliases(self, data_loader):
+        service = PriceService(data_loader, states=StateTable(["NSW", "VIC"], {"Victoria": "VIC"}))
+
+        assert service.resolve_state(" nSw") == "NSW"
+        assert service.get_mean_price("VICTORIA").state == "VIC"
+        assert service.canonical_state("WA") is None
+
+    def test_not_found_lists_served_states(self, price_service):
+        with pytest.raises(StateNotFoundError, match=r"State 'wa' not found\. Available states: "):
+            price_service.get_mean_price("wa")
+        assert price_service.get_available_states() is price_service.get_available_states()
+
+    def test_reload_serves_new_states(self, sample_csv):
+        service = PriceService(DataLoader(sample_csv).load())
+        with open(sample_csv, "a") as f:
+            f.write("SA,5.00,2025-01-01 00:00:00\n")
+
+        service.reload()
+
+        assert service.get_available_states() == ["NSW", "SA", "VIC"]
+        assert service.get_mean_price("sa").mean == Decimal("5.00")
+
+
+class TestDatasetReloader:
+    def test_picks_up_appended_rows(self, sample_csv):
+        service = PriceService(DataLoader(sample_csv).load())
+        reloader = DatasetReloader(service, interval=0.01)
+        reloader.start()
+        try:
+            with open(sample_csv, "a") as f:
+                f.write("NSW,600.00,2025-01-01 01:00:00\n")
+
+            deadline = time.monotonic() + 5
+            while service.record_count == 4 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            reloader.stop()
+
+        assert service.record_count == 5
+
+    def test_keeps_polling_after_an_unexpected_error(self, sample_csv, monkeypatch):
+        service = PriceService(DataLoader(sample_csv).load())
+        reload = service.reload
+        calls = []
+
+        def flaky_reload():
+            calls.append(None)
+            if len(calls) == 1:
+                raise OSError("manifest replaced mid-read")
+            return reload()
+
+        monkeypatch.setattr(service, "reload", flaky_reload)
+        with open(sample_csv, "a") as f:
+            f.write("NSW,600.00,2025-01-01 01:00:00\n")
+
+        reloader = DatasetReloader(service, interval=0.01)
+        reloader.start()
+        try:
+            deadline = time.monotonic() + 5
+            while service.record_count == 4 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            reloader.stop()
+
+        assert len(calls) >= 2
+        assert service.record_count == 5
+
 
 class TestPriceStatistics:
     def test_immutable(self):
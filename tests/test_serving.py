@@ -0,0 +1,126 @@
+import gc
+import selectors
+import socket
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from app import gunicorn_conf, gunicorn_threaded
+from app.metrics import memory_usage
+from app.services.reloader import DatasetReloader
+from app.serving import prepare_for_fork, start_worker
+
+SMAPS_ROLLUP = """\
+55ee8bed6000-7fff7726d000 ---p 00000000 00:00 0                          [rollup]
+Rss:                1444 kB
+Pss:                 481 kB
+Shared_Clean:       1300 kB
+Shared_Dirty:          0 kB
+Private_Clean:        40 kB
+Private_Dirty:       104 kB
+"""
+
+
+@pytest.fixture
+def unfreeze():
+    yield
+    gc.unfreeze()
+
+
+class TestMemoryUsage:
+    def test_parses_smaps_rollup(self, tmp_path):
+        path = tmp_path / "smaps_rollup"
+        path.write_text(SMAPS_ROLLUP)
+
+        usage = memory_usage(str(path))
+
+        assert usage is not None
+        assert usage.resident == 1444 * 1024
+        assert usage.proportional == 481 * 1024
+        assert usage.shared == 1300 * 1024
+        assert usage.private == 144 * 1024
+
+    def test_unavailable(self, tmp_path):
+        path = tmp_path / "smaps_rollup"
+        path.write_text("Rss: 10 kB\n")
+
+        assert memory_usage(str(path)) is None
+        assert memory_usage(str(tmp_path / "missing")) is None
+
+
+class TestPreloadedWorkers:
+    def test_prepare_for_fork_warms_indexes_and_freezes(self, app, unfreeze):
+        service = app.config["PRICE_SERVICE"]
+        indexes = service.cache_stats["indexes"]
+
+        prepare_for_fork(app)
+
+        assert gc.get_freeze_count() > 0
+        misses = indexes.misses
+        assert misses == 2 * len(service.get_available_states())
+        service.get_interval_statistics("NSW", "week")
+        service.get_distribution_statistics("VIC", [50])
+        assert indexes.misses == misses
+
+    def test_worker_restarts_the_reloader(self, app, unfreeze):
+        reloader = DatasetReloader(app.config["PRICE_SERVICE"], interval=60)
+        reloader.start()
+        app.config["PRICE_RELOADER"] = reloader
+
+        prepare_for_fork(app)
+        assert not reloader._thread.is_alive()
+
+        start_worker(app)
+        restarted = app.config["PRICE_RELOADER"]
+        try:
+            assert restarted is not reloader
+            assert restarted._thread.is_alive()
+        finally:
+            restarted.stop()
+
+    def test_gunicorn_hooks(self, app, unfreeze):
+        application = SimpleNamespace(wsgi=lambda: app)
+
+        gunicorn_conf.when_ready(SimpleNamespace(app=application))
+        gunicorn_conf.post_fork(None, SimpleNamespace(app=application))
+        gunicorn_conf.post_worker_init(SimpleNamespace(pid=1))
+
+        assert gunicorn_conf.preload_app
+        assert gunicorn_conf.wsgi_app == "app:create_app()"
+
+
+class TestThreadedWorkers:
+    def test_settings(self):
+        assert gunicorn_threaded.preload_app
+        assert gunicorn_threaded.when_ready is gunicorn_conf.when_ready
+        assert gunicorn_threaded.worker_class.endswith(".PollingThreadWorker")
+        assert gunicorn_threaded.worker_connections > gunicorn_threaded.threads
+        assert gunicorn_threaded.keepalive > 60
+
+    def test_new_connections_wait_on_the_poller(self):
+        worker = gunicorn_threaded.PollingThreadWorker.__new__(
+            gunicorn_threaded.PollingThreadWorker
+        )
+        worker.cfg = SimpleNamespace(keepalive=75)
+        worker.nr_conns = 0
+        worker.pending_conns = deque()
+        worker.poller = selectors.DefaultSelector()
+
+        with socket.create_server(("127.0.0.1", 0)) as listener:
+            client = socket.create_connection(listener.getsockname())
+            try:
+                worker.accept(listener)
+
+                assert worker.nr_conns == 1
+                assert len(worker.pending_conns) == 1
+                assert worker.poller.select(timeout=0) == []
+
+                client.sendall(b"GET / HTTP/1.1\r\n")
+                [(key, _)] = worker.poller.select(timeout=5)
+                assert key.fileobj is worker.pending_conns[0].sock
+            finally:
+                client.close()
+                for conn in worker.pending_conns:
+                    conn.close()
+                worker.poller.close()
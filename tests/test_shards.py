@@ -0,0 +1,240 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.data.data_loader import DataLoader, DataLoadError
+from app.data.shards import is_sharded, shard_paths
+from app.services.price_service import PriceService
+from app.services.storage import _INDEX_CACHE_ENTRIES, ShardedBackend
+
+HEADER = "state,price,timestamp\n"
+
+
+def _rows(first, days):
+    rows = []
+    for step in range(days * 4):
+        timestamp = first + timedelta(hours=6 * step)
+        rows.append(f"NSW,{step % 17 * 3}.50,{timestamp:%Y-%m-%d %H:%M:%S}\n")
+        if step % 3:
+            rows.append(f"VIC,{step % 11 - 4}.25,{timestamp:%Y-%m-%d %H:%M:%S}\n")
+    return rows
+
+
+@pytest.fixture
+def rows():
+    return _rows(datetime(2025, 1, 20), 44)
+
+
+@pytest.fixture
+def shard_dir(tmp_path, rows):
+    directory = tmp_path / "shards"
+    directory.mkdir()
+    for month in ("01", "02", "03"):
+        lines = [row for row in rows if f"2025-{month}-" in row]
+        (directory / f"2025-{month}.csv").write_text(HEADER + "".join(lines))
+    (directory / "notes.txt").write_text("not a shard")
+    return directory
+
+
+@pytest.fixture
+def services(tmp_path, rows, shard_dir):
+    single = tmp_path / "all.csv"
+    single.write_text(HEADER + "".join(rows))
+    return (
+        PriceService(DataLoader(single).load()),
+        PriceService(backend=ShardedBackend.load(shard_dir, shard_workers=2)),
+    )
+
+
+class TestShardDiscovery:
+    def test_directory_and_glob(self, shard_dir, tmp_path):
+        names = ["2025-01.csv", "2025-02.csv", "2025-03.csv"]
+
+        assert is_sharded(shard_dir)
+        assert [p.name for p in shard_paths(shard_dir)] == names
+        assert is_sharded(shard_dir / "2025-0[23].csv")
+        assert [p.name for p in shard_paths(shard_dir / "2025-0[23].csv")] == names[1:]
+        assert not is_sharded(shard_dir / "2025-01.csv")
+
+    def test_no_shards(self, tmp_path):
+        with pytest.raises(DataLoadError, match="No shards"):
+            ShardedBackend.load(tmp_path / "missing-*.csv")
+
+
+class TestShardedQueries:
+    def test_states_and_counts(self, services):
+        memory, sharded = services
+
+        assert sharded.get_available_states() == memory.get_available_states()
+        assert sharded.get_record_counts() == memory.get_record_counts()
+        assert sharded.record_count == memory.record_count
+
+    @pytest.mark.parametrize(
+        ("start", "end"),
+        [
+            (None, None),
+            (datetime(2025, 2, 1), datetime(2025, 3, 1)),
+            (datetime(2025, 1, 25, 6), datetime(2025, 2, 10, 18)),
+            (datetime(2025, 2, 27), None),
+        ],
+    )
+    def test_means(self, services, start, end):
+        memory, sharded = services
+
+        for state in ("NSW", "VIC"):
+            assert sharded.get_mean_price(state, start, end) == memory.get_mean_price(
+                state, start, end
+            )
+
+    @pytest.mark.parametrize("interval", ["hour", "day", "week"])
+    def test_interval_statistics_merge_across_shards(self, services, interval):
+        memory, sharded = services
+        start, end = datetime(2025, 1, 27), datetime(2025, 2, 3)
+
+        for args in ((), (start,), (start, end)):
+            assert sharded.get_interval_statistics(
+                "VIC", interval, *args
+            ) == memory.get_interval_statistics("VIC", interval, *args)
+
+    def test_other_queries_read_the_combined_series(self, services):
+        memory, sharded = services
+        start = datetime(2025, 1, 30)
+
+        assert sharded.get_distribution_statistics(
+            "NSW", [5, 50, 95], start
+        ) == memory.get_distribution_statistics("NSW", [5, 50, 95], start)
+        assert sharded.get_spread_statistics("NSW", "VIC") == memory.get_spread_statistics(
+            "NSW", "VIC"
+        )
+        page = sharded.get_record_window("VIC", start, limit=5)
+        expected = memory.get_record_window("VIC", start, limit=5)
+        assert list(page.prices) == list(expected.prices)
+        assert page.next_cursor == expected.next_cursor
+
+    def test_prunes_shards_by_state_and_range(self, shard_dir):
+        backend = ShardedBackend.load(shard_dir)
+        feb = (int(datetime(2025, 2, 1).timestamp()), int(datetime(2025, 3, 1).timestamp()))
+
+        shards = backend._overlapping("NSW", *feb)
+        assert [shard.path.name for shard in shards] == ["2025-02.csv"]
+        assert shards[0].covers("NSW", *feb)
+
+    def test_overlapping_shards(self, tmp_path):
+        directory = tmp_path / "overlap"
+        directory.mkdir()
+        (directory / "a.csv").write_text(
+            HEADER + "NSW,1.00,2025-01-01 00:00:00\nNSW,3.00,2025-01-01 01:00:00\n"
+        )
+        (directory / "b.csv").write_text(
+            HEADER + "NSW,2.00,2025-01-01 00:30:00\nNSW,4.00,2025-01-01 01:00:00\n"
+        )
+
+        backend = ShardedBackend.load(directory)
+
+        chunks = list(backend.iter_chunks("NSW", None, None, 3))
+        assert [list(prices) for _, prices in chunks] == [[10_000, 20_000, 30_000], [40_000]]
+        assert list(backend.records("NSW", None, None).prices) == [10_000, 20_000, 30_000, 40_000]
+        # A page never splits the two records at 01:00.
+        page = backend.records("NSW", None, None, limit=3)
+        assert len(page.prices) == 4
+        assert page.next_cursor is None
+
+    def test_records_page_across_shards(self, services):
+        memory, sharded = services
+        start = datetime(2025, 1, 25)
+
+        for limit in (7, 50):
+            pages = [[], []]
+            for pages_for, service in zip(pages, services, strict=True):
+                after = None
+                while True:
+                    page = service.get_record_window("VIC", start, after=after, limit=limit)
+                    pages_for.append(list(page.prices))
+                    if page.next_cursor is None:
+                        break
+                    after = page.next_cursor
+            assert pages[0] == pages[1]
+
+    def test_chunks_are_read_from_the_shards(self, shard_dir):
+        backend = ShardedBackend.load(shard_dir)
+        start = int(datetime(2025, 1, 30).timestamp())
+
+        chunks = list(backend.iter_chunks("NSW", start, None, 1000))
+
+        assert all(isinstance(prices, memoryview) for _, prices in chunks)
+        assert len(chunks) == 3
+
+    def test_wide_distributions_merge_shard_sketches(self, services, monkeypatch):
+        memory, sharded = services
+        monkeypatch.setattr("app.services.distributions.EXACT_RANGE_LIMIT", 10)
+        monkeypatch.setattr("app.services.storage.EXACT_RANGE_LIMIT", 10)
+        start = datetime(2025, 1, 25, 6)
+
+        expected = memory.get_distribution_statistics("NSW", [5, 50, 95], start)
+        stats = sharded.get_distribution_statistics("NSW", [5, 50, 95], start)
+
+        assert stats == expected
+        assert not stats.exact
+
+    def test_whole_shard_figures_come_from_summaries(self, shard_dir, monkeypatch):
+        monkeypatch.setattr("app.services.storage.EXACT_RANGE_LIMIT", 10)
+        backend = ShardedBackend.load(shard_dir)
+        series = DataLoader(shard_dir / "2025-02.csv").load().get_prices_for_state("NSW")
+        feb = (int(datetime(2025, 2, 1).timestamp()), int(datetime(2025, 3, 1).timestamp()))
+
+        total, distribution = backend.describe("NSW", *feb, [])
+
+        assert total == series.price_total()
+        assert distribution.record_count == len(series)
+        assert distribution.square_total == sum(p * p for p in series.prices)
+        assert distribution.minimum == min(series.prices)
+        assert distribution.maximum == max(series.prices)
+        assert backend.cache_stats["indexes"].misses == 0
+
+
+class TestShardedReload:
+    def test_adding_a_shard_loads_only_that_shard(self, shard_dir):
+        service = PriceService(backend=ShardedBackend.load(shard_dir))
+        before = service._backend
+        mean = service.get_mean_price("NSW")
+        version = service.dataset_version
+
+        (shard_dir / "2025-04.csv").write_text(HEADER + "NSW,1000.00,2025-04-01 00:00:00\n")
+
+        assert service.reload() == {"NSW"}
+        after = service._backend
+        assert [s.loader for s in after.shards[:3]] == [s.loader for s in before.shards]
+        assert service.get_mean_price("NSW").record_count == mean.record_count + 1
+        assert service.dataset_version != version
+        assert service.reload() == frozenset()
+
+    def test_index_cache_grows_with_the_shard_count(self, shard_dir):
+        backend = ShardedBackend.load(shard_dir)
+        (shard_dir / "2025-04.csv").write_text(HEADER + "NSW,1000.00,2025-04-01 00:00:00\n")
+
+        refreshed, _ = backend.refresh()
+
+        assert refreshed._indexes is backend._indexes
+        assert refreshed._indexes.max_entries == _INDEX_CACHE_ENTRIES * 4
+
+    def test_appending_to_a_shard(self, shard_dir):
+        service = PriceService(backend=ShardedBackend.load(shard_dir))
+        vic = service.get_interval_statistics("VIC", "day")
+
+        with open(shard_dir / "2025-03.csv", "a") as f:
+            f.write("NSW,5.00,2025-03-05 12:00:00\n")
+
+        assert service.reload() == {"NSW"}
+        assert service.get_interval_statistics("VIC", "day") is vic
+
+
+class TestShardedApp:
+    def test_data_file_directory(self, shard_dir, monkeypatch):
+        monkeypatch.setattr("app.config.TestingConfig.DATA_FILE", shard_dir)
+        client = create_app("testing").test_client()
+
+        assert client.get("/api/v1/states").get_json() == {"states": ["NSW", "VIC"]}
+        response = client.get("/api/v1/prices/mean?state=NSW&from=2025-03-01T00:00:00")
+        assert response.status_code == 200
+        assert response.get_json()["record_count"] == 4 * 4
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import pytest
+
+from app.data.data_loader import DataLoader, DataLoadError
+from app.data.snapshot import open_snapshot
+from app.data.states import StateTable
+
+
+@pytest.fixture
+def snapshot_path(sample_csv, tmp_path):
+    path = tmp_path / "prices.snap"
+    DataLoader(sample_csv).load().save_snapshot(path)
+    return path
+
+
+class TestSnapshot:
+    def test_round_trip(self, sample_csv, snapshot_path):
+        from_csv = DataLoader(sample_csv).load()
+        from_snapshot = DataLoader(snapshot_path).load()
+
+        assert from_snapshot.record_count == from_csv.record_count
+        assert from_snapshot.get_available_states() == from_csv.get_available_states()
+        for state in from_csv.get_available_states():
+            assert list(from_snapshot.get_prices_for_state(state)) == list(
+                from_csv.get_prices_for_state(state)
+            )
+
+    def test_columns_are_zero_copy_views(self, snapshot_path):
+        series = DataLoader(snapshot_path).load().get_prices_for_state("VIC")
+
+        assert series is not None
+        assert isinstance(series.prices, memoryview)
+        assert series[1].price == Decimal("-50.00")
+        assert series.price_total() == 1_000_000
+
+    def test_checksum_mismatch(self, snapshot_path):
+        data = bytearray(snapshot_path.read_bytes())
+        data[-1] ^= 0xFF
+        snapshot_path.write_bytes(bytes(data))
+
+        with pytest.raises(DataLoadError, match="checksum mismatch"):
+            DataLoader(snapshot_path).load()
+
+    def test_unsupported_version(self, snapshot_path):
+        data = bytearray(snapshot_path.read_bytes())
+        data[8] = 99
+        snapshot_path.write_bytes(bytes(data))
+
+        with pytest.raises(DataLoadError, match="Unsupported snapshot version"):
+            DataLoader(snapshot_path).load()
+
+    def test_truncated(self, snapshot_path):
+        snapshot_path.write_bytes(snapshot_path.read_bytes()[:12])
+
+        with pytest.raises(DataLoadError, match="truncated"):
+            DataLoader(snapshot_path).load()
+
+    def test_states_outside_the_table_are_skipped(self, snapshot_path):
+        loader = DataLoader(snapshot_path, states=StateTable(["VIC"])).load()
+
+        assert loader.get_available_states() == ["VIC"]
+        assert loader.record_count == 2
+
+    def test_strict_table_rejects_unknown_states(self, snapshot_path):
+        with pytest.raises(DataLoadError, match="Snapshot contains unknown state 'NSW'"):
+            DataLoader(snapshot_path, states=StateTable(["VIC"], strict=True)).load()
+
+    def test_header_metadata(self, snapshot_path):
+        snapshot = open_snapshot(snapshot_path)
+
+        assert snapshot.record_count == 4
+        assert set(snapshot.states) == {"NSW", "VIC"}
+
+
+class TestBuildSnapshotCommand:
+    def test_build_snapshot(self, app, sample_csv, tmp_path):
+        destination = tmp_path / "out.snap"
+
+        result = app.test_cli_runner().invoke(
+            args=["build-snapshot", str(sample_csv), str(destination)]
+        )
+
+        assert result.exit_code == 0
+        assert "Wrote 4 records" in result.output
+        assert DataLoader(destination).load().record_count == 4
+
+    def test_build_snapshot_invalid_source(self, app, tmp_path):
+        source = tmp_path / "bad.csv"
+        source.write_text("state,price\n")
+
+        result = app.test_cli_runner().invoke(
+            args=["build-snapshot", str(source), str(tmp_path / "out.snap")]
+        )
+
+        assert result.exit_code != 0
+        assert "Missing required columns" in result.output
@@ -0,0 +1,48 @@
+from array import array
+
+from app.services.spreads import AlignedPrices, align, last_per_timestamp, summarize
+
+
+class TestAlign:
+    def test_identical_timestamps(self):
+        timestamps = memoryview(array("q", [0, 1800, 3600]))
+
+        aligned = align(timestamps, [1, 2, 3], timestamps, [4, 5, 6])
+
+        assert aligned == AlignedPrices([0, 1800, 3600], [1, 2, 3], [4, 5, 6])
+
+    def test_missing_timestamps_on_either_side(self):
+        aligned = align([0, 1800, 5400, 7200], [1, 2, 3, 4], [1800, 3600, 5400, 9000], [5, 6, 7, 8])
+
+        assert aligned.timestamps == [0, 1800, 3600, 5400, 7200, 9000]
+        assert aligned.a == [1, 2, None, 3, 4, None]
+        assert aligned.b == [None, 5, 6, 7, None, 8]
+
+    def test_one_side_empty(self):
+        assert align([], [], [0, 1800], [1, 2]) == AlignedPrices([0, 1800], [None, None], [1, 2])
+
+    def test_last_per_timestamp(self):
+        timestamps, prices = memoryview(array("q", [0, 1800])), [1, 2]
+        assert last_per_timestamp(timestamps, prices) == (timestamps, prices)
+
+        assert last_per_timestamp([0, 0, 1800, 3600, 3600], [1, 2, 3, 4, 5]) == (
+            [0, 1800, 3600],
+            [2, 3, 5],
+        )
+
+
+class TestSummarize:
+    def test_sums_cover_shared_timestamps_only(self):
+        summary = summarize(AlignedPrices([0, 1, 2, 3], [10, 20, None, 5], [4, 30, 7, None]))
+
+        assert summary.matched == 2
+        assert (summary.missing_a, summary.missing_b) == (1, 1)
+        assert summary.spread_total == -4
+        assert (summary.minimum, summary.maximum) == (-10, 6)
+        assert summary.product_total == 10 * 4 + 20 * 30
+
+    def test_no_shared_timestamps(self):
+        summary = summarize(AlignedPrices([0, 1], [1, None], [None, 2]))
+
+        assert summary.matched == 0
+        assert summary.minimum is None
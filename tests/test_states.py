@@ -0,0 +1,45 @@
+import pytest
+
+from app.config import Config
+from app.data.states import StateTable
+
+
+@pytest.fixture
+def table():
+    return StateTable(["NSW", "vic", "SA"], {"Victoria": "VIC", "New South Wales": "nsw"})
+
+
+class TestStateTable:
+    def test_codes_are_sorted_and_canonical(self, table):
+        assert table.codes == ("NSW", "SA", "VIC")
+
+    @pytest.mark.parametrize("raw", ["VIC", "vic", "Vic", "vIc", " vic ", "VICTORIA", "victoria"])
+    def test_resolves_casings_aliases_and_whitespace(self, table, raw):
+        assert table.resolve(raw) == "VIC"
+
+    def test_resolved_codes_are_shared(self, table):
+        assert table.resolve("vic") is table.resolve("Victoria") is table.codes[2]
+        assert table.resolve("new south wales") == "NSW"
+
+    @pytest.mark.parametrize("raw", ["WA", "", "VI", "Victoria state"])
+    def test_unknown(self, table, raw):
+        assert table.resolve(raw) is None
+
+    def test_alias_for_unknown_state(self):
+        with pytest.raises(ValueError, match="Alias 'Perth' refers to unknown state 'WA'"):
+            StateTable(["NSW"], {"Perth": "WA"})
+
+    def test_restricted_to(self, table):
+        served = table.restricted_to(["VIC", "QLD"])
+
+        assert served.codes == ("QLD", "VIC")
+        assert served.resolve("victoria") == "VIC"
+        assert served.resolve("qld") == "QLD"
+        assert served.resolve("NSW") is None
+
+    def test_from_config(self):
+        table = StateTable.from_config(vars(Config))
+
+        assert table.codes == ("NSW", "QLD", "SA", "TAS", "VIC")
+        assert table.resolve("Tasmania") == "TAS"
+        assert not table.strict
@@ -0,0 +1,240 @@
+from datetime import datetime
+
+import pytest
+from flask.cli import locate_app
+
+from app import create_app
+from app.data.data_loader import DataLoader, DataLoadError
+from app.data.sqlite_store import SqliteStore, import_csv
+from app.services.price_service import NoPricesInRangeError, PriceService, StateNotFoundError
+from app.services.storage import SqliteBackend
+
+
+@pytest.fixture
+def prices_csv(tmp_path):
+    rows = ["state,price,timestamp"]
+    for day in range(1, 15):
+        for hour in (0, 6, 23):
+            rows.append(f"NSW,{day * 10 + hour}.25,2025-01-{day:02d} {hour:02d}:30:00")
+            rows.append(f"VIC,{hour - day}.5,2025-01-{day:02d} {hour:02d}:00:00")
+    rows.append("VIC,-1.5,2025-01-03 06:00:00")
+    rows.append("NSW,7.75,2025-01-03 06:00:00")
+    csv_path = tmp_path / "prices.csv"
+    csv_path.write_text("\n".join(rows) + "\n")
+    return csv_path
+
+
+@pytest.fixture
+def database(prices_csv, tmp_path):
+    path = tmp_path / "prices.sqlite"
+    import_csv(prices_csv, path, batch_rows=10)
+    return path
+
+
+@pytest.fixture
+def services(prices_csv, database):
+    return (
+        PriceService(DataLoader(prices_csv).load()),
+        PriceService(backend=SqliteBackend.open(database)),
+    )
+
+
+class TestSqliteImport:
+    def test_states_counts_and_version_match_the_csv(self, prices_csv, database):
+        loader = DataLoader(prices_csv).load()
+        backend = SqliteBackend.open(database)
+
+        assert backend.get_available_states() == loader.get_available_states()
+        assert backend.get_record_counts() == loader.get_record_counts()
+        assert backend.record_count == loader.record_count
+        assert backend.version == loader.version
+        assert backend.loads_lazily
+
+    def test_records_match_the_csv(self, prices_csv, database):
+        backend = SqliteBackend.open(database)
+        expected = DataLoader(prices_csv).load().get_prices_for_state("VIC")
+
+        chunks = list(backend.iter_chunks("VIC", None, None, 7))
+        assert [t for timestamps, _ in chunks for t in timestamps] == list(expected.timestamps)
+        assert [p for _, prices in chunks for p in prices] == list(expected.prices)
+        assert backend.state_digest("VIC") == expected.digest()
+
+    def test_rejects_other_files(self, prices_csv):
+        with pytest.raises(DataLoadError, match="Invalid database"):
+            SqliteStore(prices_csv)
+
+    def test_failed_import_removes_the_temporary_file(self, tmp_path):
+        source = tmp_path / "empty.csv"
+        source.write_text("state,price,timestamp\n")
+        destination = tmp_path / "prices.sqlite"
+
+        with pytest.raises(DataLoadError, match="no data rows"):
+            import_csv(source, destination)
+
+        assert list(tmp_path.iterdir()) == [source]
+
+
+class TestSqliteParity:
+    @pytest.mark.parametrize(
+        ("start", "end"),
+        [
+            (None, None),
+            (datetime(2025, 1, 3, 6), None),
+            (datetime(2025, 1, 2), datetime(2025, 1, 9)),
+        ],
+    )
+    def test_means(self, services, start, end):
+        memory, sqlite = services
+        for state in ("NSW", "vic"):
+            assert sqlite.get_mean_price(state, start, end) == memory.get_mean_price(
+                state, start, end
+            )
+
+    @pytest.mark.parametrize("interval", ["hour", "day", "week"])
+    def test_interval_statistics(self, services, interval):
+        memory, sqlite = services
+        start, end = datetime(2025, 1, 2, 6), datetime(2025, 1, 12, 23, 30)
+
+        assert sqlite.get_interval_statistics("VIC", interval) == memory.get_interval_statistics(
+            "VIC", interval
+        )
+        assert sqlite.get_interval_statistics(
+            "NSW", interval, start, end
+        ) == memory.get_interval_statistics("NSW", interval, start, end)
+
+    def test_distribution_statistics(self, services):
+        memory, sqlite = services
+        percentiles = [0, 5, 50, 90, 100]
+
+        for start in (None, datetime(2025, 1, 5)):
+            expected = memory.get_distribution_statistics("VIC", percentiles, start)
+            assert sqlite.get_distribution_statistics("VIC", percentiles, start) == expected
+
+    def test_record_pages(self, services):
+        memory, sqlite = services
+        after = None
+        while True:
+            expected = memory.get_record_window("VIC", after=after, limit=7)
+            page = sqlite.get_record_window("VIC", after=after, limit=7)
+
+            assert list(page.timestamps) == list(expected.timestamps)
+            assert list(page.prices) == list(expected.prices)
+            assert page.next_cursor == expected.next_cursor
+            if page.next_cursor is None:
+                break
+            after = page.next_cursor
+
+    def test_stream_records(self, services):
+        memory, sqlite = services
+        start = datetime(2025, 1, 3)
+
+        def flatten(stream):
+            return [(list(ts), list(prices)) for ts, prices in stream.chunks]
+
+        assert flatten(sqlite.stream_records("NSW", start, chunk_size=5)) == flatten(
+            memory.stream_records("NSW", start, chunk_size=5)
+        )
+
+    @pytest.mark.parametrize("method", ["lttb", "minmax"])
+    def test_downsampled_series(self, services, method):
+        memory, sqlite = services
+
+        expected = memory.get_downsampled_series("NSW", 9, method=method)
+        assert sqlite.get_downsampled_series("NSW", 9, method=method) == expected
+
+    @pytest.mark.parametrize("statistic", ["mean", "std", "min", "max"])
+    def test_rolling_statistics(self, services, statistic):
+        memory, sqlite = services
+        start = datetime(2025, 1, 2)
+
+        expected = memory.get_rolling_statistics("NSW", 5, statistic, start)
+        assert sqlite.get_rolling_statistics("NSW", 5, statistic, start) == expected
+
+    def test_spread_statistics(self, services):
+        memory, sqlite = services
+
+        expected = memory.get_spread_statistics("NSW", "VIC", start=datetime(2025, 1, 3))
+        assert sqlite.get_spread_statistics("NSW", "VIC", start=datetime(2025, 1, 3)) == expected
+        assert expected.matched == 1
+        assert expected.missing_a > 0
+
+    def test_errors(self, services):
+        _, sqlite = services
+
+        with pytest.raises(StateNotFoundError, match="Available states: \\['NSW', 'VIC'\\]"):
+            sqlite.get_mean_price("WA")
+        with pytest.raises(NoPricesInRangeError):
+            sqlite.get_mean_price("NSW", start=datetime(2026, 1, 1))
+        with pytest.raises(NoPricesInRangeError):
+            sqlite.get_distribution_statistics("NSW", [50], start=datetime(2026, 1, 1))
+
+
+class TestSqliteReload:
+    def test_reload_reports_changed_states(self, prices_csv, database):
+        service = PriceService(backend=SqliteBackend.open(database))
+        version = service.dataset_version
+        assert service.reload() == frozenset()
+
+        with open(prices_csv, "a") as f:
+            f.write("NSW,1.00,2025-02-01 00:00:00\n")
+        import_csv(prices_csv, database)
+
+        assert service.reload() == {"NSW"}
+        assert service.dataset_version == DataLoader(prices_csv).load().version != version
+        assert service.get_mean_price("NSW", start=datetime(2025, 2, 1)).record_count == 1
+
+
+class TestSqliteApp:
+    def test_serves_from_the_database(self, database, monkeypatch):
+        monkeypatch.setattr("app.config.TestingConfig.STORAGE_BACKEND", "sqlite", raising=False)
+        monkeypatch.setattr("app.config.TestingConfig.SQLITE_DATABASE", database)
+        client = create_app("testing").test_client()
+
+        assert client.get("/api/v1/states").get_json() == {"states": ["NSW", "VIC"]}
+        assert client.get("/api/v1/health").get_json()["record_count"] == 86
+
+        response = client.get("/api/v1/prices/mean?state=VIC&from=2025-01-14T23:00:00")
+        assert response.get_json()["mean_price"] == 9.5
+
+        export = client.get("/api/v1/prices/export?state=VIC&from=2025-01-14T06:00:00")
+        assert export.get_data(as_text=True).splitlines() == [
+            "state,price,timestamp",
+            "VIC,-8.50,2025-01-14 06:00:00",
+            "VIC,9.50,2025-01-14 23:00:00",
+        ]
+
+    def test_flask_commands_run_before_the_database_exists(self, prices_csv, tmp_path, monkeypatch):
+        database = tmp_path / "new.sqlite"
+        monkeypatch.setenv("FLASK_ENV", "testing")
+        monkeypatch.setattr("app.config.TestingConfig.STORAGE_BACKEND", "sqlite", raising=False)
+        monkeypatch.setattr("app.config.TestingConfig.SQLITE_DATABASE", database)
+        app = locate_app("app", "create_app(load_dataset=False)")
+
+        result = app.test_cli_runner().invoke(
+            args=["import-sqlite", str(prices_csv), str(database)]
+        )
+        assert result.exit_code == 0
+        assert "PRICE_SERVICE" not in app.config
+
+        client = create_app("testing").test_client()
+        assert client.get("/api/v1/health").get_json()["record_count"] == 86
+        assert client.get("/api/v1/states").get_json() == {"states": ["NSW", "VIC"]}
+
+    def test_flask_run_loads_before_serving(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("FLASK_RUN_FROM_CLI", "true")
+        monkeypatch.setattr("app.config.TestingConfig.STORAGE_BACKEND", "sqlite", raising=False)
+        monkeypatch.setattr("app.config.TestingConfig.SQLITE_DATABASE", tmp_path / "missing.sqlite")
+
+        with pytest.raises(DataLoadError, match="Database not found"):
+            create_app("testing")
+
+    def test_import_sqlite_command(self, app, prices_csv, tmp_path):
+        destination = tmp_path / "imported.sqlite"
+
+        result = app.test_cli_runner().invoke(
+            args=["import-sqlite", str(prices_csv), str(destination), "--batch-rows", "7"]
+        )
+
+        assert result.exit_code == 0
+        assert "Wrote 86 records" in result.output
+        assert SqliteBackend.open(destination).get_record_counts() == {"NSW": 43, "VIC": 43}